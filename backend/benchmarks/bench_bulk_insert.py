@@ -0,0 +1,61 @@
+"""Benchmark: redova u sekundi — pojedinacni create_transaction vs bulk insert.
+
+    python benchmarks/bench_bulk_insert.py --rows 5000 --batch 1000
+"""
+
+import argparse
+import asyncio
+import datetime
+import time
+
+from common import database
+from seed_data import seed_user
+
+from src.modules.transactions import service
+from src.modules.transactions.schemas import TransactionCreate
+
+
+def make_items(category_id: int, count: int) -> list[dict]:
+    start = datetime.date(2026, 1, 1)
+    return [
+        {
+            "amount": 100 + i % 500,
+            "type": "expense",
+            "category_id": category_id,
+            "description": f"Uvoz #{i}",
+            "date": (start + datetime.timedelta(days=i % 365)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    async with database() as (_, session_factory):
+        async with session_factory() as db:
+            user, categories = await seed_user(db, 0)
+        category_id = categories[-1].id
+        items = make_items(category_id, args.rows)
+
+        async with session_factory() as db:
+            started = time.perf_counter()
+            for item in items:
+                await service.create_transaction(db, user.id, TransactionCreate.model_validate(item))
+            single = time.perf_counter() - started
+
+        async with session_factory() as db:
+            started = time.perf_counter()
+            for offset in range(0, len(items), args.batch):
+                await service.create_transactions_bulk(db, user.id, items[offset:offset + args.batch])
+            bulk = time.perf_counter() - started
+
+    print(f"single-row: {args.rows / single:10.0f} rows/s ({single:.2f}s)")
+    print(f"bulk({args.batch}): {args.rows / bulk:10.0f} rows/s ({bulk:.2f}s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""Benchmark: zbir podstabla kategorija — closure tabela vs. rekurzivni CTE.
+
+    python benchmarks/bench_category_tree.py --depth 5 --branching 3
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_category_tree.py
+
+Rashodne kategorije cine stablo dubine `depth` (koren + `depth` nivoa). Za nasumicne
+cvorove se meri zbir monthly_rollups celog podstabla: closure tabela je jedan join
+po (ancestor_id), CTE svaki put obilazi stablo preko parent_id.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+
+from common import Timer, database, describe
+from seed_data import seed_user
+
+from sqlalchemy import func, select, text, update
+
+from src.config.category_tree import subtree_cte
+from src.config.models import Category, CategoryClosure, MonthlyRollup
+from src.modules.dashboard import service
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--branching", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    nodes = sum(args.branching ** level for level in range(args.depth + 1))
+    url = os.environ.get("BENCH_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    async with database(url) as (engine, session_factory):
+        async with session_factory() as db:
+            user, cats = await seed_user(db, args.transactions, categories=3 + nodes)
+            tree = [cat.id for cat in cats[3:]]
+            # Heap raspored: roditelj cvora i je (i - 1) // branching; trigger-i pune closure tabelu
+            for index in range(1, len(tree)):
+                await db.execute(
+                    update(Category).where(Category.id == tree[index]).values(parent_id=tree[(index - 1) // args.branching])
+                )
+            await db.commit()
+            # Statistika za planer (PostgreSQL je skuplja autovacuum-om)
+            await db.execute(text("ANALYZE"))
+            closure_rows = (await db.execute(select(func.count()).select_from(CategoryClosure))).scalar()
+        print(f"{nodes} kategorija u stablu dubine {args.depth}, {closure_rows} closure redova")
+
+        rng = random.Random(7)
+        roots = [rng.choice(tree[: len(tree) // args.branching]) for _ in range(args.repeat)]
+
+        async with session_factory() as db:
+            samples, closure_totals = [], []
+            for root in roots:
+                with Timer() as timer:
+                    result = await db.execute(
+                        select(func.sum(MonthlyRollup.total))
+                        .join(CategoryClosure, CategoryClosure.descendant_id == MonthlyRollup.category_id)
+                        .where(CategoryClosure.ancestor_id == root, MonthlyRollup.user_id == user.id)
+                    )
+                    closure_totals.append(result.scalar())
+                samples.append(timer.elapsed)
+            print(f"{'closure join':<18} {describe(samples)}")
+
+            samples, cte_totals = [], []
+            for root in roots:
+                with Timer() as timer:
+                    subtree = subtree_cte(root)
+                    result = await db.execute(
+                        select(func.sum(MonthlyRollup.total))
+                        .join(subtree, subtree.c.descendant_id == MonthlyRollup.category_id)
+                        .where(MonthlyRollup.user_id == user.id)
+                    )
+                    cte_totals.append(result.scalar())
+                samples.append(timer.elapsed)
+            print(f"{'recursive CTE':<18} {describe(samples)}")
+            assert closure_totals == cte_totals
+
+            samples = []
+            for _ in range(args.repeat // 10):
+                with Timer() as timer:
+                    await service.get_by_category(db, user.id, "expense", subtree=True)
+                samples.append(timer.elapsed)
+            print(f"{'by-category tree':<18} {describe(samples)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
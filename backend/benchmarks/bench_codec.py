@@ -0,0 +1,65 @@
+"""Benchmark: velicina payload-a i vreme encode/decode po codec-u za prave dashboard odgovore.
+
+    python benchmarks/bench_codec.py --transactions 20000 --rounds 2000
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import database
+from seed_data import seed_user
+
+from src.modules.dashboard import service
+from src.utils.codec import CacheCodec
+
+
+async def dashboard_payloads(transactions: int) -> dict[str, object]:
+    async with database() as (_, session_factory):
+        async with session_factory() as db:
+            user, _ = await seed_user(db, transactions)
+            return {
+                "summary": (await service.get_summary(db, user.id)).model_dump(mode="json"),
+                "monthly(24)": (await service.get_monthly_trends(db, user.id, 24)).model_dump(mode="json"),
+                "by-category": (await service.get_by_category(db, user.id, "expense")).model_dump(mode="json"),
+                "recent(50)": [r.model_dump(mode="json") for r in await service.get_recent_transactions(db, user.id, 50)],
+            }
+
+
+def measure(codec: CacheCodec, value: object, rounds: int) -> tuple[int, float, float]:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        data = codec.encode(value, 0.0)
+    encode_us = (time.perf_counter() - started) / rounds * 1e6
+    started = time.perf_counter()
+    for _ in range(rounds):
+        codec.decode(data)
+    decode_us = (time.perf_counter() - started) / rounds * 1e6
+    return len(data), encode_us, decode_us
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    payloads = await dashboard_payloads(args.transactions)
+    variants = [
+        (name, compression)
+        for name in ("json", "orjson", "msgpack")
+        for compression in ("none", "zlib", "lz4")
+    ]
+
+    print(f"{'payload':<13} {'codec':<8} {'compr':<5} {'bytes':>8} {'encode µs':>10} {'decode µs':>10}")
+    for label, value in payloads.items():
+        for name, compression in variants:
+            codec = CacheCodec(codec=name, compression=compression, compress_min_bytes=512)
+            if codec.compression != compression:
+                continue  # opciona zavisnost nije instalirana
+            size, enc, dec = measure(codec, value, args.rounds)
+            print(f"{label:<13} {name:<8} {compression:<5} {size:>8} {enc:>10.1f} {dec:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""Benchmark: summary za proizvoljan period — agregat nad transakcijama vs. daily_balances.
+
+    python benchmarks/bench_dashboard_summary.py --transactions 1000000
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_dashboard_summary.py
+
+Prefiksne sume daju zbir za bilo koji period kroz dva index lookup-a, nezavisno
+od broja transakcija u periodu.
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import random
+
+from common import Timer, database, describe
+from seed_data import seed_user
+
+from sqlalchemy import case, func, select
+
+from src.config.models import Transaction, TransactionType
+from src.modules.dashboard import service
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    async with database(url) as (engine, session_factory):
+        async with session_factory() as db:
+            user, _ = await seed_user(db, args.transactions)
+
+        rng = random.Random(7)
+        today = datetime.date.today()
+        ranges = []
+        for _ in range(args.repeat):
+            start = today - datetime.timedelta(days=rng.randint(30, 700))
+            ranges.append((start, start + datetime.timedelta(days=rng.randint(1, 365))))
+
+        async with session_factory() as db:
+            samples = []
+            for date_from, date_to in ranges:
+                with Timer() as timer:
+                    await db.execute(
+                        select(
+                            func.sum(case((Transaction.type == TransactionType.income, Transaction.amount), else_=0)),
+                            func.sum(case((Transaction.type == TransactionType.expense, Transaction.amount), else_=0)),
+                            func.count(),
+                        ).where(Transaction.user_id == user.id, Transaction.date.between(date_from, date_to))
+                    )
+                samples.append(timer.elapsed)
+            print(f"{'range aggregate':<18} {describe(samples)}")
+
+            samples = []
+            for date_from, date_to in ranges:
+                with Timer() as timer:
+                    await service.get_summary(db, user.id, date_from, date_to)
+                samples.append(timer.elapsed)
+            print(f"{'prefix lookup':<18} {describe(samples)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
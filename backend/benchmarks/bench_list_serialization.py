@@ -0,0 +1,70 @@
+"""Benchmark: CPU vreme po stranici liste (100 redova) — ORM + jsonable_encoder vs. kolone + pydantic-core.
+
+    python benchmarks/bench_list_serialization.py --pages 500
+
+"Pre" ponavlja stari put: select(Transaction) -> ORM entiteti -> jsonable_encoder -> json.dumps.
+"Posle" je trenutni put: projekcija kolona -> Row -> validacija + JSON u pydantic-core.
+Meri se process_time (CPU), ne zidni sat, da I/O baze ne maskira razliku.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from common import database
+from seed_data import seed_user
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+
+from src.config.models import Transaction
+from src.modules.transactions import service
+from src.modules.transactions.schemas import TransactionPage
+
+
+def _page(data, total: int, per_page: int) -> dict:
+    return {
+        "data": data, "total": total, "total_is_estimate": False,
+        "page": 1, "per_page": per_page, "total_pages": (total + per_page - 1) // per_page,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transactions", type=int, default=5_000)
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--pages", type=int, default=500)
+    args = parser.parse_args()
+
+    async with database() as (_, session_factory):
+        async with session_factory() as db:
+            user, _ = await seed_user(db, args.transactions)
+
+        order = [col.desc() for col in service.SORT_KEY]
+        async with session_factory() as db:
+            started = time.process_time()
+            for _ in range(args.pages):
+                rows = (await db.execute(
+                    select(Transaction).where(Transaction.user_id == user.id).order_by(*order).limit(args.per_page)
+                )).scalars().all()
+                json.dumps(jsonable_encoder(_page(rows, args.transactions, args.per_page))).encode()
+                db.expunge_all()
+            before = (time.process_time() - started) / args.pages * 1000
+
+            started = time.process_time()
+            for _ in range(args.pages):
+                rows = (await db.execute(
+                    select(*service.LIST_COLUMNS).where(Transaction.user_id == user.id).order_by(*order).limit(args.per_page)
+                )).all()
+                TransactionPage.model_validate(_page(rows, args.transactions, args.per_page)).model_dump_json()
+            after = (time.process_time() - started) / args.pages * 1000
+
+    print(f"{'path':<28} {'CPU ms/page':>12}")
+    print(f"{'ORM + jsonable_encoder':<28} {before:>12.3f}")
+    print(f"{'columns + pydantic-core':<28} {after:>12.3f}")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
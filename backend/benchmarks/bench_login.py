@@ -0,0 +1,79 @@
+"""Benchmark: login p99 i latencija ostalih endpointa pod mesovitim opterecenjem.
+
+Poredi bcrypt inline na event loop-u sa bcrypt-om kroz password pool.
+
+    python benchmarks/bench_login.py --logins 40 --others 400
+"""
+
+import argparse
+import asyncio
+import time
+from unittest.mock import patch
+
+from common import database, describe
+
+from httpx import ASGITransport, AsyncClient
+
+from src.app import app
+from src.config.database import get_db
+from src.config.models import User
+from src.modules.auth import service
+from src.modules.auth.service import create_access_token, hash_password
+
+
+async def _timed(samples: list[float], coro):
+    started = time.perf_counter()
+    await coro
+    samples.append(time.perf_counter() - started)
+
+
+async def run(mode: str, logins: int, others: int) -> None:
+    async with database() as (_, session_factory):
+        async with session_factory() as db:
+            user = User(email="bench@test.com", password=hash_password("bench123"), name="Bench")
+            db.add(user)
+            await db.commit()
+            token = create_access_token(user.id)
+
+        async def override_get_db():
+            async with session_factory() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        headers = {"Authorization": f"Bearer {token}"}
+        login_samples: list[float] = []
+        other_samples: list[float] = []
+
+        async def inline_run(fn, *args):
+            return fn(*args)
+
+        ctx = patch.object(service.password_pool, "run", inline_run) if mode == "inline" else patch.object(
+            service.password_pool, "max_queue", logins
+        )
+        with ctx:
+            transport = ASGITransport(app=app)
+            async with AsyncClient(transport=transport, base_url="http://bench") as client:
+                body = {"email": "bench@test.com", "password": "bench123"}
+                tasks = [_timed(login_samples, client.post("/api/auth/login", json=body)) for _ in range(logins)]
+                tasks += [_timed(other_samples, client.get("/api/categories/", headers=headers)) for _ in range(others)]
+                await asyncio.gather(*tasks)
+
+        app.dependency_overrides.clear()
+
+    print(f"[{mode:6}] login  {describe(login_samples)}")
+    print(f"[{mode:6}] other  {describe(other_samples)}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--others", type=int, default=400)
+    args = parser.parse_args()
+
+    for mode in ("inline", "pool"):
+        await run(mode, args.logins, args.others)
+    service.password_pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""Benchmark: offset vs keyset (cursor) paginacija na razlicitim dubinama.
+
+    python benchmarks/bench_pagination.py --transactions 200000
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_pagination.py
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from common import database
+from seed_data import seed_user
+
+from sqlalchemy import select
+
+from src.config.models import Transaction
+from src.modules.transactions import service
+from src.modules.transactions.schemas import PaginationMode, TransactionFilters
+from src.utils.pagination import encode_cursor
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transactions", type=int, default=200_000)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    async with database(url) as (_, session_factory):
+        async with session_factory() as db:
+            user, _ = await seed_user(db, args.transactions)
+
+        print(f"{'page':>6} {'offset ms':>10} {'cursor ms':>10}")
+        for page in args.pages:
+            offset = (page - 1) * args.per_page
+            if offset >= args.transactions:
+                continue
+            async with session_factory() as db:
+                # Cursor koji bi klijent imao posle prolaska do ove stranice
+                cursor = None
+                if offset:
+                    anchor = (await db.execute(
+                        select(Transaction)
+                        .where(Transaction.user_id == user.id)
+                        .order_by(*(col.desc() for col in service.SORT_KEY))
+                        .offset(offset - 1)
+                        .limit(1)
+                    )).scalar_one()
+                    cursor = encode_cursor(service._cursor_values(anchor), "next")
+
+                timings = {}
+                for mode in (PaginationMode.offset, PaginationMode.cursor):
+                    filters = TransactionFilters(page=page, per_page=args.per_page, pagination=mode, cursor=cursor)
+                    started = time.perf_counter()
+                    for _ in range(args.repeat):
+                        await service.get_transactions(db, user.id, filters)
+                        db.expunge_all()
+                    timings[mode] = (time.perf_counter() - started) / args.repeat * 1000
+            print(f"{page:>6} {timings[PaginationMode.offset]:>10.2f} {timings[PaginationMode.cursor]:>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
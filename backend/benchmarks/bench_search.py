@@ -0,0 +1,65 @@
+"""Benchmark: pretraga opisa transakcija vs. filtriranje cele istorije na klijentu.
+
+    python benchmarks/bench_search.py --transactions 1000000
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_search.py
+
+Na PostgreSQL-u upit koristi GIN indekse (tsvector + pg_trgm); na SQLite-u
+fallback (LIKE) skenira sve redove korisnika.
+"""
+
+import argparse
+import asyncio
+import os
+
+from common import Timer, database, describe
+from seed_data import seed_user
+
+from sqlalchemy import select, text
+
+from src.config.models import Transaction
+from src.modules.transactions import service
+from src.modules.transactions.schemas import TransactionFilters
+
+QUERIES = ["maxi", "rest dva", "gorvo", "internet sbb", "kafa #12"]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    async with database(url) as (engine, session_factory):
+        async with session_factory() as db:
+            user, _ = await seed_user(db, args.transactions)
+        if engine.dialect.name == "postgresql":
+            async with engine.begin() as conn:
+                await conn.execute(text("ANALYZE transactions"))
+
+        async with session_factory() as db:
+            # Dosadasnji pristup: cela istorija ide klijentu, filtrira se tamo
+            samples = []
+            for _ in range(max(1, args.repeat // 10)):
+                with Timer() as timer:
+                    descriptions = (await db.execute(
+                        select(Transaction.description).where(Transaction.user_id == user.id)
+                    )).scalars().all()
+                    [d for d in descriptions if d and "maxi" in d.lower()]
+                samples.append(timer.elapsed)
+            print(f"{'client-side filter':<22} {describe(samples)}")
+
+            filters = TransactionFilters()
+            for q in QUERIES:
+                samples, hits = [], 0
+                for _ in range(args.repeat):
+                    with Timer() as timer:
+                        result = await service.search_transactions(db, user.id, q, filters, args.limit)
+                    samples.append(timer.elapsed)
+                    hits = len(result.data)
+                print(f"{'search ' + repr(q):<22} {describe(samples)} hits={hits}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
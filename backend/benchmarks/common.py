@@ -0,0 +1,110 @@
+"""Zajednicki helperi za benchmark skripte (SQLite in-memory baza, merenje vremena)."""
+
+import statistics
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.config import redis as redis_config
+from src.config.database import Base
+
+
+class InMemoryRedis:
+    """Minimalni Redis u memoriji — servisi koji kesiraju (npr. broj transakcija) rade bez servera.
+
+    Vreme Redis round-trip-a nije ukljuceno u merenja.
+    """
+
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    async def delete(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    async def incr(self, key):
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    async def expire(self, key, seconds):
+        return key in self.data
+
+    async def exists(self, *keys):
+        return sum(1 for key in keys if key in self.data)
+
+    async def publish(self, channel, message):
+        return 0
+
+    async def eval(self, script, numkeys, *args):
+        # Jedina skripta u upotrebi: compare-and-delete za single-flight lock
+        key, token = args[0], args[1]
+        if self.data.get(key) == (token if isinstance(token, bytes) else str(token).encode()):
+            del self.data[key]
+            return 1
+        return 0
+
+
+def create_engine(url: str = "sqlite+aiosqlite:///:memory:"):
+    """Engine za benchmark. Za PostgreSQL prosledi DATABASE_URL."""
+    if url.startswith("sqlite"):
+        return create_async_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    return create_async_engine(url)
+
+
+@asynccontextmanager
+async def database(url: str = "sqlite+aiosqlite:///:memory:"):
+    """Kreira sve tabele i vraca (engine, session factory).
+
+    Ako Redis nije inicijalizovan, koristi se InMemoryRedis.
+    """
+    if redis_config.redis_client is None:
+        redis_config.redis_client = InMemoryRedis()
+    engine = create_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield engine, async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    finally:
+        await engine.dispose()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def describe(samples: list[float]) -> str:
+    """Formatira latencije (sekunde) kao p50/p99/max u ms."""
+    return (
+        f"n={len(samples):<5} p50={percentile(samples, 50) * 1000:8.2f}ms "
+        f"p99={percentile(samples, 99) * 1000:8.2f}ms max={max(samples, default=0) * 1000:8.2f}ms "
+        f"mean={statistics.fmean(samples) * 1000 if samples else 0:8.2f}ms"
+    )
+
+
+class Timer:
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
@@ -0,0 +1,77 @@
+"""Generator test podataka za benchmark skripte."""
+
+import datetime
+import random
+import uuid
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.models import Category, Transaction, TransactionType, User
+from src.config.rollups import drop_rollup_triggers, install_rollup_triggers, rebuild_statements
+
+DESCRIPTIONS = [
+    "Maxi market", "Lidl kupovina", "Gorivo NIS", "Plata", "Freelance projekat", "Restoran Dva jelena",
+    "Kafa", "Apoteka", "Racun za struju", "Internet SBB", "Bioskop", "Taxi", "Poklon", "Pijaca",
+]
+
+
+async def seed_user(
+    db: AsyncSession,
+    transactions: int,
+    categories: int = 20,
+    months: int = 24,
+    batch: int = 5000,
+    seed: int = 42,
+) -> tuple[User, list[Category]]:
+    """Kreira korisnika, kategorije i `transactions` nasumicnih transakcija (batch insert).
+
+    Trigger-i agregata su iskljuceni tokom unosa (nasumicni datumi bi na SQLite-u
+    pomerali sve kasnije dane za svaki red); agregati se racunaju jednom na kraju.
+    """
+    rng = random.Random(seed)
+    user = User(email=f"bench-{uuid.uuid4().hex[:8]}@test.com", password="x", name="Bench")
+    db.add(user)
+    await db.flush()
+
+    cats = [
+        Category(
+            user_id=user.id,
+            name=f"Kategorija {i}",
+            type=TransactionType.income if i < 3 else TransactionType.expense,
+            icon="💰" if i < 3 else "🛒",
+        )
+        for i in range(categories)
+    ]
+    db.add_all(cats)
+    await db.flush()
+
+    conn = await db.connection()
+    await conn.run_sync(drop_rollup_triggers)
+
+    today = datetime.date.today()
+    created = datetime.datetime.utcnow()
+    rows = []
+    for _ in range(transactions):
+        cat = rng.choice(cats)
+        rows.append({
+            "id": uuid.uuid4(),
+            "user_id": user.id,
+            "category_id": cat.id,
+            "amount": round(rng.uniform(100, 50000), 2),
+            "type": cat.type,
+            "description": f"{rng.choice(DESCRIPTIONS)} #{rng.randint(1, 9999)}",
+            "date": today - datetime.timedelta(days=rng.randint(0, months * 30)),
+            "created_at": created - datetime.timedelta(seconds=rng.randint(0, 10_000_000)),
+        })
+        if len(rows) >= batch:
+            await db.execute(insert(Transaction), rows)
+            rows = []
+    if rows:
+        await db.execute(insert(Transaction), rows)
+
+    await conn.run_sync(install_rollup_triggers)
+    for statement in rebuild_statements(user.id):
+        await db.execute(statement)
+    await db.commit()
+    return user, cats
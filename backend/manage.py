@@ -0,0 +1,55 @@
+"""Administrativne komande — `python manage.py <komanda> --help`."""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from uuid import UUID
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from src.config.database import async_session, engine
+from src.config.rollups import rebuild_rollups
+from src.modules.budgets.alerts import reconcile_budget_alerts
+
+
+async def _rebuild_rollups(args: argparse.Namespace) -> None:
+    async with async_session() as db:
+        rows = await rebuild_rollups(db, args.user)
+    scope = f"korisnik {args.user}" if args.user else "svi korisnici"
+    print(f"monthly_rollups + daily_balances: {rows} redova ({scope})")
+
+
+async def _reconcile_budgets(args: argparse.Namespace) -> None:
+    async with async_session() as db:
+        result = await reconcile_budget_alerts(db, args.user)
+    print(f"Korisnika sa odstupanjem u agregatima: {result['drifted']}, novih alerta: {result['alerts']}")
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="FinTracker administrativne komande")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rollups = commands.add_parser("rebuild-rollups", help="Ponovo racuna monthly_rollups i daily_balances iz transakcija")
+    rollups.add_argument("--user", type=UUID, help="Samo za jednog korisnika (podrazumevano svi)")
+    rollups.set_defaults(handler=_rebuild_rollups)
+
+    reconcile = commands.add_parser(
+        "reconcile-budgets", help="Ispravlja odstupanja agregata i ponovo proverava pragove budzeta"
+    )
+    reconcile.add_argument("--user", type=UUID, help="Samo za jednog korisnika (podrazumevano svi)")
+    reconcile.set_defaults(handler=_reconcile_budgets)
+
+    return parser
+
+
+async def main(argv: list[str] | None = None) -> None:
+    args = _parser().parse_args(argv)
+    try:
+        await args.handler(args)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
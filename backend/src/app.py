@@ -1,19 +1,25 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+import hmac
+
+from fastapi import FastAPI, Header
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.config.settings import settings
 from src.config.database import engine, Base
+from src.config.migrations import upgrade_schema
 from src.config.redis import init_redis, close_redis
 from src.middleware.error_handler import app_error_handler, generic_error_handler
 from src.middleware.rate_limiter import RateLimitMiddleware
+from src.modules.auth.principal import principal_cache
+from src.modules.auth.service import password_pool
 from src.modules.auth.router import router as auth_router
 from src.modules.transactions.router import router as transactions_router
 from src.modules.categories.router import router as categories_router
 from src.modules.budgets.router import router as budgets_router
 from src.modules.dashboard.router import router as dashboard_router
-from src.utils.errors import AppError
+from src.utils.cache import cache_stats, start_invalidation_listener, stop_invalidation_listener
+from src.utils.errors import AppError, AuthError, NotFoundError
 from src.utils.logger import logger
 
 
@@ -22,12 +28,16 @@ async def lifespan(app: FastAPI):
     logger.info(f"Starting FinTracker API ({settings.APP_ENV})")
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
     logger.info("Database tables ready")
     await init_redis()
     logger.info("Redis connected")
+    start_invalidation_listener()
     yield
+    await stop_invalidation_listener()
     await close_redis()
     logger.info("Redis disconnected")
+    password_pool.shutdown()
     await engine.dispose()
     logger.info("FinTracker API shut down")
 
@@ -63,6 +73,20 @@ async def health_check():
     return {"status": "ok", "version": "0.1.0"}
 
 
+@app.get("/api/metrics", include_in_schema=False)
+async def metrics(x_metrics_token: str | None = Header(None)):
+    """Interni brojaci keševa i pool-ova (hit/miss, zasicenje) — samo uz METRICS_TOKEN."""
+    if not settings.METRICS_TOKEN:
+        raise NotFoundError("Endpoint")
+    if not x_metrics_token or not hmac.compare_digest(x_metrics_token, settings.METRICS_TOKEN):
+        raise AuthError("Invalid metrics token")
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_pool": password_pool.stats(),
+        "cache": cache_stats(),
+    }
+
+
 if __name__ == "__main__":
     import sys
     from pathlib import Path
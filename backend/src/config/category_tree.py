@@ -0,0 +1,122 @@
+"""Hijerarhija kategorija: closure tabela category_closure.
+
+Za svaki par (predak, potomak) — ukljucujuci i samu kategoriju, depth 0 — postoji
+jedan red, pa se zbir celog podstabla dobija jednim join-om umesto rekurzivnog
+upita. Tabelu odrzavaju trigger-i nad categories (kao i agregate transakcija,
+src/config/rollups.py), pa je pokrivena svaka putanja upisa:
+
+- INSERT: putanje roditelja + sopstveni red;
+- UPDATE parent_id (premestanje): brisu se putanje od starih predaka ka podstablu
+  i dodaje proizvod (novi preci x podstablo);
+- DELETE: deca prelaze na roditelja obrisane kategorije (pre brisanja), a njeni
+  redovi nestaju kroz ON DELETE CASCADE.
+"""
+
+from sqlalchemy import Connection, delete, insert, literal, select, text
+
+from src.config.models import Category, CategoryClosure
+
+CLOSURE_TRIGGERS = tuple(f"trg_categories_closure_{operation}" for operation in ("insert", "update", "delete"))
+
+_ADD = """
+    INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+    SELECT NEW.id, NEW.id, 0
+    UNION ALL
+    SELECT ancestor_id, NEW.id, depth + 1 FROM category_closure WHERE descendant_id = NEW.parent_id;
+"""
+_MOVE = """
+    DELETE FROM category_closure
+    WHERE descendant_id IN (SELECT descendant_id FROM category_closure WHERE ancestor_id = NEW.id)
+      AND ancestor_id NOT IN (SELECT descendant_id FROM category_closure WHERE ancestor_id = NEW.id);
+    INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+    SELECT a.ancestor_id, d.descendant_id, a.depth + d.depth + 1
+    FROM category_closure a, category_closure d
+    WHERE a.descendant_id = NEW.parent_id AND d.ancestor_id = NEW.id;
+"""
+_REPARENT = "UPDATE categories SET parent_id = OLD.parent_id WHERE parent_id = OLD.id;"
+
+_POSTGRES_DDL = (
+    f"""
+    CREATE OR REPLACE FUNCTION category_closure_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {_ADD}
+            RETURN NULL;
+        ELSIF TG_OP = 'UPDATE' THEN
+            {_MOVE}
+            RETURN NULL;
+        END IF;
+        {_REPARENT}
+        RETURN OLD;
+    END $$
+    """,
+    "DROP TRIGGER IF EXISTS trg_categories_closure_insert ON categories",
+    "CREATE TRIGGER trg_categories_closure_insert AFTER INSERT ON categories"
+    " FOR EACH ROW EXECUTE FUNCTION category_closure_apply()",
+    "DROP TRIGGER IF EXISTS trg_categories_closure_update ON categories",
+    "CREATE TRIGGER trg_categories_closure_update AFTER UPDATE OF parent_id ON categories"
+    " FOR EACH ROW WHEN (OLD.parent_id IS DISTINCT FROM NEW.parent_id) EXECUTE FUNCTION category_closure_apply()",
+    "DROP TRIGGER IF EXISTS trg_categories_closure_delete ON categories",
+    "CREATE TRIGGER trg_categories_closure_delete BEFORE DELETE ON categories"
+    " FOR EACH ROW EXECUTE FUNCTION category_closure_apply()",
+)
+
+_SQLITE_DDL = (
+    f"CREATE TRIGGER IF NOT EXISTS trg_categories_closure_insert AFTER INSERT ON categories BEGIN {_ADD} END",
+    "CREATE TRIGGER IF NOT EXISTS trg_categories_closure_update AFTER UPDATE OF parent_id ON categories"
+    f" WHEN OLD.parent_id IS NOT NEW.parent_id BEGIN {_MOVE} END",
+    f"CREATE TRIGGER IF NOT EXISTS trg_categories_closure_delete BEFORE DELETE ON categories BEGIN {_REPARENT} END",
+)
+
+
+def install_closure_triggers(conn: Connection) -> None:
+    """Kreira (ili zamenjuje) trigger-e — idempotentno, poziva se posle kreiranja categories."""
+    statements = _POSTGRES_DDL if conn.dialect.name == "postgresql" else _SQLITE_DDL
+    for statement in statements:
+        conn.exec_driver_sql(statement)
+
+
+def drop_closure_triggers(conn: Connection) -> None:
+    """Pre DROP TABLE categories — SQLite brisanje tabele sa ukljucenim FK izvrsava i DELETE trigger."""
+    suffix = " ON categories" if conn.dialect.name == "postgresql" else ""
+    for name in CLOSURE_TRIGGERS:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}{suffix}")
+
+
+def closure_triggers_installed(conn: Connection) -> bool:
+    if conn.dialect.name == "postgresql":
+        catalog = "pg_trigger WHERE tgname"
+    else:
+        catalog = "sqlite_master WHERE type = 'trigger' AND name"
+    names = ", ".join(f"'{name}'" for name in CLOSURE_TRIGGERS)
+    return conn.execute(text(f"SELECT count(*) FROM {catalog} IN ({names})")).scalar() == len(CLOSURE_TRIGGERS)
+
+
+def subtree_cte(root_id=None):
+    """Rekurzivni CTE (ancestor_id, descendant_id, depth) nad categories.parent_id.
+
+    Koristi se za backfill closure tabele (i kao poredjenje u benchmark-u);
+    upiti nad stablom idu kroz category_closure.
+    """
+    roots = select(
+        Category.id.label("ancestor_id"), Category.id.label("descendant_id"), literal(0).label("depth")
+    )
+    if root_id is not None:
+        roots = roots.where(Category.id == root_id)
+    tree = roots.cte("tree", recursive=True)
+    child = select(tree.c.ancestor_id, Category.id, tree.c.depth + 1).join(
+        Category, Category.parent_id == tree.c.descendant_id
+    )
+    return tree.union_all(child)
+
+
+def rebuild_closure_statements() -> tuple:
+    """DELETE + INSERT ... SELECT koji closure tabelu racunaju ispocetka iz parent_id."""
+    tree = subtree_cte()
+    return (
+        delete(CategoryClosure),
+        insert(CategoryClosure).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(tree.c.ancestor_id, tree.c.descendant_id, tree.c.depth),
+        ),
+    )
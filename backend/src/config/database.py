@@ -1,12 +1,32 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncSession
+from typing import Awaitable, Callable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 
 from src.config.settings import settings
 
+
+def enable_sqlite_foreign_keys(async_engine: AsyncEngine) -> None:
+    """SQLite po defaultu ne proverava FK (ni ON DELETE) — ukljucuje se po konekciji."""
+    if async_engine.dialect.name != "sqlite":
+        return
+
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    event.listen(async_engine.sync_engine, "connect", _on_connect)
+
+
 engine = create_async_engine(settings.DATABASE_URL, echo=(settings.APP_ENV == "development"))
+enable_sqlite_foreign_keys(engine)
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+T = TypeVar("T")
+
 
 class Base(DeclarativeBase):
     pass
@@ -15,3 +35,9 @@ class Base(DeclarativeBase):
 async def get_db():
     async with async_session() as session:
         yield session
+
+
+async def run_in_session(fn: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    """Izvrsava `fn` u novoj sesiji — za posao van request-a (pozadinski taskovi)."""
+    async with async_session() as session:
+        return await fn(session)
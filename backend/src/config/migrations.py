@@ -0,0 +1,181 @@
+"""Idempotentne izmene seme za vec postojece baze.
+
+`Base.metadata.create_all` pravi samo tabele koje ne postoje — nove kolone,
+indeksi i constraint-i na postojecim tabelama dodaju se ovde. Svaki korak
+proverava stanje baze pre izmene, pa se `upgrade_schema` bezbedno pokrece pri
+svakom startu aplikacije (posle create_all).
+"""
+
+from sqlalchemy import Connection, inspect, text
+
+from src.config.category_tree import closure_triggers_installed, install_closure_triggers, rebuild_closure_statements
+from src.config.models import Category, MonthlyRollup, Transaction
+from src.config.rollups import install_rollup_triggers, rebuild_statements, rollup_triggers_installed
+from src.utils.logger import logger
+
+
+def _indexes(conn: Connection, table: str) -> set[str]:
+    return {index["name"] for index in inspect(conn).get_indexes(table)}
+
+
+def _index(name: str):
+    return next(index for index in Transaction.__table__.indexes if index.name == name)
+
+
+def _add_import_hash(conn: Connection) -> None:
+    """user-012: kolona import_hash + unique (user_id, import_hash) za deduplikaciju uvoza."""
+    columns = {column["name"] for column in inspect(conn).get_columns("transactions")}
+    if "import_hash" not in columns:
+        conn.execute(text("ALTER TABLE transactions ADD COLUMN import_hash VARCHAR(64)"))
+        logger.info("Migracija: dodata kolona transactions.import_hash")
+
+    indexes = _indexes(conn, "transactions")
+    if "ix_transactions_user_import_hash" in indexes:
+        # Prva verzija indeksa nije bila unique
+        conn.execute(text("DROP INDEX ix_transactions_user_import_hash"))
+    if "uq_transactions_user_import_hash" not in indexes:
+        # Duplikati iz ranijih istovremenih uvoza: hash ostaje na jednom redu, ostalima
+        # se brise (red ostaje, samo vise ne ucestvuje u deduplikaciji)
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(
+                "UPDATE transactions t SET import_hash = NULL FROM ("
+                " SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id, import_hash ORDER BY created_at, id) AS n"
+                " FROM transactions WHERE import_hash IS NOT NULL) d WHERE t.id = d.id AND d.n > 1"
+            ))
+        else:
+            conn.execute(text(
+                "UPDATE transactions SET import_hash = NULL WHERE import_hash IS NOT NULL AND id NOT IN ("
+                " SELECT MIN(id) FROM transactions WHERE import_hash IS NOT NULL GROUP BY user_id, import_hash)"
+            ))
+        _index("uq_transactions_user_import_hash").create(conn)
+        logger.info("Migracija: kreiran unique indeks uq_transactions_user_import_hash")
+
+
+def _unique_names(conn: Connection, table: str) -> set[str]:
+    inspector = inspect(conn)
+    constraints = {constraint["name"] for constraint in inspector.get_unique_constraints(table)}
+    return constraints | _indexes(conn, table)
+
+
+def _add_unique(conn: Connection, table: str, name: str, columns: str) -> None:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE ({columns})"))
+    else:
+        # SQLite ne podrzava ADD CONSTRAINT — unique indeks ima isto dejstvo (i za ON CONFLICT)
+        conn.execute(text(f"CREATE UNIQUE INDEX {name} ON {table} ({columns})"))
+    logger.info(f"Migracija: dodat unique constraint {name}")
+
+
+def _add_category_budget_uniques(conn: Connection) -> None:
+    """user-017: unique (korisnik, naziv, tip) za kategorije i (korisnik, kategorija, mesec) za budzete.
+
+    Pre constraint-a se spajaju postojeci duplikati: transakcije i budzeti prelaze na
+    kategoriju sa najmanjim id-jem, visak kategorija se brise, a od duplih budzeta
+    ostaje onaj sa najmanjim id-jem.
+    """
+    if "uq_categories_user_name_type" not in _unique_names(conn, "categories"):
+        duplicate = (
+            "SELECT 1 FROM categories k WHERE k.user_id = c.user_id AND k.name = c.name"
+            " AND k.type = c.type AND k.id < c.id"
+        )
+        keeper = (
+            "SELECT MIN(k.id) FROM categories c JOIN categories k ON k.user_id = c.user_id"
+            " AND k.name = c.name AND k.type = c.type WHERE c.id = {table}.category_id"
+        )
+        duplicate_ids = f"SELECT c.id FROM categories c WHERE EXISTS ({duplicate})"
+        for table in ("transactions", "budgets"):
+            conn.execute(text(
+                f"UPDATE {table} SET category_id = ({keeper.format(table=table)})"
+                f" WHERE category_id IN ({duplicate_ids})"
+            ))
+        conn.execute(text(f"DELETE FROM categories WHERE id IN ({duplicate_ids})"))
+        _add_unique(conn, "categories", "uq_categories_user_name_type", "user_id, name, type")
+
+    if "uq_budgets_user_category_month" not in _unique_names(conn, "budgets"):
+        conn.execute(text(
+            "DELETE FROM budgets WHERE id IN (SELECT b.id FROM budgets b WHERE EXISTS ("
+            " SELECT 1 FROM budgets k WHERE k.user_id = b.user_id AND k.category_id = b.category_id"
+            " AND k.month = b.month AND k.id < b.id))"
+        ))
+        _add_unique(conn, "budgets", "uq_budgets_user_category_month", "user_id, category_id, month")
+
+
+def _category_delete_rules(conn: Connection) -> None:
+    """user-024: ON DELETE pravila za FK ka categories (transakcije RESTRICT, budzeti CASCADE).
+
+    Samo PostgreSQL — SQLite ne menja FK postojece tabele (dev baza se pravi ispocetka).
+    """
+    if conn.dialect.name != "postgresql":
+        return
+    for table, rule in (("transactions", "RESTRICT"), ("budgets", "CASCADE")):
+        for foreign_key in inspect(conn).get_foreign_keys(table):
+            if foreign_key["referred_table"] != "categories":
+                continue
+            if (foreign_key["options"].get("ondelete") or "").upper() == rule:
+                continue
+            name = foreign_key["name"]
+            conn.execute(text(
+                f"ALTER TABLE {table} DROP CONSTRAINT {name},"
+                f" ADD CONSTRAINT {name} FOREIGN KEY (category_id) REFERENCES categories (id) ON DELETE {rule}"
+            ))
+            logger.info(f"Migracija: {table}.category_id ON DELETE {rule}")
+
+
+def _add_category_hierarchy(conn: Connection) -> None:
+    """user-025: categories.parent_id + trigger-i i backfill closure tabele (kao `_install_rollups`)."""
+    columns = {column["name"] for column in inspect(conn).get_columns("categories")}
+    if "parent_id" not in columns:
+        conn.execute(text(
+            "ALTER TABLE categories ADD COLUMN parent_id INTEGER REFERENCES categories (id) ON DELETE SET NULL"
+        ))
+        logger.info("Migracija: dodata kolona categories.parent_id")
+    if "ix_categories_parent_id" not in _indexes(conn, "categories"):
+        next(index for index in Category.__table__.indexes if index.name == "ix_categories_parent_id").create(conn)
+
+    if closure_triggers_installed(conn):
+        return
+    install_closure_triggers(conn)
+    for statement in rebuild_closure_statements():
+        conn.execute(statement)
+    logger.info("Migracija: category_closure popunjena iz categories.parent_id")
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    """Indeksi dodati na postojece tabele (keyset paginacija, pretraga, deduplikacija, podstabla)."""
+    for table in (Transaction.__table__, MonthlyRollup.__table__):
+        existing = _indexes(conn, table.name)
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn, checkfirst=True)
+
+
+def _install_rollups(conn: Connection) -> None:
+    """user-018/019: trigger-i za monthly_rollups i daily_balances + backfill iz transakcija.
+
+    Backfill ide samo ako trigger-i nisu postojali, u istoj transakciji kao i
+    instalacija, pa nijedna izmena ne promakne izmedju.
+    """
+    installed = rollup_triggers_installed(conn)
+    # Uvek se reinstaliraju (CREATE OR REPLACE / DROP + CREATE) — izmene tela stizu i na postojece baze
+    install_rollup_triggers(conn)
+    if installed:
+        return
+    for statement in rebuild_statements():
+        conn.execute(statement)
+    logger.info("Migracija: monthly_rollups i daily_balances popunjene iz transakcija")
+
+
+MIGRATIONS = (
+    _add_import_hash,
+    _create_missing_indexes,
+    _add_category_budget_uniques,
+    _install_rollups,
+    _category_delete_rules,
+    _add_category_hierarchy,
+)
+
+
+def upgrade_schema(conn: Connection) -> None:
+    """Pokrece sve korake redom (sync — poziva se kroz `conn.run_sync`)."""
+    for step in MIGRATIONS:
+        step(conn)
@@ -2,13 +2,18 @@ import enum
 import uuid
 from datetime import date, datetime
 
-from sqlalchemy import Date, DateTime, Enum, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import DDL, JSON, Date, DateTime, Enum, ForeignKey, Index, Integer, Numeric, String, Text, UniqueConstraint, event, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.config.database import Base
 
 
+# 'simple' konfiguracija — bez stemovanja, opisi su uglavnom na srpskom
+SEARCH_CONFIG = "simple"
+SEARCH_VECTOR_SQL = f"to_tsvector('{SEARCH_CONFIG}', coalesce(description, ''))"
+
+
 class TransactionType(str, enum.Enum):
     income = "income"
     expense = "expense"
@@ -30,42 +35,208 @@ class User(Base):
 
 class Category(Base):
     __tablename__ = "categories"
+    __table_args__ = (
+        UniqueConstraint("user_id", "name", "type", name="uq_categories_user_name_type"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
     type: Mapped[TransactionType] = mapped_column(Enum(TransactionType), nullable=False)
     icon: Mapped[str | None] = mapped_column(String(50))
+    # Roditeljska kategorija (npr. Hrana -> Namirnice); stablo je i u category_closure
+    parent_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("categories.id", ondelete="SET NULL"), index=True
+    )
 
     user: Mapped["User"] = relationship(back_populates="categories")
-    transactions: Mapped[list["Transaction"]] = relationship(back_populates="category")
-    budgets: Mapped[list["Budget"]] = relationship(back_populates="category")
+    # Brisanje kategorije resava baza (ON DELETE), ORM ne ucitava decu:
+    # transakcije moraju prethodno biti prebacene ili obrisane (RESTRICT), budzeti idu sa kategorijom
+    transactions: Mapped[list["Transaction"]] = relationship(back_populates="category", passive_deletes="all")
+    budgets: Mapped[list["Budget"]] = relationship(
+        back_populates="category", cascade="all, delete-orphan", passive_deletes=True
+    )
+
+
+class CategoryClosure(Base):
+    """Svi parovi (predak, potomak) stabla kategorija, ukljucujuci (k, k) sa depth 0.
+
+    Odrzavaju je trigger-i nad categories (src/config/category_tree.py).
+    """
+
+    __tablename__ = "category_closure"
+    __table_args__ = (Index("ix_category_closure_descendant", "descendant_id", "depth"),)
+
+    ancestor_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    descendant_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
 
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Keyset paginacija: ORDER BY date, created_at, id u okviru korisnika
+        Index("ix_transactions_user_date_created_id", "user_id", "date", "created_at", "id"),
+        # Deduplikacija uvoza (CSV/OFX): unique, da ni dva istovremena uvoza ne upisu isti red.
+        # NULL (rucno unete transakcije) se ne poredi, pa na njih ne utice.
+        Index("uq_transactions_user_import_hash", "user_id", "import_hash", unique=True),
+        # Pretraga opisa (samo PostgreSQL): tsvector za reci/prefikse, trigram za greske u kucanju.
+        # Izraz mora biti identican onom u upitu (SEARCH_VECTOR_SQL) da bi planer koristio indeks.
+        Index("ix_transactions_description_fts", text(SEARCH_VECTOR_SQL), postgresql_using="gin")
+        .ddl_if(dialect="postgresql"),
+        Index(
+            "ix_transactions_description_trgm", "description",
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    category_id: Mapped[int] = mapped_column(Integer, ForeignKey("categories.id"), nullable=False)
+    category_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("categories.id", ondelete="RESTRICT"), nullable=False
+    )
     amount: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     type: Mapped[TransactionType] = mapped_column(Enum(TransactionType), nullable=False)
     description: Mapped[str | None] = mapped_column(Text)
     date: Mapped[date] = mapped_column(Date, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    import_hash: Mapped[str | None] = mapped_column(String(64))
 
     user: Mapped["User"] = relationship(back_populates="transactions")
     category: Mapped["Category"] = relationship(back_populates="transactions")
 
 
+# pg_trgm je potreban za trigram indeks nad opisom transakcije
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 class Budget(Base):
     __tablename__ = "budgets"
+    __table_args__ = (
+        UniqueConstraint("user_id", "category_id", "month", name="uq_budgets_user_category_month"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    category_id: Mapped[int] = mapped_column(Integer, ForeignKey("categories.id"), nullable=False)
+    category_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False
+    )
     amount: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     month: Mapped[date] = mapped_column(Date, nullable=False)
 
     user: Mapped["User"] = relationship(back_populates="budgets")
     category: Mapped["Category"] = relationship(back_populates="budgets")
+
+
+class ImportJobStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    format: Mapped[str] = mapped_column(String(10), nullable=False)
+    status: Mapped[ImportJobStatus] = mapped_column(Enum(ImportJobStatus), nullable=False, default=ImportJobStatus.pending)
+    bytes_total: Mapped[int] = mapped_column(Integer, default=0)
+    rows_processed: Mapped[int] = mapped_column(Integer, default=0)
+    rows_imported: Mapped[int] = mapped_column(Integer, default=0)
+    rows_duplicate: Mapped[int] = mapped_column(Integer, default=0)
+    rows_failed: Mapped[int] = mapped_column(Integer, default=0)
+    errors: Mapped[list] = mapped_column(JSON, default=list)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+
+class MonthlyRollup(Base):
+    """Zbir i broj transakcija po (korisnik, mesec, kategorija, tip).
+
+    Odrzavaju ga trigger-i nad transactions (src/config/rollups.py), u istoj
+    transakciji kao i izmena — nijedna write putanja ga ne azurira rucno.
+    """
+
+    __tablename__ = "monthly_rollups"
+    # Zbir podstabla kategorija: closure redovi pretka -> seek po (korisnik, kategorija)
+    __table_args__ = (Index("ix_monthly_rollups_user_category", "user_id", "category_id", "month"),)
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    month: Mapped[date] = mapped_column(Date, primary_key=True)  # prvi dan meseca
+    category_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    type: Mapped[TransactionType] = mapped_column(Enum(TransactionType), primary_key=True)
+    total: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    tx_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class BudgetAlert(Base):
+    """Prelazak praga potrosnje budzeta (npr. 80%, 100%) — jedan red po (budzet, prag).
+
+    Red nestaje kad potrosnja padne ispod praga, pa sledeci prelazak ponovo emituje dogadjaj.
+    """
+
+    __tablename__ = "budget_alerts"
+    __table_args__ = (UniqueConstraint("budget_id", "threshold", name="uq_budget_alerts_budget_threshold"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    budget_id: Mapped[int] = mapped_column(Integer, ForeignKey("budgets.id", ondelete="CASCADE"), nullable=False)
+    threshold: Mapped[int] = mapped_column(Integer, nullable=False)  # procenat budzeta
+    spent: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False)
+    budgeted: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class DailyBalance(Base):
+    """Kumulativni prihodi, rashodi i broj transakcija korisnika zakljucno sa danom.
+
+    Prefiksne sume: zbir za bilo koji period je razlika dva reda (poslednji dan <= kraj
+    i poslednji dan pre pocetka). Redovi postoje samo za dane sa transakcijama;
+    odrzavaju ih isti trigger-i kao i monthly_rollups.
+    """
+
+    __tablename__ = "daily_balances"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    cum_income: Mapped[float] = mapped_column(Numeric(16, 2), nullable=False, default=0)
+    cum_expense: Mapped[float] = mapped_column(Numeric(16, 2), nullable=False, default=0)
+    cum_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+@event.listens_for(Transaction.__table__, "after_create")
+def _install_rollup_triggers(target, connection, **kw):
+    from src.config.rollups import install_rollup_triggers
+
+    install_rollup_triggers(connection)
+
+
+@event.listens_for(Category.__table__, "after_create")
+def _install_closure_triggers(target, connection, **kw):
+    from src.config.category_tree import install_closure_triggers
+
+    install_closure_triggers(connection)
+
+
+@event.listens_for(Category.__table__, "before_drop")
+def _drop_closure_triggers(target, connection, **kw):
+    from src.config.category_tree import drop_closure_triggers
+
+    drop_closure_triggers(connection)
@@ -6,9 +6,12 @@ redis_client: Redis | None = None
 
 
 async def init_redis() -> Redis:
-    """Kreira Redis konekciju pri pokretanju aplikacije."""
+    """Kreira Redis konekciju pri pokretanju aplikacije.
+
+    Odgovori su bytes (bez decode_responses) — cache unosi su binarni (src/utils/codec.py).
+    """
     global redis_client
-    redis_client = Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    redis_client = Redis.from_url(settings.REDIS_URL)
     await redis_client.ping()
     return redis_client
 
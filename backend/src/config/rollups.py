@@ -0,0 +1,322 @@
+"""Odrzavanje agregata nad transakcijama: monthly_rollups i daily_balances.
+
+Trigger-i nad transactions azuriraju agregate u istoj transakciji kao i izmena, pa
+ih pokrivaju sve write putanje (pojedinacni CRUD, bulk, uvoz kroz COPY, set-based
+UPDATE/DELETE) bez dodatnog upita iz aplikacije. PostgreSQL koristi statement-level
+trigger-e sa tranzicionim tabelama (agregirane izmene po naredbi), SQLite row-level
+trigger-e. `rebuild_rollups` ponovo racuna oba agregata iz transakcija (backfill).
+"""
+
+from uuid import UUID
+
+from sqlalchemy import Connection, case, delete, except_, func, insert, select, text, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.models import DailyBalance, MonthlyRollup, Transaction, TransactionType
+from src.utils.sql import month_start
+
+_OPERATIONS = ("insert", "update", "delete")
+_AGGREGATES = ("rollup", "balance")
+
+ROLLUP_TRIGGERS = tuple(
+    f"trg_transactions_{aggregate}_{operation}" for aggregate in _AGGREGATES for operation in _OPERATIONS
+)
+
+# ── PostgreSQL ───────────────────────────────────────────────────────
+# {changes} je izvor izmena: new_rows, old_rows (negirani) ili oba (UPDATE)
+_PG_NEW = "SELECT user_id, date, category_id, type, amount, 1 AS n FROM new_rows"
+_PG_OLD = "SELECT user_id, date, category_id, type, -amount AS amount, -1 AS n FROM old_rows"
+
+_PG_ROLLUP = """
+    INSERT INTO monthly_rollups (user_id, month, category_id, type, total, tx_count)
+    SELECT user_id, CAST(date_trunc('month', date) AS DATE), category_id, type, SUM(amount), SUM(n)
+    FROM ({changes}) changes
+    GROUP BY 1, 2, 3, 4
+    HAVING SUM(n) <> 0 OR SUM(amount) <> 0
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (user_id, month, category_id, type) DO UPDATE
+    SET total = monthly_rollups.total + EXCLUDED.total,
+        tx_count = monthly_rollups.tx_count + EXCLUDED.tx_count;
+"""
+
+# Novi dani dobijaju prefiks poslednjeg postojeceg dana pre njih; zatim se svakom danu
+# dodaje kumulativna suma izmena zakljucno sa njim (interval do sledeceg dana izmene).
+#
+# Izolacija: seed novog dana cita prefiks, a UPDATE menja samo vidljive redove. Dva
+# istovremena upisa istog korisnika bi pod READ COMMITTED mogla da izgube izmenu
+# (A seed-uje dan X iz prefiksa pre B-a, B ne vidi A-ov nepotvrdjeni red X). Zato se
+# upisi po korisniku serijalizuju advisory lock-om do kraja transakcije; posle
+# cekanja na lock svaka naredna naredba u funkciji ima novi snapshot i vidi
+# potvrdjene izmene prethodnika. Lock-ovi se uzimaju sortirano (bez deadlock-a).
+#
+# Izmene bez uticaja na novac (opis, kategorija) daju nulte delte i ne diraju tabelu.
+_PG_CHANGED_DAYS = """
+        SELECT user_id, date AS day,
+               SUM(CASE WHEN type = 'income' THEN amount ELSE 0 END) AS income,
+               SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END) AS expense,
+               SUM(n) AS n
+        FROM ({changes}) changes
+        GROUP BY 1, 2
+        HAVING SUM(CASE WHEN type = 'income' THEN amount ELSE 0 END) <> 0
+            OR SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END) <> 0
+            OR SUM(n) <> 0
+"""
+_PG_BALANCE = """
+    PERFORM pg_advisory_xact_lock(hashtext('daily_balances:' || user_id::text))
+    FROM (SELECT DISTINCT user_id FROM ({changes}) changes) users
+    ORDER BY user_id;
+
+    INSERT INTO daily_balances (user_id, day, cum_income, cum_expense, cum_count)
+    SELECT d.user_id, d.day, coalesce(p.cum_income, 0), coalesce(p.cum_expense, 0), coalesce(p.cum_count, 0)
+    FROM ({changed_days}) d
+    LEFT JOIN LATERAL (
+        SELECT cum_income, cum_expense, cum_count FROM daily_balances b
+        WHERE b.user_id = d.user_id AND b.day < d.day ORDER BY b.day DESC LIMIT 1
+    ) p ON true
+    ORDER BY 1, 2
+    ON CONFLICT (user_id, day) DO NOTHING;
+
+    WITH deltas AS ({changed_days}), running AS (
+        SELECT user_id, day,
+               SUM(income) OVER w AS income, SUM(expense) OVER w AS expense, SUM(n) OVER w AS n,
+               LEAD(day) OVER w AS next_day
+        FROM deltas
+        WINDOW w AS (PARTITION BY user_id ORDER BY day)
+    )
+    UPDATE daily_balances b
+    SET cum_income = b.cum_income + r.income,
+        cum_expense = b.cum_expense + r.expense,
+        cum_count = b.cum_count + r.n
+    FROM running r
+    WHERE b.user_id = r.user_id AND b.day >= r.day AND (r.next_day IS NULL OR b.day < r.next_day);
+""".replace("{changed_days}", _PG_CHANGED_DAYS)
+
+_PG_TRANSITIONS = {
+    "insert": "NEW TABLE AS new_rows",
+    "update": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "delete": "OLD TABLE AS old_rows",
+}
+
+
+def _postgres_ddl(aggregate: str, function: str, body: str) -> tuple[str, ...]:
+    statements = [f"""
+    CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {body.format(changes=_PG_NEW)}
+        ELSIF TG_OP = 'DELETE' THEN
+            {body.format(changes=_PG_OLD)}
+        ELSE
+            {body.format(changes=f"{_PG_NEW} UNION ALL {_PG_OLD}")}
+        END IF;
+        RETURN NULL;
+    END $$
+    """]
+    for operation in _OPERATIONS:
+        name = f"trg_transactions_{aggregate}_{operation}"
+        statements += [
+            f"DROP TRIGGER IF EXISTS {name} ON transactions",
+            f"CREATE TRIGGER {name} AFTER {operation.upper()} ON transactions"
+            f" REFERENCING {_PG_TRANSITIONS[operation]} FOR EACH STATEMENT EXECUTE FUNCTION {function}()",
+        ]
+    return tuple(statements)
+
+
+# ── SQLite ───────────────────────────────────────────────────────────
+_SQLITE_ROLLUP = """
+    INSERT INTO monthly_rollups (user_id, month, category_id, type, total, tx_count)
+    VALUES ({row}.user_id, date({row}.date, 'start of month'), {row}.category_id, {row}.type, {sign}{row}.amount, {sign}1)
+    ON CONFLICT (user_id, month, category_id, type) DO UPDATE
+    SET total = total + excluded.total, tx_count = tx_count + excluded.tx_count;
+"""
+_SQLITE_BALANCE_DAY = """
+    INSERT INTO daily_balances (user_id, day, cum_income, cum_expense, cum_count)
+    SELECT NEW.user_id, NEW.date, coalesce(p.cum_income, 0), coalesce(p.cum_expense, 0), coalesce(p.cum_count, 0)
+    FROM (SELECT 1) LEFT JOIN (
+        SELECT cum_income, cum_expense, cum_count FROM daily_balances
+        WHERE user_id = NEW.user_id AND day < NEW.date ORDER BY day DESC LIMIT 1
+    ) p ON 1
+    WHERE true
+    ON CONFLICT (user_id, day) DO NOTHING;
+"""
+_SQLITE_BALANCE = """
+    UPDATE daily_balances
+    SET cum_income = cum_income {sign} (CASE WHEN {row}.type = 'income' THEN {row}.amount ELSE 0 END),
+        cum_expense = cum_expense {sign} (CASE WHEN {row}.type = 'expense' THEN {row}.amount ELSE 0 END),
+        cum_count = cum_count {sign} 1
+    WHERE user_id = {row}.user_id AND day >= {row}.date;
+"""
+
+_SQLITE_BODIES = {
+    "rollup": (
+        _SQLITE_ROLLUP.format(row="NEW", sign=""),
+        _SQLITE_ROLLUP.format(row="OLD", sign="-"),
+    ),
+    "balance": (
+        _SQLITE_BALANCE_DAY + _SQLITE_BALANCE.format(row="NEW", sign="+"),
+        _SQLITE_BALANCE.format(row="OLD", sign="-"),
+    ),
+}
+
+
+# Kolone koje menjaju agregat; balance ne zavisi od kategorije, pa izmena opisa ili
+# kategorije ne prepisuje daily_balances od tog dana nadalje
+_SQLITE_UPDATE_COLUMNS = {
+    "rollup": ("user_id", "category_id", "amount", "type", "date"),
+    "balance": ("user_id", "amount", "type", "date"),
+}
+
+
+def _sqlite_ddl(aggregate: str) -> tuple[str, ...]:
+    add, remove = _SQLITE_BODIES[aggregate]
+    columns = _SQLITE_UPDATE_COLUMNS[aggregate]
+    changed = " OR ".join(f"OLD.{column} IS NOT NEW.{column}" for column in columns)
+    events = {
+        "insert": ("AFTER INSERT ON transactions", add),
+        "update": (f"AFTER UPDATE OF {', '.join(columns)} ON transactions WHEN {changed}", remove + add),
+        "delete": ("AFTER DELETE ON transactions", remove),
+    }
+    statements = []
+    for operation, (event, body) in events.items():
+        name = f"trg_transactions_{aggregate}_{operation}"
+        statements += [f"DROP TRIGGER IF EXISTS {name}", f"CREATE TRIGGER {name} {event} BEGIN {body} END"]
+    return tuple(statements)
+
+
+_POSTGRES_DDL = (
+    _postgres_ddl("rollup", "monthly_rollups_apply", _PG_ROLLUP)
+    + _postgres_ddl("balance", "daily_balances_apply", _PG_BALANCE)
+)
+_SQLITE_DDL = _sqlite_ddl("rollup") + _sqlite_ddl("balance")
+
+
+def install_rollup_triggers(conn: Connection) -> None:
+    """Kreira (ili zamenjuje) trigger-e — idempotentno, poziva se posle kreiranja transactions
+    i pri svakoj migraciji (nova verzija tela trigger-a stize i na postojece baze)."""
+    statements = _POSTGRES_DDL if conn.dialect.name == "postgresql" else _SQLITE_DDL
+    for statement in statements:
+        conn.exec_driver_sql(statement)
+
+
+def drop_rollup_triggers(conn: Connection) -> None:
+    """Za masovni unos (seed, backfill): posle unosa `install_rollup_triggers` + rebuild."""
+    for name in ROLLUP_TRIGGERS:
+        suffix = " ON transactions" if conn.dialect.name == "postgresql" else ""
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}{suffix}")
+
+
+def rollup_triggers_installed(conn: Connection) -> bool:
+    if conn.dialect.name == "postgresql":
+        catalog = "pg_trigger WHERE tgname"
+    else:
+        catalog = "sqlite_master WHERE type = 'trigger' AND name"
+    names = ", ".join(f"'{name}'" for name in ROLLUP_TRIGGERS)
+    return conn.execute(text(f"SELECT count(*) FROM {catalog} IN ({names})")).scalar() == len(ROLLUP_TRIGGERS)
+
+
+def _expected(user_id: UUID | None = None) -> tuple:
+    """SELECT-i koji agregate racunaju iz transakcija: (monthly_rollups, daily_balances)."""
+    month = month_start(Transaction.date)
+    monthly = select(
+        Transaction.user_id,
+        month.label("month"),
+        Transaction.category_id,
+        Transaction.type,
+        func.sum(Transaction.amount).label("total"),
+        func.count().label("tx_count"),
+    ).group_by(Transaction.user_id, month, Transaction.category_id, Transaction.type)
+
+    per_day = select(
+        Transaction.user_id,
+        Transaction.date.label("day"),
+        func.sum(case((Transaction.type == TransactionType.income, Transaction.amount), else_=0)).label("income"),
+        func.sum(case((Transaction.type == TransactionType.expense, Transaction.amount), else_=0)).label("expense"),
+        func.count().label("n"),
+    ).group_by(Transaction.user_id, Transaction.date)
+    if user_id is not None:
+        monthly = monthly.where(Transaction.user_id == user_id)
+        per_day = per_day.where(Transaction.user_id == user_id)
+
+    per_day = per_day.subquery()
+    window = {"partition_by": per_day.c.user_id, "order_by": per_day.c.day}
+    daily = select(
+        per_day.c.user_id,
+        per_day.c.day,
+        func.sum(per_day.c.income).over(**window).label("cum_income"),
+        func.sum(per_day.c.expense).over(**window).label("cum_expense"),
+        func.sum(per_day.c.n).over(**window).label("cum_count"),
+    )
+    return monthly, daily
+
+
+def rebuild_statements(user_id: UUID | None = None) -> tuple:
+    """DELETE + INSERT ... SELECT parovi koji agregate racunaju ispocetka iz transakcija."""
+    monthly, daily = _expected(user_id)
+    clear_monthly = delete(MonthlyRollup)
+    clear_daily = delete(DailyBalance)
+    if user_id is not None:
+        clear_monthly = clear_monthly.where(MonthlyRollup.user_id == user_id)
+        clear_daily = clear_daily.where(DailyBalance.user_id == user_id)
+    return (
+        clear_monthly,
+        insert(MonthlyRollup).from_select(["user_id", "month", "category_id", "type", "total", "tx_count"], monthly),
+        clear_daily,
+        insert(DailyBalance).from_select(["user_id", "day", "cum_income", "cum_expense", "cum_count"], daily),
+    )
+
+
+def _rounded(query, *columns: str):
+    """Iznosi zaokruzeni na 2 decimale — SQLite sabira u REAL, pa bi poredjenje bilo osetljivo na redosled."""
+    sub = query.subquery()
+    return select(*(func.round(sub.c[name], 2) if name in columns else sub.c[name] for name in sub.c.keys()))
+
+
+def _symmetric_difference_users(expected, actual) -> tuple:
+    """Korisnici sa redovima samo na jednoj strani (SQLite ne dozvoljava ugnjezdene compound SELECT-e)."""
+    return tuple(
+        select(difference.c.user_id)
+        for difference in (except_(expected, actual).subquery(), except_(actual, expected).subquery())
+    )
+
+
+async def find_drifted_users(db: AsyncSession, user_id: UUID | None = None) -> list[UUID]:
+    """Korisnici ciji se agregati razlikuju od zbirova izracunatih iz transakcija.
+
+    daily_balances se poredi samo za dane sa transakcijama (dan ostaje u indeksu
+    i kad mu se obrisu sve transakcije).
+    """
+    monthly, daily = _expected(user_id)
+    actual_monthly = select(
+        MonthlyRollup.user_id, MonthlyRollup.month, MonthlyRollup.category_id, MonthlyRollup.type,
+        MonthlyRollup.total, MonthlyRollup.tx_count,
+    ).where((MonthlyRollup.tx_count != 0) | (MonthlyRollup.total != 0))
+    expected_daily = daily.subquery()
+    actual_daily = select(
+        DailyBalance.user_id, DailyBalance.day, DailyBalance.cum_income, DailyBalance.cum_expense, DailyBalance.cum_count,
+    ).join(
+        expected_daily,
+        (expected_daily.c.user_id == DailyBalance.user_id) & (expected_daily.c.day == DailyBalance.day),
+    )
+    if user_id is not None:
+        actual_monthly = actual_monthly.where(MonthlyRollup.user_id == user_id)
+        actual_daily = actual_daily.where(DailyBalance.user_id == user_id)
+
+    monthly_drift = _symmetric_difference_users(
+        _rounded(monthly, "total"), _rounded(actual_monthly, "total")
+    )
+    daily_drift = _symmetric_difference_users(
+        _rounded(daily, "cum_income", "cum_expense"), _rounded(actual_daily, "cum_income", "cum_expense")
+    )
+    result = await db.execute(union(*monthly_drift, *daily_drift))
+    return [row[0] for row in result.all()]
+
+
+async def rebuild_rollups(db: AsyncSession, user_id: UUID | None = None) -> int:
+    """Backfill agregata (za jednog ili sve korisnike); vraca broj upisanih redova."""
+    rows = 0
+    for statement in rebuild_statements(user_id):
+        result = await db.execute(statement)
+        if statement.is_insert:
+            rows += result.rowcount
+    await db.commit()
+    return rows
@@ -10,6 +10,37 @@ class Settings(BaseSettings):
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Keš autentifikovanog korisnika (get_current_user)
+    PRINCIPAL_CACHE_TTL: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10_000
+    PRINCIPAL_CACHE_REDIS_ENABLED: bool = True
+    PRINCIPAL_CACHE_REDIS_TTL: int = 300
+
+    # /api/metrics — iskljucen dok se ne postavi token (header X-Metrics-Token)
+    METRICS_TOKEN: str = ""
+
+    # Pool za bcrypt (hash/verify) — "thread" ili "process"
+    PASSWORD_POOL_KIND: str = "thread"
+    PASSWORD_POOL_WORKERS: int = 4
+    PASSWORD_POOL_MAX_QUEUE: int = 64
+
+    # L1 keš (in-process) ispred Redisa; bajtovi = serijalizovane vrednosti pre kompresije
+    CACHE_L1_MAX_BYTES: int = 32 * 1024 * 1024
+    CACHE_L1_TTL: int = 30
+    CACHE_GENERATION_LOCAL_TTL: int = 30
+
+    # Format cache unosa: codec "json" | "orjson" | "msgpack", kompresija "none" | "zlib" | "lz4"
+    CACHE_CODEC: str = "orjson"
+    CACHE_COMPRESSION: str = "zlib"
+    CACHE_COMPRESS_MIN_BYTES: int = 1024
+
+    # Pragovi potrosnje budzeta (procenti) za koje se emituje alert
+    BUDGET_ALERT_THRESHOLDS: list[int] = [80, 100]
+
+    # Uvoz izvoda (CSV/OFX)
+    IMPORT_MAX_BYTES: int = 50 * 1024 * 1024
+    IMPORT_CHUNK_SIZE: int = 1000
+
     model_config = {"env_file": ".env", "extra": "ignore"}
 
 
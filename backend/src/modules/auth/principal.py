@@ -0,0 +1,168 @@
+"""Keš autentifikovanog korisnika (principal) — L1 LRU u procesu + opcioni Redis sloj."""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from src.config.models import User
+from src.config.redis import get_redis
+from src.config.settings import settings
+from src.utils.cache import publish_invalidation, register_invalidation_handler
+from src.utils.logger import logger
+
+PRINCIPAL_PREFIX = "fintracker:principal:"
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """Lagani objekat korisnika koji vraca get_current_user (bez ORM sesije)."""
+    id: UUID
+    email: str
+    name: str | None
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(id=user.id, email=user.email, name=user.name)
+
+
+class PrincipalCache:
+    """LRU sa TTL-om ispred baze; Redis sloj deli principal izmedju workera."""
+
+    def __init__(self, max_size: int, ttl: int, redis_ttl: int, use_redis: bool):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis_ttl = redis_ttl
+        self.use_redis = use_redis
+        self._entries: OrderedDict[UUID, tuple[float, CurrentUser]] = OrderedDict()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, user_id: UUID) -> CurrentUser | None:
+        entry = self._entries.get(user_id)
+        if entry:
+            expires_at, principal = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return principal
+            del self._entries[user_id]
+
+        if self.use_redis:
+            try:
+                data = await get_redis().get(f"{PRINCIPAL_PREFIX}{user_id}")
+            except Exception:
+                # Ako Redis nije dostupan, idemo u bazu
+                data = None
+            if data:
+                raw = json.loads(data)
+                principal = CurrentUser(id=UUID(raw["id"]), email=raw["email"], name=raw["name"])
+                self._store(principal)
+                self.redis_hits += 1
+                return principal
+
+        self.misses += 1
+        return None
+
+    async def set(self, principal: CurrentUser) -> None:
+        self._store(principal)
+        if self.use_redis:
+            payload = json.dumps(asdict(principal), default=str)
+            try:
+                await get_redis().set(f"{PRINCIPAL_PREFIX}{principal.id}", payload, ex=self.redis_ttl)
+            except Exception:
+                logger.debug(f"Principal cache: Redis SET preskocen za {principal.id}")
+
+    async def invalidate(self, user_id: UUID) -> None:
+        """Brise principal iz oba sloja i iz L1 ostalih workera (pub/sub)."""
+        self.evict_local(user_id)
+        if self.use_redis:
+            try:
+                await get_redis().delete(f"{PRINCIPAL_PREFIX}{user_id}")
+            except Exception:
+                logger.warning(f"Principal cache: Redis DELETE nije uspeo za {user_id}")
+            await publish_invalidation("principal", user_id=str(user_id))
+
+    def evict_local(self, user_id: UUID) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.redis_hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    def _store(self, principal: CurrentUser) -> None:
+        self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+    redis_ttl=settings.PRINCIPAL_CACHE_REDIS_TTL,
+    use_redis=settings.PRINCIPAL_CACHE_REDIS_ENABLED,
+)
+
+register_invalidation_handler("principal", lambda message: principal_cache.evict_local(UUID(message["user_id"])))
+
+# Reference na pozadinske taskove da ih GC ne pokupi pre zavrsetka
+_pending_tasks: set[asyncio.Task] = set()
+
+# Kljuc u Session.info pod kojim se skupljaju izmenjeni korisnici do commit-a
+_PENDING_KEY = "principal_invalidations"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_user_change(mapper, connection, target: User) -> None:
+    """Izmena/brisanje korisnika se samo belezi — izbacivanje iz keša ide tek posle commit-a.
+
+    Izbacivanje na flush-u bi otvorilo prozor u kome paralelni request ucita jos
+    nekomitovan (stari) red i ponovo ga kešira na PRINCIPAL_CACHE_TTL.
+    """
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    user_ids = session.info.pop(_PENDING_KEY, None)
+    if not user_ids:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    for user_id in user_ids:
+        principal_cache.evict_local(user_id)
+        if loop is not None:
+            task = loop.create_task(principal_cache.invalidate(user_id))
+            _pending_tasks.add(task)
+            task.add_done_callback(_pending_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
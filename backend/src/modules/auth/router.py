@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config.database import get_db
-from src.config.models import User
+from src.modules.auth.principal import CurrentUser
 from src.middleware.auth import get_current_user
 from src.modules.auth.schemas import (
     RegisterRequest,
@@ -44,6 +44,6 @@ async def refresh(refresh_token: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/me", response_model=UserResponse)
-async def me(current_user: User = Depends(get_current_user)):
+async def me(current_user: CurrentUser = Depends(get_current_user)):
     """Trenutno ulogovani korisnik."""
     return current_user
@@ -10,9 +10,19 @@ from src.config.models import User
 from src.config.settings import settings
 from src.modules.auth.schemas import RegisterRequest
 from src.utils.errors import AuthError, ValidationError
+from src.utils.worker_pool import BoundedWorkerPool
 
 
 # ── Password hashing ────────────────────────────────────────────────
+# bcrypt traje ~200-300 ms i blokira — u async kodu ide kroz pool
+password_pool = BoundedWorkerPool(
+    "password",
+    kind=settings.PASSWORD_POOL_KIND,
+    workers=settings.PASSWORD_POOL_WORKERS,
+    max_queue=settings.PASSWORD_POOL_MAX_QUEUE,
+)
+
+
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
 
@@ -21,6 +31,14 @@ def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode(), hashed.encode())
 
 
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await password_pool.run(verify_password, password, hashed)
+
+
 # ── JWT tokens ───────────────────────────────────────────────────────
 def create_access_token(user_id: UUID) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -62,7 +80,7 @@ async def register_user(db: AsyncSession, data: RegisterRequest) -> User:
 
     user = User(
         email=data.email,
-        password=hash_password(data.password),
+        password=await hash_password_async(data.password),
         name=data.name,
     )
     db.add(user)
@@ -75,7 +93,7 @@ async def authenticate_user(db: AsyncSession, email: str, password: str) -> User
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(password, user.password):
+    if not user or not await verify_password_async(password, user.password):
         raise AuthError("Invalid email or password")
 
     return user
@@ -0,0 +1,207 @@
+"""Alerti za prelazak pragova potrosnje budzeta (settings.BUDGET_ALERT_THRESHOLDS).
+
+Brojaci potrosnje po (korisnik, kategorija, mesec) su monthly_rollups — trigger-i ih
+azuriraju atomski sa svakom izmenom transakcija. Pragovi se proveravaju set-based u
+istoj transakciji kao i izmena (`commit_with_alerts`), samo za mesece i kategorije koje
+izmena dotice: novi prelasci se upisuju u budget_alerts (unique po budzetu i pragu, pa
+se dogadjaj emituje tacno jednom) i posle commit-a objavljuju na Redis kanal ALERT_CHANNEL.
+"""
+
+import datetime
+import json
+from collections.abc import Iterable
+from uuid import UUID
+
+from sqlalchemy import DateTime, Row, delete, exists, func, literal, select, true, tuple_, union_all
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.models import Budget, BudgetAlert, CategoryClosure, MonthlyRollup, TransactionType
+from src.config.redis import get_redis
+from src.config.rollups import find_drifted_users, rebuild_rollups
+from src.config.settings import settings
+from src.utils.cache import CACHE_PREFIX
+from src.utils.logger import logger
+from src.utils.sql import dialect_insert, ignore_conflicts, month_start
+
+ALERT_CHANNEL = CACHE_PREFIX + "budget-alerts"
+
+
+def _scope(user_id: UUID, months: list[datetime.date] | None, category_ids: list[int] | None) -> tuple[list, list]:
+    """Uslovi nad budgets i nad potrosnjom (monthly_rollups x closure) za budzete u opsegu."""
+    budgets = [Budget.user_id == user_id]
+    spend = [MonthlyRollup.user_id == user_id, MonthlyRollup.type == TransactionType.expense]
+    if months is not None:
+        budgets.append(month_start(Budget.month).in_(months))
+        spend.append(MonthlyRollup.month.in_(months))
+    if category_ids is not None:
+        # Izmena u kategoriji menja potrosnju nje same i svih njenih nadkategorija
+        ancestors = select(CategoryClosure.ancestor_id).where(CategoryClosure.descendant_id.in_(category_ids))
+        budgets.append(Budget.category_id.in_(ancestors))
+        spend.append(CategoryClosure.ancestor_id.in_(ancestors))
+    return budgets, spend
+
+
+def _crossed(thresholds: list[int], budget_scope: list, spend_scope: list):
+    """(budget_id, user_id, threshold, spent, budgeted) za svaki dostignut prag budzeta u opsegu."""
+    levels = union_all(*(select(literal(level).label("threshold")) for level in thresholds)).subquery("levels")
+    # Potrosnja podstabla — budzet nadkategorije pokriva i podkategorije
+    spend = (
+        select(
+            CategoryClosure.ancestor_id.label("category_id"),
+            MonthlyRollup.month,
+            func.sum(MonthlyRollup.total).label("total"),
+        )
+        .join(CategoryClosure, CategoryClosure.descendant_id == MonthlyRollup.category_id)
+        .where(*spend_scope)
+        .group_by(CategoryClosure.ancestor_id, MonthlyRollup.month)
+        .subquery("spend")
+    )
+    return (
+        select(
+            Budget.id.label("budget_id"),
+            Budget.user_id,
+            levels.c.threshold,
+            spend.c.total.label("spent"),
+            Budget.amount.label("budgeted"),
+        )
+        .join(spend, (spend.c.category_id == Budget.category_id) & (spend.c.month == month_start(Budget.month)))
+        .join(levels, true())
+        .where(*budget_scope, spend.c.total * 100 >= Budget.amount * levels.c.threshold)
+        .subquery("crossed")
+    )
+
+
+async def evaluate_budget_alerts(
+    db: AsyncSession,
+    user_id: UUID,
+    months: Iterable[datetime.date] | None = None,
+    category_ids: Iterable[int] | None = None,
+) -> list[Row]:
+    """Uskladjuje budget_alerts sa trenutnom potrosnjom; vraca samo nove prelaske. Ne radi commit.
+
+    `months`/`category_ids` suzavaju proveru na budzete tih meseci i tih kategorija
+    (sa nadkategorijama); None znaci bez ogranicenja. Alert ciji prag vise nije
+    dostignut (obrisana transakcija, veci budzet) se brise, pa naredni prelazak
+    ponovo emituje dogadjaj.
+    """
+    thresholds = settings.BUDGET_ALERT_THRESHOLDS
+    if months is not None:
+        months = sorted({month.replace(day=1) for month in months})
+    if category_ids is not None:
+        category_ids = sorted(set(category_ids))
+    if not thresholds or months == [] or category_ids == []:
+        return []
+    budget_scope, spend_scope = _scope(user_id, months, category_ids)
+    crossed = _crossed(thresholds, budget_scope, spend_scope)
+
+    await db.execute(
+        delete(BudgetAlert).where(
+            BudgetAlert.user_id == user_id,
+            BudgetAlert.budget_id.in_(select(Budget.id).where(*budget_scope)),
+            tuple_(BudgetAlert.budget_id, BudgetAlert.threshold).not_in(
+                select(crossed.c.budget_id, crossed.c.threshold)
+            ),
+        )
+    )
+    new = select(
+        crossed.c.budget_id,
+        crossed.c.user_id,
+        crossed.c.threshold,
+        crossed.c.spent,
+        crossed.c.budgeted,
+        literal(datetime.datetime.utcnow(), DateTime),
+    ).where(
+        ~exists().where(BudgetAlert.budget_id == crossed.c.budget_id, BudgetAlert.threshold == crossed.c.threshold)
+    )
+    stmt = ignore_conflicts(
+        dialect_insert(db, BudgetAlert).from_select(
+            ["budget_id", "user_id", "threshold", "spent", "budgeted", "created_at"], new
+        ),
+        ["budget_id", "threshold"],
+    ).returning(BudgetAlert.budget_id, BudgetAlert.threshold, BudgetAlert.spent, BudgetAlert.budgeted)
+    return list((await db.execute(stmt)).all())
+
+
+async def get_budget_alerts(db: AsyncSession, user_id: UUID, month: datetime.date | None = None) -> list[Row]:
+    """Aktivni alerti korisnika (najnoviji prvi), opciono za jedan mesec."""
+    query = (
+        select(
+            BudgetAlert.id,
+            BudgetAlert.budget_id,
+            Budget.category_id,
+            Budget.month,
+            BudgetAlert.threshold,
+            BudgetAlert.spent,
+            BudgetAlert.budgeted,
+            BudgetAlert.created_at,
+        )
+        .join(Budget, Budget.id == BudgetAlert.budget_id)
+        .where(BudgetAlert.user_id == user_id)
+        .order_by(BudgetAlert.created_at.desc(), BudgetAlert.id.desc())
+    )
+    if month is not None:
+        query = query.where(Budget.month == month)
+    return list((await db.execute(query)).all())
+
+
+async def publish_budget_alert(user_id: UUID, alert: Row) -> None:
+    """Objavljuje prelazak praga. Greska u publish-u ne obara upis."""
+    event = {
+        "type": "budget_alert",
+        "user_id": str(user_id),
+        "budget_id": alert.budget_id,
+        "threshold": alert.threshold,
+        "spent": float(alert.spent),
+        "budgeted": float(alert.budgeted),
+    }
+    try:
+        await get_redis().publish(ALERT_CHANNEL, json.dumps(event))
+    except Exception as exc:
+        logger.warning(f"Budget alert PUBLISH failed: {alert.budget_id}/{alert.threshold}% ({exc})")
+
+
+async def commit_with_alerts(
+    db: AsyncSession,
+    user_id: UUID,
+    months: Iterable[datetime.date] | None = None,
+    category_ids: Iterable[int] | None = None,
+) -> None:
+    """Commit izmene zajedno sa proverom pragova budzeta koje ona dotice (vidi `evaluate_budget_alerts`).
+
+    Provera ide u SAVEPOINT-u iste transakcije: greska ne obara upis — propusten
+    prelazak nadoknadjuje `manage.py reconcile-budgets`. Objava je tek posle commit-a.
+    """
+    fired = []
+    try:
+        async with db.begin_nested():
+            fired = await evaluate_budget_alerts(db, user_id, months, category_ids)
+    except SQLAlchemyError as exc:
+        logger.warning(f"Budget alerts: provera za {user_id} nije uspela ({exc})")
+    await db.commit()
+    for alert in fired:
+        logger.info(f"Budget alert: budzet {alert.budget_id} presao {alert.threshold}%")
+        await publish_budget_alert(user_id, alert)
+
+
+async def reconcile_budget_alerts(db: AsyncSession, user_id: UUID | None = None) -> dict[str, int]:
+    """Periodicni posao: ispravlja odstupanja agregata od transakcija i ponovo proverava pragove.
+
+    Pokriva i prelaske propustene zbog greske u `commit_with_alerts` ili zaobilaznih upisa.
+    """
+    drifted = await find_drifted_users(db, user_id)
+    for drifted_user in drifted:
+        logger.warning(f"Rollups: odstupanje za korisnika {drifted_user}, ponovo racunam")
+        await rebuild_rollups(db, drifted_user)
+
+    users = select(Budget.user_id).distinct()
+    if user_id is not None:
+        users = users.where(Budget.user_id == user_id)
+    fired = 0
+    for budget_user in (await db.execute(users)).scalars().all():
+        alerts = await evaluate_budget_alerts(db, budget_user)
+        await db.commit()
+        for alert in alerts:
+            await publish_budget_alert(budget_user, alert)
+            fired += 1
+    return {"drifted": len(drifted), "alerts": fired}
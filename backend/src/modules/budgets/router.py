@@ -1,11 +1,12 @@
 import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Response, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config.database import get_db
-from src.config.models import User
+from src.modules.auth.principal import CurrentUser
 from src.middleware.auth import get_current_user
 from src.modules.budgets.schemas import (
     BudgetCreate,
@@ -13,17 +14,24 @@ from src.modules.budgets.schemas import (
     BudgetResponse,
     BudgetSummaryItem,
     BudgetFilters,
+    BudgetReportResponse,
+    BudgetAlertResponse,
+    BudgetBulkCreate,
+    BudgetBulkResponse,
 )
 from src.modules.budgets import service
+from src.modules.budgets.alerts import get_budget_alerts
 from src.utils.cache import invalidate_user_dashboard
 
 router = APIRouter(prefix="/api/budgets", tags=["budgets"])
 
+_budgets_json = TypeAdapter(list[BudgetResponse])
+
 
 @router.post("/", response_model=BudgetResponse, status_code=status.HTTP_201_CREATED)
 async def create_budget(
     data: BudgetCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     result = await service.create_budget(db, current_user.id, data)
@@ -31,31 +39,83 @@ async def create_budget(
     return result
 
 
+@router.post("/bulk", response_model=BudgetBulkResponse, status_code=status.HTTP_201_CREATED)
+async def create_budgets_bulk(
+    data: BudgetBulkCreate,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Budzeti za vise kategorija istog meseca; postojeci se preskacu."""
+    result = await service.create_budgets_bulk(db, current_user.id, data)
+    if result.created:
+        await invalidate_user_dashboard(str(current_user.id))
+    return result
+
+
+@router.post("/rollover", response_model=BudgetBulkResponse, status_code=status.HTTP_201_CREATED)
+async def rollover_budgets(
+    from_month: datetime.date = Query(..., alias="from", description="Izvorni mesec, npr. 2026-02-01"),
+    to_month: datetime.date = Query(..., alias="to", description="Prvi ciljni mesec, npr. 2026-03-01"),
+    months: int = Query(1, ge=1, le=service.ROLLOVER_MAX_MONTHS, description="Broj uzastopnih ciljnih meseci"),
+    scale: float = Query(1.0, gt=0, le=10, description="Mnozilac iznosa (npr. 1.05 za +5%)"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Prenosi (i opciono skalira) budzete jednog meseca u naredne mesece."""
+    result = await service.rollover_budgets(db, current_user.id, from_month, to_month, months, scale)
+    if result.created:
+        await invalidate_user_dashboard(str(current_user.id))
+    return result
+
+
 @router.get("/", response_model=list[BudgetResponse])
 async def list_budgets(
     month: Optional[datetime.date] = None,
     category_id: Optional[int] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     filters = BudgetFilters(month=month, category_id=category_id)
-    return await service.get_budgets(db, current_user.id, filters)
+    rows = await service.get_budgets(db, current_user.id, filters)
+    budgets = _budgets_json.validate_python(rows, from_attributes=True)
+    return Response(content=_budgets_json.dump_json(budgets), media_type="application/json")
 
 
 @router.get("/summary", response_model=list[BudgetSummaryItem])
 async def budget_summary(
     month: datetime.date = Query(..., description="Prvi dan meseca, npr. 2026-02-01"),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Pregled budzeta sa potrosenim iznosima za dati mesec."""
     return await service.get_budget_summary(db, current_user.id, month)
 
 
+@router.get("/report", response_model=BudgetReportResponse)
+async def budget_report(
+    date_from: datetime.date = Query(..., description="Prvi mesec, npr. 2026-01-01"),
+    date_to: datetime.date = Query(..., description="Poslednji mesec, npr. 2026-12-01"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Budzet vs. potroseno po kategorijama za opseg meseci (npr. cela godina)."""
+    return await service.get_budget_report(db, current_user.id, date_from, date_to)
+
+
+@router.get("/alerts", response_model=list[BudgetAlertResponse])
+async def budget_alerts(
+    month: Optional[datetime.date] = Query(None, description="Prvi dan meseca, npr. 2026-02-01"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Dostignuti pragovi potrosnje (settings.BUDGET_ALERT_THRESHOLDS) po budzetu."""
+    return await get_budget_alerts(db, current_user.id, month)
+
+
 @router.get("/{budget_id}", response_model=BudgetResponse)
 async def get_budget(
     budget_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     return await service.get_budget_by_id(db, current_user.id, budget_id)
@@ -65,7 +125,7 @@ async def get_budget(
 async def update_budget(
     budget_id: int,
     data: BudgetUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     result = await service.update_budget(db, current_user.id, budget_id, data)
@@ -76,7 +136,7 @@ async def update_budget(
 @router.delete("/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_budget(
     budget_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     await service.delete_budget(db, current_user.id, budget_id)
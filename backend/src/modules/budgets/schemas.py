@@ -24,6 +24,22 @@ class BudgetResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class BudgetBulkItem(BaseModel):
+    category_id: int = Field(..., gt=0)
+    amount: float = Field(..., gt=0)
+
+
+class BudgetBulkCreate(BaseModel):
+    month: datetime.date = Field(..., description="Prvi dan meseca (npr. 2026-02-01)")
+    items: list[BudgetBulkItem] = Field(..., min_length=1, max_length=500)
+
+
+class BudgetBulkResponse(BaseModel):
+    created: int
+    skipped: int  # budzet vec postoji (ili kategorija nije korisnikova)
+    budgets: list[BudgetResponse]
+
+
 class BudgetSummaryItem(BaseModel):
     id: int
     category_id: int
@@ -34,6 +50,37 @@ class BudgetSummaryItem(BaseModel):
     month: datetime.date
 
 
+class BudgetReportCell(BaseModel):
+    month: datetime.date
+    budgeted: float
+    spent: float
+    remaining: float
+
+
+class BudgetReportRow(BaseModel):
+    category_id: int
+    category_name: str
+    months: list[BudgetReportCell]  # isti redosled kao BudgetReportResponse.months
+    budgeted_total: float
+    spent_total: float
+
+
+class BudgetReportResponse(BaseModel):
+    months: list[datetime.date]
+    data: list[BudgetReportRow]
+
+
+class BudgetAlertResponse(BaseModel):
+    id: int
+    budget_id: int
+    category_id: int
+    month: datetime.date
+    threshold: int  # procenat budzeta
+    spent: float
+    budgeted: float
+    created_at: datetime.datetime
+
+
 class BudgetFilters(BaseModel):
     month: Optional[datetime.date] = None
     category_id: Optional[int] = None
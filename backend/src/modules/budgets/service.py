@@ -1,47 +1,150 @@
 import datetime
 from uuid import UUID
 
-from sqlalchemy import select, func, extract
+from sqlalchemy import Row, case, delete, func, literal, select, true, union_all, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config.models import Budget, Category, Transaction, TransactionType
-from src.modules.budgets.schemas import BudgetCreate, BudgetUpdate, BudgetFilters, BudgetSummaryItem
+from src.config.models import Budget, Category, CategoryClosure, MonthlyRollup, TransactionType
+from src.modules.budgets.alerts import commit_with_alerts
+from src.modules.budgets.schemas import (
+    BudgetBulkCreate,
+    BudgetBulkResponse,
+    BudgetCreate,
+    BudgetResponse,
+    BudgetUpdate,
+    BudgetFilters,
+    BudgetReportCell,
+    BudgetReportResponse,
+    BudgetReportRow,
+    BudgetSummaryItem,
+)
 from src.utils.errors import NotFoundError, ValidationError
+from src.utils.sql import dialect_insert, ignore_conflicts, insert_ignoring_conflict, month_start
 
+# Kolone odgovora — write putanje ih vracaju kroz RETURNING
+BUDGET_COLUMNS = (Budget.id, Budget.category_id, Budget.amount, Budget.month)
 
-async def create_budget(db: AsyncSession, user_id: UUID, data: BudgetCreate) -> Budget:
-    # Provera da kategorija postoji i pripada korisniku
-    cat = await db.execute(
-        select(Category).where(Category.id == data.category_id, Category.user_id == user_id)
+
+async def create_budget(db: AsyncSession, user_id: UUID, data: BudgetCreate) -> Row:
+    """Jedan INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING.
+
+    SELECT iz categories proverava vlasnistvo, a unique constraint (korisnik,
+    kategorija, mesec) duplikat — razlog neuspeha se trazi tek kad insert ne vrati red.
+    """
+    owned_category = select(
+        literal(user_id, Budget.user_id.type),
+        Category.id,
+        literal(data.amount, Budget.amount.type),
+        literal(data.month, Budget.month.type),
+    ).where(Category.id == data.category_id, Category.user_id == user_id)
+    stmt = (
+        dialect_insert(db, Budget)
+        .from_select(["user_id", "category_id", "amount", "month"], owned_category)
+        .returning(*BUDGET_COLUMNS)
     )
-    if not cat.scalar_one_or_none():
+    budget = await insert_ignoring_conflict(db, stmt, ["user_id", "category_id", "month"])
+    if budget is None:
+        await _raise_budget_conflict(db, user_id, data.category_id)
+    await commit_with_alerts(db, user_id, [budget.month], [budget.category_id])
+    return budget
+
+
+async def _raise_budget_conflict(db: AsyncSession, user_id: UUID, category_id: int) -> None:
+    category = await db.execute(
+        select(Category.id).where(Category.id == category_id, Category.user_id == user_id)
+    )
+    if category.scalar_one_or_none() is None:
         raise NotFoundError("Category")
+    raise ValidationError("Budget za ovu kategoriju i mesec vec postoji")
 
-    # Provera da vec ne postoji budget za istu kategoriju i mesec
-    existing = await db.execute(
-        select(Budget).where(
-            Budget.user_id == user_id,
-            Budget.category_id == data.category_id,
-            Budget.month == data.month,
-        )
+
+async def _insert_budgets(db: AsyncSession, user_id: UUID, source, requested: int) -> BudgetBulkResponse:
+    """INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING; preskoceni = trazeni - upisani."""
+    stmt = ignore_conflicts(
+        dialect_insert(db, Budget).from_select(["user_id", "category_id", "amount", "month"], source),
+        ["user_id", "category_id", "month"],
+    ).returning(*BUDGET_COLUMNS)
+    try:
+        created = list((await db.execute(stmt)).all())
+    except IntegrityError:
+        # Dijalekt bez ON CONFLICT: ceo batch se odbija
+        await db.rollback()
+        raise ValidationError("Neki od budzeta vec postoje")
+    await commit_with_alerts(db, user_id, [row.month for row in created], [row.category_id for row in created])
+    return BudgetBulkResponse(
+        created=len(created),
+        skipped=requested - len(created),
+        budgets=[BudgetResponse.model_validate(row) for row in created],
     )
-    if existing.scalar_one_or_none():
-        raise ValidationError("Budget za ovu kategoriju i mesec vec postoji")
 
-    budget = Budget(
-        user_id=user_id,
-        category_id=data.category_id,
-        amount=data.amount,
-        month=data.month,
+
+async def create_budgets_bulk(db: AsyncSession, user_id: UUID, data: BudgetBulkCreate) -> BudgetBulkResponse:
+    """Budzeti za vise kategorija jednog meseca jednim upitom.
+
+    Iznosi se biraju CASE-om po id-ju kategorije, a uslov nad categories ujedno
+    proverava vlasnistvo — tudje i nepostojece kategorije se preskacu.
+    """
+    amounts = {item.category_id: item.amount for item in data.items}
+    if len(amounts) != len(data.items):
+        raise ValidationError("Kategorija se ponavlja u listi budzeta")
+    source = select(
+        literal(user_id, Budget.user_id.type),
+        Category.id,
+        case(amounts, value=Category.id, else_=None).cast(Budget.amount.type),
+        literal(data.month, Budget.month.type),
+    ).where(Category.user_id == user_id, Category.id.in_(amounts))
+    return await _insert_budgets(db, user_id, source, len(amounts))
+
+
+ROLLOVER_MAX_MONTHS = 24
+
+
+async def rollover_budgets(
+    db: AsyncSession,
+    user_id: UUID,
+    from_month: datetime.date,
+    to_month: datetime.date,
+    months: int = 1,
+    scale: float = 1.0,
+) -> BudgetBulkResponse:
+    """Kopira budzete meseca `from_month` u `months` uzastopnih meseci od `to_month`.
+
+    Iznosi se mnoze sa `scale`; budzeti koji u ciljnom mesecu vec postoje se preskacu.
+    Jedan INSERT ... SELECT (izvorni budzeti x ciljni meseci) — plus COUNT izvora za broj preskocenih.
+    """
+    source_first = from_month.replace(day=1)
+    first = to_month.replace(day=1)
+    last = first.year * 12 + first.month - 1 + months - 1
+    targets = _months(first, datetime.date(last // 12, last % 12 + 1, 1))
+    if source_first in targets:
+        raise ValidationError("Ciljni meseci ne smeju sadrzati izvorni mesec")
+
+    in_source = (
+        Budget.user_id == user_id,
+        Budget.month >= source_first,
+        Budget.month < (source_first + datetime.timedelta(days=32)).replace(day=1),
     )
-    db.add(budget)
-    await db.commit()
-    await db.refresh(budget)
-    return budget
+    sources = (await db.execute(select(func.count()).select_from(Budget).where(*in_source))).scalar_one()
+    if not sources:
+        return BudgetBulkResponse(created=0, skipped=0, budgets=[])
 
+    target_months = union_all(
+        *(select(literal(month, Budget.month.type).label("month")) for month in targets)
+    ).subquery("targets")
+    amount = Budget.amount if scale == 1 else func.round(Budget.amount * scale, 2)
+    source = (
+        select(Budget.user_id, Budget.category_id, amount, target_months.c.month)
+        .join(target_months, true())
+        .where(*in_source)
+        .order_by(target_months.c.month, Budget.category_id)
+    )
+    return await _insert_budgets(db, user_id, source, sources * len(targets))
 
-async def get_budgets(db: AsyncSession, user_id: UUID, filters: BudgetFilters) -> list[Budget]:
-    query = select(Budget).where(Budget.user_id == user_id)
+
+async def get_budgets(db: AsyncSession, user_id: UUID, filters: BudgetFilters) -> list:
+    """Lista kao redovi sa kolonama odgovora (bez ORM entiteta)."""
+    query = select(*BUDGET_COLUMNS).where(Budget.user_id == user_id)
 
     if filters.month:
         query = query.where(Budget.month == filters.month)
@@ -50,7 +153,7 @@ async def get_budgets(db: AsyncSession, user_id: UUID, filters: BudgetFilters) -
 
     query = query.order_by(Budget.month.desc())
     result = await db.execute(query)
-    return list(result.scalars().all())
+    return list(result.all())
 
 
 async def get_budget_by_id(db: AsyncSession, user_id: UUID, budget_id: int) -> Budget:
@@ -65,59 +168,173 @@ async def get_budget_by_id(db: AsyncSession, user_id: UUID, budget_id: int) -> B
 
 async def update_budget(
     db: AsyncSession, user_id: UUID, budget_id: int, data: BudgetUpdate
-) -> Budget:
-    budget = await get_budget_by_id(db, user_id, budget_id)
-
+) -> Row | Budget:
+    """Jedan UPDATE ... RETURNING — bez prethodnog SELECT-a i refresh-a."""
     update_data = data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(budget, field, value)
+    if not update_data:
+        return await get_budget_by_id(db, user_id, budget_id)
 
-    await db.commit()
-    await db.refresh(budget)
+    stmt = (
+        update(Budget)
+        .where(Budget.id == budget_id, Budget.user_id == user_id)
+        .values(**update_data)
+        .returning(*BUDGET_COLUMNS)
+    )
+    try:
+        budget = (await db.execute(stmt)).one_or_none()
+    except IntegrityError:
+        await db.rollback()
+        raise ValidationError("Budget za ovu kategoriju i mesec vec postoji")
+    if budget is None:
+        raise NotFoundError("Budget")
+    await commit_with_alerts(db, user_id, [budget.month], [budget.category_id])
     return budget
 
 
 async def delete_budget(db: AsyncSession, user_id: UUID, budget_id: int) -> None:
-    budget = await get_budget_by_id(db, user_id, budget_id)
-    await db.delete(budget)
+    result = await db.execute(
+        delete(Budget).where(Budget.id == budget_id, Budget.user_id == user_id).returning(Budget.id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise NotFoundError("Budget")
     await db.commit()
 
 
+def _expense_by_month(user_id: UUID, first: datetime.date, last: datetime.date):
+    """Subquery (category_id, month, spent) iz monthly_rollups za opseg meseci [first, last].
+
+    Potrosnja kategorije obuhvata celo njeno podstablo (join sa category_closure),
+    pa budzet nadkategorije pokriva i podkategorije.
+    """
+    return (
+        select(
+            CategoryClosure.ancestor_id.label("category_id"),
+            MonthlyRollup.month,
+            func.sum(MonthlyRollup.total).label("spent"),
+        )
+        .join(CategoryClosure, CategoryClosure.descendant_id == MonthlyRollup.category_id)
+        .where(
+            MonthlyRollup.user_id == user_id,
+            MonthlyRollup.type == TransactionType.expense,
+            MonthlyRollup.month >= first,
+            MonthlyRollup.month <= last,
+        )
+        .group_by(CategoryClosure.ancestor_id, MonthlyRollup.month)
+        .subquery("spend")
+    )
+
+
 async def get_budget_summary(
     db: AsyncSession, user_id: UUID, month: datetime.date
 ) -> list[BudgetSummaryItem]:
-    """Vraca sve budzete za mesec sa iznosom potrosenog."""
-    budgets_query = (
-        select(Budget, Category.name)
+    """Vraca sve budzete za mesec sa iznosom potrosenog — jedan upit (budzeti + agregirana potrosnja)."""
+    first = month.replace(day=1)
+    spend = _expense_by_month(user_id, first, first)
+    query = (
+        select(
+            Budget.id,
+            Budget.category_id,
+            Category.name.label("category_name"),
+            Budget.amount,
+            Budget.month,
+            func.coalesce(spend.c.spent, 0).label("spent"),
+        )
         .join(Category, Budget.category_id == Category.id)
+        .outerjoin(spend, spend.c.category_id == Budget.category_id)
         .where(Budget.user_id == user_id, Budget.month == month)
         .order_by(Category.name)
     )
-    budgets_result = await db.execute(budgets_query)
-    rows = budgets_result.all()
-
-    summary = []
-    for budget, category_name in rows:
-        # Potroseno u ovom mesecu za ovu kategoriju
-        spent_query = select(func.coalesce(func.sum(Transaction.amount), 0)).where(
-            Transaction.user_id == user_id,
-            Transaction.category_id == budget.category_id,
-            Transaction.type == TransactionType.expense,
-            extract("year", Transaction.date) == month.year,
-            extract("month", Transaction.date) == month.month,
+    result = await db.execute(query)
+
+    return [
+        BudgetSummaryItem(
+            id=row.id,
+            category_id=row.category_id,
+            category_name=row.category_name,
+            budgeted=float(row.amount),
+            spent=float(row.spent),
+            remaining=float(row.amount) - float(row.spent),
+            month=row.month,
         )
-        spent = (await db.execute(spent_query)).scalar()
-
-        summary.append(
-            BudgetSummaryItem(
-                id=budget.id,
-                category_id=budget.category_id,
-                category_name=category_name,
-                budgeted=float(budget.amount),
-                spent=float(spent),
-                remaining=float(budget.amount) - float(spent),
-                month=budget.month,
+        for row in result.all()
+    ]
+
+
+REPORT_MAX_MONTHS = 36
+
+
+def _months(first: datetime.date, last: datetime.date) -> list[datetime.date]:
+    months = []
+    while first <= last:
+        months.append(first)
+        first = (first + datetime.timedelta(days=32)).replace(day=1)
+    return months
+
+
+async def get_budget_report(
+    db: AsyncSession, user_id: UUID, date_from: datetime.date, date_to: datetime.date
+) -> BudgetReportResponse:
+    """Budzet vs. potroseno po kategoriji i mesecu za opseg meseci — jedan upit.
+
+    Redovi su kategorije koje u opsegu imaju budzet ili rashod; meseci bez
+    budzeta i potrosnje su popunjeni nulama.
+    """
+    first, last = date_from.replace(day=1), date_to.replace(day=1)
+    months = _months(first, last)
+    if not months:
+        raise ValidationError("date_from mora biti pre date_to")
+    if len(months) > REPORT_MAX_MONTHS:
+        raise ValidationError(f"Izvestaj moze obuhvatiti najvise {REPORT_MAX_MONTHS} meseci")
+
+    budget_month = month_start(Budget.month)
+    budgeted = select(
+        Budget.category_id,
+        budget_month.label("month"),
+        Budget.amount.label("budgeted"),
+        literal(0).label("spent"),
+    ).where(
+        Budget.user_id == user_id,
+        Budget.month >= first,
+        Budget.month < (last + datetime.timedelta(days=32)).replace(day=1),
+    )
+    spend = _expense_by_month(user_id, first, last)
+    spent = select(spend.c.category_id, spend.c.month, literal(0), spend.c.spent)
+    cells = union_all(budgeted, spent).subquery("cells")
+
+    query = (
+        select(
+            Category.id,
+            Category.name,
+            cells.c.month,
+            func.sum(cells.c.budgeted).label("budgeted"),
+            func.sum(cells.c.spent).label("spent"),
+        )
+        .join(cells, cells.c.category_id == Category.id)
+        .group_by(Category.id, Category.name, cells.c.month)
+        .order_by(Category.name, Category.id)
+    )
+    result = await db.execute(query)
+
+    rows: dict[int, BudgetReportRow] = {}
+    position = {month: index for index, month in enumerate(months)}
+    for row in result.all():
+        report_row = rows.get(row.id)
+        if report_row is None:
+            report_row = rows[row.id] = BudgetReportRow(
+                category_id=row.id,
+                category_name=row.name,
+                months=[BudgetReportCell(month=month, budgeted=0, spent=0, remaining=0) for month in months],
+                budgeted_total=0,
+                spent_total=0,
             )
+        budgeted_amount, spent_amount = float(row.budgeted), float(row.spent)
+        report_row.months[position[row.month]] = BudgetReportCell(
+            month=row.month,
+            budgeted=budgeted_amount,
+            spent=spent_amount,
+            remaining=budgeted_amount - spent_amount,
         )
+        report_row.budgeted_total += budgeted_amount
+        report_row.spent_total += spent_amount
 
-    return summary
+    return BudgetReportResponse(months=months, data=list(rows.values()))
@@ -1,27 +1,33 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config.database import get_db
-from src.config.models import User
+from src.modules.auth.principal import CurrentUser
 from src.middleware.auth import get_current_user
 from src.modules.categories.schemas import (
     CategoryCreate,
     CategoryUpdate,
     CategoryResponse,
     CategoryType,
+    CategoryDeleteMode,
+    CategoryMerge,
+    CategoryMergeResponse,
 )
 from src.modules.categories import service
 from src.utils.cache import invalidate_user_dashboard
 
 router = APIRouter(prefix="/api/categories", tags=["categories"])
 
+_categories_json = TypeAdapter(list[CategoryResponse])
+
 
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_category(
     data: CategoryCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     result = await service.create_category(db, current_user.id, data)
@@ -32,16 +38,18 @@ async def create_category(
 @router.get("/", response_model=list[CategoryResponse])
 async def list_categories(
     type: Optional[CategoryType] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    return await service.get_categories(db, current_user.id, type)
+    rows = await service.get_categories(db, current_user.id, type)
+    categories = _categories_json.validate_python(rows, from_attributes=True)
+    return Response(content=_categories_json.dump_json(categories), media_type="application/json")
 
 
 @router.get("/{category_id}", response_model=CategoryResponse)
 async def get_category(
     category_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     return await service.get_category_by_id(db, current_user.id, category_id)
@@ -51,7 +59,7 @@ async def get_category(
 async def update_category(
     category_id: int,
     data: CategoryUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     result = await service.update_category(db, current_user.id, category_id, data)
@@ -59,11 +67,26 @@ async def update_category(
     return result
 
 
+@router.post("/{category_id}/merge", response_model=CategoryMergeResponse)
+async def merge_category(
+    category_id: int,
+    data: CategoryMerge,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Prebacuje transakcije i budzete u drugu kategoriju istog tipa i brise ovu."""
+    result = await service.merge_category(db, current_user.id, category_id, data.target_id)
+    await invalidate_user_dashboard(str(current_user.id))
+    return result
+
+
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_category(
     category_id: int,
-    current_user: User = Depends(get_current_user),
+    mode: CategoryDeleteMode = Query(CategoryDeleteMode.restrict, description="restrict | reassign | purge"),
+    target_id: Optional[int] = Query(None, gt=0, description="Ciljna kategorija za mode=reassign"),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await service.delete_category(db, current_user.id, category_id)
+    await service.delete_category(db, current_user.id, category_id, mode, target_id)
     await invalidate_user_dashboard(str(current_user.id))
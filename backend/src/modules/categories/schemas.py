@@ -13,12 +13,14 @@ class CategoryCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=100, description="Naziv kategorije")
     type: CategoryType
     icon: Optional[str] = Field(None, max_length=50, description="Emoji ikonica")
+    parent_id: Optional[int] = Field(None, gt=0, description="Nadkategorija (istog tipa)")
 
 
 class CategoryUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     type: Optional[CategoryType] = None
     icon: Optional[str] = Field(None, max_length=50)
+    parent_id: Optional[int] = Field(None, gt=0, description="null premesta kategoriju na vrh stabla")
 
 
 class CategoryResponse(BaseModel):
@@ -26,5 +28,22 @@ class CategoryResponse(BaseModel):
     name: str
     type: CategoryType
     icon: Optional[str]
+    parent_id: Optional[int] = None
 
     model_config = {"from_attributes": True}
+
+
+class CategoryDeleteMode(str, Enum):
+    restrict = "restrict"  # samo kategorija bez transakcija
+    reassign = "reassign"  # transakcije i budzeti prelaze na target_id
+    purge = "purge"  # brisu se i transakcije kategorije
+
+
+class CategoryMerge(BaseModel):
+    target_id: int = Field(..., gt=0, description="Kategorija u koju se spaja (istog tipa)")
+
+
+class CategoryMergeResponse(BaseModel):
+    target_id: int
+    transactions: int  # prebacene transakcije
+    budgets: int  # prebaceni ili sabrani budzeti
@@ -1,47 +1,111 @@
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Row, delete, exists, literal, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from src.config.models import Category
-from src.modules.categories.schemas import CategoryCreate, CategoryUpdate, CategoryType
+from src.config.models import Budget, Category, CategoryClosure, Transaction
+from src.modules.budgets.alerts import commit_with_alerts
+from src.modules.categories.schemas import (
+    CategoryCreate,
+    CategoryDeleteMode,
+    CategoryMergeResponse,
+    CategoryType,
+    CategoryUpdate,
+)
 from src.utils.errors import NotFoundError, ValidationError
+from src.utils.sql import dialect_insert, insert_ignoring_conflict
 
+# Kolone odgovora — write putanje ih vracaju kroz RETURNING
+CATEGORY_COLUMNS = (Category.id, Category.name, Category.type, Category.icon, Category.parent_id)
 
-async def create_category(db: AsyncSession, user_id: UUID, data: CategoryCreate) -> Category:
-    existing = await db.execute(
-        select(Category).where(
-            Category.user_id == user_id,
-            Category.name == data.name,
-            Category.type == data.type.value,
-        )
-    )
-    if existing.scalar_one_or_none():
-        raise ValidationError(f"Kategorija '{data.name}' ({data.type.value}) vec postoji")
 
-    category = Category(
-        user_id=user_id,
-        name=data.name,
-        type=data.type.value,
-        icon=data.icon,
-    )
-    db.add(category)
+async def create_category(db: AsyncSession, user_id: UUID, data: CategoryCreate) -> Row:
+    """Jedan INSERT ... ON CONFLICT DO NOTHING RETURNING — duplikat prijavljuje unique constraint.
+
+    Sa parent_id je to INSERT ... SELECT iz categories, koji ujedno proverava da je
+    roditelj korisnikov i istog tipa; closure redove dodaje trigger.
+    """
+    stmt = dialect_insert(db, Category)
+    if data.parent_id is None:
+        stmt = stmt.values(user_id=user_id, name=data.name, type=data.type.value, icon=data.icon)
+    else:
+        parent = select(
+            literal(user_id, Category.user_id.type),
+            literal(data.name, Category.name.type),
+            Category.type,
+            literal(data.icon, Category.icon.type),
+            Category.id,
+        ).where(Category.id == data.parent_id, Category.user_id == user_id, Category.type == data.type.value)
+        stmt = stmt.from_select(["user_id", "name", "type", "icon", "parent_id"], parent)
+    category = await insert_ignoring_conflict(db, stmt.returning(*CATEGORY_COLUMNS), ["user_id", "name", "type"])
+    if category is None:
+        if data.parent_id is not None:
+            await _check_parent(db, user_id, data.parent_id, data.type.value)
+        raise ValidationError(f"Kategorija '{data.name}' ({data.type.value}) vec postoji")
     await db.commit()
-    await db.refresh(category)
     return category
 
 
+async def _check_parent(
+    db: AsyncSession, user_id: UUID, parent_id: int, category_type: str, category_id: int | None = None
+) -> None:
+    """Roditelj mora biti korisnikov, istog tipa i (pri premestanju) van podstabla kategorije."""
+    in_subtree = exists().where(CategoryClosure.ancestor_id == category_id, CategoryClosure.descendant_id == parent_id)
+    parent = (await db.execute(
+        select(Category.type, in_subtree.label("in_subtree")).where(Category.id == parent_id, Category.user_id == user_id)
+    )).one_or_none()
+    if parent is None:
+        raise NotFoundError("Parent category")
+    if parent.type != category_type:
+        raise ValidationError("Nadkategorija mora biti istog tipa")
+    if parent.in_subtree:
+        raise ValidationError("Kategorija ne moze biti premestena pod samu sebe ili svoju podkategoriju")
+
+
+async def _check_tree(db: AsyncSession, user_id: UUID, category_id: int, update_data: dict) -> int | None:
+    """Promena tipa ili roditelja: novi tip mora da se slaze sa roditeljem i sa celim podstablom.
+
+    Vraca trenutnog roditelja (pre izmene).
+    """
+    new_type = update_data.get("type")
+    mixed_subtree = literal(False)
+    if new_type is not None:
+        descendant = aliased(Category)
+        mixed_subtree = exists().where(
+            CategoryClosure.ancestor_id == category_id,
+            CategoryClosure.depth > 0,
+            descendant.id == CategoryClosure.descendant_id,
+            descendant.type != new_type,
+        )
+    current = (await db.execute(
+        select(Category.type, Category.parent_id, mixed_subtree.label("mixed_subtree"))
+        .where(Category.id == category_id, Category.user_id == user_id)
+    )).one_or_none()
+    if current is None:
+        raise NotFoundError("Category")
+    if current.mixed_subtree:
+        raise ValidationError("Podkategorije moraju biti istog tipa")
+    # Bez parent_id u izmeni vazi postojeci roditelj; proveru i closure radi jedan SELECT, trigger azurira tabelu
+    parent_id = update_data["parent_id"] if "parent_id" in update_data else current.parent_id
+    if parent_id is not None:
+        await _check_parent(db, user_id, parent_id, new_type or current.type.value, category_id)
+    return current.parent_id
+
+
 async def get_categories(
     db: AsyncSession, user_id: UUID, type_filter: CategoryType | None = None
-) -> list[Category]:
-    query = select(Category).where(Category.user_id == user_id)
+) -> list:
+    """Lista kao redovi sa kolonama odgovora (bez ORM entiteta)."""
+    query = select(*CATEGORY_COLUMNS).where(Category.user_id == user_id)
 
     if type_filter:
         query = query.where(Category.type == type_filter.value)
 
     query = query.order_by(Category.name)
     result = await db.execute(query)
-    return list(result.scalars().all())
+    return list(result.all())
 
 
 async def get_category_by_id(db: AsyncSession, user_id: UUID, category_id: int) -> Category:
@@ -59,21 +123,150 @@ async def get_category_by_id(db: AsyncSession, user_id: UUID, category_id: int)
 
 async def update_category(
     db: AsyncSession, user_id: UUID, category_id: int, data: CategoryUpdate
-) -> Category:
-    category = await get_category_by_id(db, user_id, category_id)
-
+) -> Row | Category:
+    """Jedan UPDATE ... RETURNING — bez refresh-a; promena tipa ili roditelja prvo proverava stablo."""
     update_data = data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        if field == "type" and value is not None:
-            value = value.value
-        setattr(category, field, value)
+    if not update_data:
+        return await get_category_by_id(db, user_id, category_id)
+    if update_data.get("type") is not None:
+        update_data["type"] = update_data["type"].value
+    old_parent_id = None
+    if update_data.get("type") is not None or "parent_id" in update_data:
+        old_parent_id = await _check_tree(db, user_id, category_id, update_data)
 
-    await db.commit()
-    await db.refresh(category)
+    stmt = (
+        update(Category)
+        .where(Category.id == category_id, Category.user_id == user_id)
+        .values(**update_data)
+        .returning(*CATEGORY_COLUMNS)
+    )
+    try:
+        category = (await db.execute(stmt)).one_or_none()
+    except IntegrityError:
+        await db.rollback()
+        raise ValidationError("Kategorija sa tim nazivom i tipom vec postoji")
+    if category is None:
+        raise NotFoundError("Category")
+    if "parent_id" in update_data:
+        # Premestanje menja potrosnju podstabala starih i novih nadkategorija
+        parents = {old_parent_id, update_data["parent_id"]} - {None}
+        await commit_with_alerts(db, user_id, category_ids=parents)
+    else:
+        await db.commit()
     return category
 
 
-async def delete_category(db: AsyncSession, user_id: UUID, category_id: int) -> None:
-    category = await get_category_by_id(db, user_id, category_id)
-    await db.delete(category)
-    await db.commit()
+async def _delete_owned(db: AsyncSession, user_id: UUID, category_id: int) -> int | None:
+    """DELETE kategorije; budzete i agregate brise baza (ON DELETE CASCADE). Vraca roditelja."""
+    try:
+        result = await db.execute(
+            delete(Category)
+            .where(Category.id == category_id, Category.user_id == user_id)
+            .returning(Category.id, Category.parent_id)
+        )
+    except IntegrityError:
+        # transactions.category_id je ON DELETE RESTRICT
+        await db.rollback()
+        raise ValidationError("Kategorija ima transakcije — izaberite mode=reassign ili mode=purge")
+    deleted = result.one_or_none()
+    if deleted is None:
+        await db.rollback()
+        raise NotFoundError("Category")
+    return deleted.parent_id
+
+
+async def delete_category(
+    db: AsyncSession,
+    user_id: UUID,
+    category_id: int,
+    mode: CategoryDeleteMode = CategoryDeleteMode.restrict,
+    target_id: int | None = None,
+) -> None:
+    """Brisanje set-based naredbama — broj upita i memorija ne zavise od broja transakcija."""
+    if mode == CategoryDeleteMode.reassign:
+        if target_id is None:
+            raise ValidationError("mode=reassign zahteva target_id")
+        await merge_category(db, user_id, category_id, target_id)
+        return
+    if mode == CategoryDeleteMode.restrict:
+        # Kategorija bez transakcija: podkategorije prelaze na roditelja, potrosnja predaka se ne menja
+        await _delete_owned(db, user_id, category_id)
+        await db.commit()
+        return
+    # Trigger-i nad transactions azuriraju monthly_rollups i daily_balances
+    await db.execute(
+        delete(Transaction).where(Transaction.user_id == user_id, Transaction.category_id == category_id)
+    )
+    parent_id = await _delete_owned(db, user_id, category_id)
+    await commit_with_alerts(db, user_id, category_ids={parent_id} - {None})
+
+
+async def merge_category(
+    db: AsyncSession, user_id: UUID, source_id: int, target_id: int
+) -> CategoryMergeResponse:
+    """Spaja kategoriju `source_id` u `target_id` i brise je.
+
+    Transakcije prelaze jednim UPDATE-om (trigger-i premestaju agregate). Budzet
+    izvora za mesec u kom cilj vec ima budzet se dodaje na iznos cilja, ostali
+    budzeti prelaze na cilj, a podkategorije izvora postaju podkategorije cilja;
+    nista se ne ucitava u memoriju.
+    """
+    if source_id == target_id:
+        raise ValidationError("Kategorija se ne moze spojiti sama sa sobom")
+    in_source = exists().where(CategoryClosure.ancestor_id == source_id, CategoryClosure.descendant_id == Category.id)
+    categories = {
+        row.id: row
+        for row in (await db.execute(
+            select(Category.id, Category.type, Category.parent_id, in_source.label("in_source"))
+            .where(Category.user_id == user_id, Category.id.in_((source_id, target_id)))
+        )).all()
+    }
+    if source_id not in categories:
+        raise NotFoundError("Category")
+    if target_id not in categories:
+        raise NotFoundError("Target category")
+    if categories[source_id].type != categories[target_id].type:
+        raise ValidationError("Spajaju se samo kategorije istog tipa")
+    if categories[target_id].in_source:
+        raise ValidationError("Kategorija se ne moze spojiti u svoju podkategoriju")
+
+    # Podkategorije izvora prelaze pod cilj (trigger azurira category_closure)
+    await db.execute(
+        update(Category).where(Category.user_id == user_id, Category.parent_id == source_id).values(parent_id=target_id)
+    )
+
+    moved = await db.execute(
+        update(Transaction)
+        .where(Transaction.user_id == user_id, Transaction.category_id == source_id)
+        .values(category_id=target_id)
+    )
+
+    source = aliased(Budget)
+    source_same_month = (
+        source.user_id == user_id, source.category_id == source_id, source.month == Budget.month
+    )
+    summed = await db.execute(
+        update(Budget)
+        .where(Budget.user_id == user_id, Budget.category_id == target_id, exists().where(*source_same_month))
+        .values(amount=Budget.amount + select(source.amount).where(*source_same_month).scalar_subquery())
+    )
+    target = aliased(Budget)
+    reassigned = await db.execute(
+        update(Budget)
+        .where(
+            Budget.user_id == user_id,
+            Budget.category_id == source_id,
+            ~exists().where(target.user_id == user_id, target.category_id == target_id, target.month == Budget.month),
+        )
+        .values(category_id=target_id)
+    )
+
+    await _delete_owned(db, user_id, source_id)
+    # Potrosnju menjaju preci izvora (gube) i cilj sa svojim precima (dobijaju)
+    parents = {categories[source_id].parent_id, target_id} - {None}
+    await commit_with_alerts(db, user_id, category_ids=parents)
+    return CategoryMergeResponse(
+        target_id=target_id,
+        transactions=moved.rowcount,
+        budgets=summed.rowcount + reassigned.rowcount,
+    )
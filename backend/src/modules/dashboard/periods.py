@@ -0,0 +1,42 @@
+"""Kalendarski periodi za trendove: nedelja (ISO, od ponedeljka), mesec, kvartal, godina."""
+
+import datetime
+
+from src.modules.dashboard.schemas import TrendGranularity
+
+# Broj meseci po periodu — nedelja se racuna u danima
+_MONTHS = {TrendGranularity.month: 1, TrendGranularity.quarter: 3, TrendGranularity.year: 12}
+
+
+def period_start(day: datetime.date, granularity: TrendGranularity) -> datetime.date:
+    """Prvi dan perioda koji sadrzi `day`."""
+    if granularity == TrendGranularity.week:
+        return day - datetime.timedelta(days=day.weekday())
+    step = _MONTHS[granularity]
+    month = (day.month - 1) // step * step + 1
+    return datetime.date(day.year, month, 1)
+
+
+def shift_period(start: datetime.date, granularity: TrendGranularity, count: int) -> datetime.date:
+    """Pocetak perioda `count` perioda posle (ili pre, za negativan count) `start`."""
+    if granularity == TrendGranularity.week:
+        return start + datetime.timedelta(weeks=count)
+    index = start.year * 12 + start.month - 1 + count * _MONTHS[granularity]
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def period_starts(granularity: TrendGranularity, periods: int, end: datetime.date) -> list[datetime.date]:
+    """Pocetci poslednjih `periods` perioda, rastuce; poslednji sadrzi `end`."""
+    last = period_start(end, granularity)
+    return [shift_period(last, granularity, offset) for offset in range(1 - periods, 1)]
+
+
+def period_label(start: datetime.date, granularity: TrendGranularity) -> str:
+    if granularity == TrendGranularity.week:
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}"
+    if granularity == TrendGranularity.month:
+        return f"{start.year}-{start.month:02d}"
+    if granularity == TrendGranularity.quarter:
+        return f"{start.year}-Q{(start.month - 1) // 3 + 1}"
+    return str(start.year)
@@ -1,59 +1,123 @@
 import datetime
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config.database import get_db
-from src.config.models import User
+from src.config.database import get_db, run_in_session
+from src.modules.auth.principal import CurrentUser
 from src.middleware.auth import get_current_user
 from src.modules.dashboard.schemas import (
+    BalanceSeriesResponse,
     SummaryResponse,
     MonthlyResponse,
     ByCategoryResponse,
     RecentTransaction,
+    TrendGranularity,
+    TrendResponse,
 )
 from src.modules.dashboard import service
-from src.utils.cache import cache_get, cache_set
+from src.utils.cache import cache_get_or_compute, dashboard_cache_key
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
-DASHBOARD_CACHE_TTL = 300  # 5 minuta
+DASHBOARD_CACHE_TTL = 300  # 5 minuta — posle ovoga unos je stale
+DASHBOARD_CACHE_HARD_TTL = 3600  # 1 sat — do tada se stale vrednost servira i osvezava u pozadini
+
+# Serijalizatori za odgovore — keš cuva gotov JSON, pa pogodak ne prolazi kroz response_model
+_summary_json = TypeAdapter(SummaryResponse)
+_balance_json = TypeAdapter(BalanceSeriesResponse)
+_monthly_json = TypeAdapter(MonthlyResponse)
+_trends_json = TypeAdapter(TrendResponse)
+_by_category_json = TypeAdapter(ByCategoryResponse)
+_recent_json = TypeAdapter(list[RecentTransaction])
+
+
+async def _cached(
+    db: AsyncSession,
+    cache_key: str,
+    load: Callable[[AsyncSession], Awaitable[bytes]],
+) -> Response:
+    """Vraca dashboard odgovor kao sirove JSON bajtove iz keša (ili ih izracunava)."""
+    payload, status = await cache_get_or_compute(
+        cache_key,
+        lambda: load(db),
+        DASHBOARD_CACHE_TTL,
+        DASHBOARD_CACHE_HARD_TTL,
+        # Osvezavanje ide posle odgovora, pa ne sme da koristi sesiju request-a
+        refresh=lambda: run_in_session(load),
+    )
+    return Response(content=payload, media_type="application/json", headers={"X-Cache": status})
 
 
 @router.get("/summary", response_model=SummaryResponse)
 async def summary(
     date_from: Optional[datetime.date] = None,
     date_to: Optional[datetime.date] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Ukupni prihodi, rashodi i bilans za period."""
-    cache_key = f"dashboard:{current_user.id}:summary:{date_from}:{date_to}"
-    cached = await cache_get(cache_key)
-    if cached:
-        return cached
+    cache_key = await dashboard_cache_key(current_user.id, "summary", date_from, date_to)
 
-    result = await service.get_summary(db, current_user.id, date_from, date_to)
-    await cache_set(cache_key, result.model_dump(mode="json"), DASHBOARD_CACHE_TTL)
-    return result
+    async def load(session: AsyncSession) -> bytes:
+        result = await service.get_summary(session, current_user.id, date_from, date_to)
+        return _summary_json.dump_json(result)
+
+    return await _cached(db, cache_key, load)
+
+
+@router.get("/balance", response_model=BalanceSeriesResponse)
+async def balance_series(
+    date_from: Optional[datetime.date] = None,
+    date_to: Optional[datetime.date] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Kretanje bilansa po danima (running balance)."""
+    cache_key = await dashboard_cache_key(current_user.id, "balance", date_from, date_to)
+
+    async def load(session: AsyncSession) -> bytes:
+        result = await service.get_balance_series(session, current_user.id, date_from, date_to)
+        return _balance_json.dump_json(result)
+
+    return await _cached(db, cache_key, load)
 
 
 @router.get("/monthly", response_model=MonthlyResponse)
 async def monthly_trends(
     months: int = Query(6, ge=1, le=24, description="Broj meseci unazad"),
-    current_user: User = Depends(get_current_user),
+    end: Optional[datetime.date] = Query(None, description="Dan u poslednjem mesecu (podrazumevano danas)"),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Mesecni trend prihoda i rashoda."""
-    cache_key = f"dashboard:{current_user.id}:monthly:{months}"
-    cached = await cache_get(cache_key)
-    if cached:
-        return cached
+    cache_key = await dashboard_cache_key(current_user.id, "monthly", months, end)
+
+    async def load(session: AsyncSession) -> bytes:
+        result = await service.get_monthly_trends(session, current_user.id, months, end)
+        return _monthly_json.dump_json(result)
 
-    result = await service.get_monthly_trends(db, current_user.id, months)
-    await cache_set(cache_key, result.model_dump(mode="json"), DASHBOARD_CACHE_TTL)
-    return result
+    return await _cached(db, cache_key, load)
+
+
+@router.get("/trends", response_model=TrendResponse)
+async def trends(
+    granularity: TrendGranularity = TrendGranularity.month,
+    periods: int = Query(6, ge=1, le=104, description="Broj perioda unazad"),
+    end: Optional[datetime.date] = Query(None, description="Dan u poslednjem periodu (podrazumevano danas)"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Trend prihoda i rashoda po nedeljama, mesecima, kvartalima ili godinama."""
+    cache_key = await dashboard_cache_key(current_user.id, "trends", granularity.value, periods, end)
+
+    async def load(session: AsyncSession) -> bytes:
+        result = await service.get_trends(session, current_user.id, granularity, periods, end)
+        return _trends_json.dump_json(result)
+
+    return await _cached(db, cache_key, load)
 
 
 @router.get("/by-category", response_model=ByCategoryResponse)
@@ -61,33 +125,31 @@ async def by_category(
     type: str = Query("expense", description="income ili expense"),
     date_from: Optional[datetime.date] = None,
     date_to: Optional[datetime.date] = None,
-    current_user: User = Depends(get_current_user),
+    subtree: bool = Query(False, description="Samo kategorije najviseg nivoa, sa zbirom podkategorija"),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Potrosnja/prihod po kategorijama sa procentima."""
-    cache_key = f"dashboard:{current_user.id}:by-category:{type}:{date_from}:{date_to}"
-    cached = await cache_get(cache_key)
-    if cached:
-        return cached
+    cache_key = await dashboard_cache_key(current_user.id, "by-category", type, date_from, date_to, subtree)
+
+    async def load(session: AsyncSession) -> bytes:
+        result = await service.get_by_category(session, current_user.id, type, date_from, date_to, subtree)
+        return _by_category_json.dump_json(result)
 
-    result = await service.get_by_category(db, current_user.id, type, date_from, date_to)
-    await cache_set(cache_key, result.model_dump(mode="json"), DASHBOARD_CACHE_TTL)
-    return result
+    return await _cached(db, cache_key, load)
 
 
 @router.get("/recent", response_model=list[RecentTransaction])
 async def recent_transactions(
     limit: int = Query(10, ge=1, le=50, description="Broj poslednjih transakcija"),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """Poslednjih N transakcija sa kategorijom."""
-    cache_key = f"dashboard:{current_user.id}:recent:{limit}"
-    cached = await cache_get(cache_key)
-    if cached:
-        return cached
-
-    result = await service.get_recent_transactions(db, current_user.id, limit)
-    data = [r.model_dump(mode="json") for r in result]
-    await cache_set(cache_key, data, DASHBOARD_CACHE_TTL)
-    return result
+    cache_key = await dashboard_cache_key(current_user.id, "recent", limit)
+
+    async def load(session: AsyncSession) -> bytes:
+        result = await service.get_recent_transactions(session, current_user.id, limit)
+        return _recent_json.dump_json(result)
+
+    return await _cached(db, cache_key, load)
@@ -1,4 +1,5 @@
 import datetime
+from enum import Enum
 from typing import Optional
 
 from pydantic import BaseModel, Field
@@ -18,6 +19,40 @@ class SummaryResponse(BaseModel):
     date_to: Optional[datetime.date]
 
 
+class BalancePoint(BaseModel):
+    date: datetime.date
+    income: float  # prihodi tog dana
+    expense: float  # rashodi tog dana
+    balance: float  # kumulativni bilans na kraju dana
+
+
+class BalanceSeriesResponse(BaseModel):
+    opening_balance: float  # bilans pre pocetka perioda
+    closing_balance: float
+    data: list[BalancePoint]
+
+
+class TrendGranularity(str, Enum):
+    week = "week"
+    month = "month"
+    quarter = "quarter"
+    year = "year"
+
+
+class TrendItem(BaseModel):
+    period: str  # "2026-W07", "2026-02", "2026-Q1", "2026"
+    start: datetime.date
+    end: datetime.date  # poslednji dan perioda
+    income: float
+    expense: float
+    balance: float
+
+
+class TrendResponse(BaseModel):
+    granularity: TrendGranularity
+    data: list[TrendItem]
+
+
 class MonthlyItem(BaseModel):
     month: str  # "2026-02"
     income: float
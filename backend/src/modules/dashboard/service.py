@@ -1,18 +1,135 @@
+import bisect
 import datetime
 from uuid import UUID
 
-from sqlalchemy import select, func, case, extract
+from sqlalchemy import select, func, literal, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config.models import Transaction, Category, TransactionType
+from src.config.models import DailyBalance, MonthlyRollup, Transaction, Category, CategoryClosure
 from src.modules.dashboard.schemas import (
+    BalancePoint,
+    BalanceSeriesResponse,
     SummaryResponse,
     MonthlyItem,
     MonthlyResponse,
     CategorySpending,
     ByCategoryResponse,
     RecentTransaction,
+    TrendGranularity,
+    TrendItem,
+    TrendResponse,
 )
+from src.modules.dashboard.periods import period_label, period_starts, shift_period
+from src.utils.errors import ValidationError
+
+
+def _split_period(
+    date_from: datetime.date | None, date_to: datetime.date | None
+) -> tuple[tuple[datetime.date | None, datetime.date | None] | None, list[tuple[datetime.date, datetime.date]]]:
+    """Deli period na cele mesece (monthly_rollups) i delimicne ivicne mesece (transakcije).
+
+    Vraca (prvi, poslednji) mesec za rollup deo — None ako celih meseci nema, a granica
+    None znaci otvoren kraj — i listu (od, do) opsega koji se citaju iz transakcija.
+    """
+    first, last = date_from, date_to
+    edges = []
+    if date_from and date_from.day != 1:
+        month_end = _month_end(date_from)
+        edges.append((date_from, min(month_end, date_to) if date_to else month_end))
+        first = month_end + datetime.timedelta(days=1)
+    if date_to and date_to != _month_end(date_to):
+        start = date_to.replace(day=1)
+        if not edges or start > edges[0][1]:
+            edges.append((max(start, date_from) if date_from else start, date_to))
+        last = start - datetime.timedelta(days=1)
+    if last:
+        last = last.replace(day=1)
+    if first and last and first > last:
+        return None, edges
+    return (first, last), edges
+
+
+def _month_end(day: datetime.date) -> datetime.date:
+    next_month = (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return next_month - datetime.timedelta(days=1)
+
+
+def _period_totals(
+    user_id: UUID,
+    date_from: datetime.date | None,
+    date_to: datetime.date | None,
+    *keys: str,
+    transaction_type: str | None = None,
+):
+    """Subquery (kljucevi..., total, tx_count) za period.
+
+    Celi meseci dolaze iz monthly_rollups (cena zavisi od broja meseci), a samo
+    delimicni meseci na ivicama perioda iz transakcija.
+    """
+    months, edges = _split_period(date_from, date_to)
+    parts = []
+    if months is not None:
+        first, last = months
+        part = select(
+            *(getattr(MonthlyRollup, key) for key in keys),
+            MonthlyRollup.total.label("total"),
+            MonthlyRollup.tx_count.label("tx_count"),
+        ).where(MonthlyRollup.user_id == user_id)
+        if first:
+            part = part.where(MonthlyRollup.month >= first)
+        if last:
+            part = part.where(MonthlyRollup.month <= last)
+        if transaction_type:
+            part = part.where(MonthlyRollup.type == transaction_type)
+        parts.append(part)
+    for start, end in edges:
+        part = select(
+            *(getattr(Transaction, key) for key in keys),
+            Transaction.amount.label("total"),
+            literal(1).label("tx_count"),
+        ).where(Transaction.user_id == user_id, Transaction.date >= start, Transaction.date <= end)
+        if transaction_type:
+            part = part.where(Transaction.type == transaction_type)
+        parts.append(part)
+    return union_all(*parts).subquery("period_totals")
+
+
+def _balance_at(user_id: UUID, day: datetime.date | None, marker: str):
+    """Kumulativne vrednosti zakljucno sa danom — jedan index seek po (user_id, day)."""
+    lookup = select(DailyBalance.cum_income, DailyBalance.cum_expense, DailyBalance.cum_count).where(
+        DailyBalance.user_id == user_id
+    )
+    if day is not None:
+        lookup = lookup.where(DailyBalance.day <= day)
+    lookup = lookup.order_by(DailyBalance.day.desc()).limit(1).subquery()
+    return select(literal(marker).label("marker"), lookup)
+
+
+def _check_range(date_from: datetime.date | None, date_to: datetime.date | None) -> None:
+    """Obrnut period bi kao razlika prefiksa dao negativne zbirove."""
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise ValidationError("date_from mora biti pre date_to")
+
+
+async def _prefix_difference(
+    db: AsyncSession, user_id: UUID, date_from: datetime.date | None, date_to: datetime.date | None
+) -> tuple[float, float, int]:
+    """(prihodi, rashodi, broj) za period kao razlika dve prefiksne sume iz daily_balances."""
+    _check_range(date_from, date_to)
+    lookups = [_balance_at(user_id, date_to, "end")]
+    if date_from is not None:
+        lookups.append(_balance_at(user_id, date_from - datetime.timedelta(days=1), "start"))
+    result = await db.execute(union_all(*lookups))
+    rows = {row.marker: row for row in result.all()}
+
+    def value(marker: str, field: str) -> float:
+        return float(getattr(rows[marker], field)) if marker in rows else 0.0
+
+    return (
+        value("end", "cum_income") - value("start", "cum_income"),
+        value("end", "cum_expense") - value("start", "cum_expense"),
+        int(value("end", "cum_count") - value("start", "cum_count")),
+    )
 
 
 async def get_summary(
@@ -21,79 +138,121 @@ async def get_summary(
     date_from: datetime.date | None = None,
     date_to: datetime.date | None = None,
 ) -> SummaryResponse:
-    """Ukupni prihodi, rashodi i bilans za period."""
-    query = select(
-        func.coalesce(
-            func.sum(case((Transaction.type == TransactionType.income, Transaction.amount), else_=0)), 0
-        ).label("total_income"),
-        func.coalesce(
-            func.sum(case((Transaction.type == TransactionType.expense, Transaction.amount), else_=0)), 0
-        ).label("total_expense"),
-        func.count(Transaction.id).label("transaction_count"),
-    ).where(Transaction.user_id == user_id)
-
-    if date_from:
-        query = query.where(Transaction.date >= date_from)
-    if date_to:
-        query = query.where(Transaction.date <= date_to)
-
-    result = await db.execute(query)
-    row = result.one()
-
-    income = float(row.total_income)
-    expense = float(row.total_expense)
+    """Ukupni prihodi, rashodi i bilans za period (dva lookup-a u daily_balances)."""
+    income, expense, count = await _prefix_difference(db, user_id, date_from, date_to)
 
     return SummaryResponse(
         total_income=income,
         total_expense=expense,
         balance=income - expense,
-        transaction_count=row.transaction_count,
+        transaction_count=count,
         date_from=date_from,
         date_to=date_to,
     )
 
 
-async def get_monthly_trends(
+async def get_balance_series(
     db: AsyncSession,
     user_id: UUID,
-    months: int = 6,
-) -> MonthlyResponse:
-    """Mesecni trend prihoda i rashoda za poslednjih N meseci."""
-    cutoff = datetime.date.today().replace(day=1) - datetime.timedelta(days=(months - 1) * 28)
-    cutoff = cutoff.replace(day=1)
+    date_from: datetime.date | None = None,
+    date_to: datetime.date | None = None,
+) -> BalanceSeriesResponse:
+    """Bilans na kraju svakog dana sa transakcijama u periodu (iz daily_balances)."""
+    _check_range(date_from, date_to)
+    opening = (0.0, 0.0)
+    if date_from is not None:
+        income, expense, _ = await _prefix_difference(db, user_id, None, date_from - datetime.timedelta(days=1))
+        opening = (income, expense)
 
-    query = (
-        select(
-            extract("year", Transaction.date).label("year"),
-            extract("month", Transaction.date).label("month"),
-            func.coalesce(
-                func.sum(case((Transaction.type == TransactionType.income, Transaction.amount), else_=0)), 0
-            ).label("income"),
-            func.coalesce(
-                func.sum(case((Transaction.type == TransactionType.expense, Transaction.amount), else_=0)), 0
-            ).label("expense"),
-        )
-        .where(Transaction.user_id == user_id, Transaction.date >= cutoff)
-        .group_by("year", "month")
-        .order_by("year", "month")
+    query = select(DailyBalance.day, DailyBalance.cum_income, DailyBalance.cum_expense, DailyBalance.cum_count).where(
+        DailyBalance.user_id == user_id
     )
-
-    result = await db.execute(query)
-    rows = result.all()
+    if date_from:
+        query = query.where(DailyBalance.day >= date_from)
+    if date_to:
+        query = query.where(DailyBalance.day <= date_to)
+    result = await db.execute(query.order_by(DailyBalance.day))
 
     data = []
-    for row in rows:
-        income = float(row.income)
-        expense = float(row.expense)
-        data.append(
-            MonthlyItem(
-                month=f"{int(row.year)}-{int(row.month):02d}",
-                income=income,
-                expense=expense,
-                balance=income - expense,
-            )
+    previous_income, previous_expense = opening
+    for row in result.all():
+        cum_income, cum_expense = float(row.cum_income), float(row.cum_expense)
+        income, expense = cum_income - previous_income, cum_expense - previous_expense
+        previous_income, previous_expense = cum_income, cum_expense
+        # Dan ostaje u indeksu i kad su mu sve transakcije obrisane
+        if income == 0 and expense == 0:
+            continue
+        data.append(BalancePoint(date=row.day, income=income, expense=expense, balance=cum_income - cum_expense))
+
+    opening_balance = opening[0] - opening[1]
+    return BalanceSeriesResponse(
+        opening_balance=opening_balance,
+        closing_balance=data[-1].balance if data else opening_balance,
+        data=data,
+    )
+
+
+async def get_trends(
+    db: AsyncSession,
+    user_id: UUID,
+    granularity: TrendGranularity = TrendGranularity.month,
+    periods: int = 6,
+    end: datetime.date | None = None,
+) -> TrendResponse:
+    """Prihodi i rashodi za poslednjih N kalendarskih perioda, ukljucujuci periode bez prometa.
+
+    Granice perioda se racunaju unapred, a iz daily_balances se cita samo opseg
+    prozora (range scan po primarnom kljucu) — ista putanja za sve granularnosti.
+    """
+    starts = period_starts(granularity, periods, end or datetime.date.today())
+    window_end = shift_period(starts[-1], granularity, 1)
+
+    opening_income, opening_expense, _ = await _prefix_difference(
+        db, user_id, None, starts[0] - datetime.timedelta(days=1)
+    )
+    result = await db.execute(
+        select(DailyBalance.day, DailyBalance.cum_income, DailyBalance.cum_expense)
+        .where(DailyBalance.user_id == user_id, DailyBalance.day >= starts[0], DailyBalance.day < window_end)
+        .order_by(DailyBalance.day)
+    )
+
+    income = [0.0] * len(starts)
+    expense = [0.0] * len(starts)
+    previous_income, previous_expense = opening_income, opening_expense
+    for row in result.all():
+        bucket = bisect.bisect_right(starts, row.day) - 1
+        cum_income, cum_expense = float(row.cum_income), float(row.cum_expense)
+        income[bucket] += cum_income - previous_income
+        expense[bucket] += cum_expense - previous_expense
+        previous_income, previous_expense = cum_income, cum_expense
+
+    bounds = starts + [window_end]
+    data = [
+        TrendItem(
+            period=period_label(bounds[i], granularity),
+            start=bounds[i],
+            end=bounds[i + 1] - datetime.timedelta(days=1),
+            income=income[i],
+            expense=expense[i],
+            balance=income[i] - expense[i],
         )
+        for i in range(len(starts))
+    ]
+    return TrendResponse(granularity=granularity, data=data)
 
+
+async def get_monthly_trends(
+    db: AsyncSession,
+    user_id: UUID,
+    months: int = 6,
+    end: datetime.date | None = None,
+) -> MonthlyResponse:
+    """Mesecni trend prihoda i rashoda za poslednjih N meseci (prazni meseci sa nulama)."""
+    trends = await get_trends(db, user_id, TrendGranularity.month, months, end)
+    data = [
+        MonthlyItem(month=item.period, income=item.income, expense=item.expense, balance=item.balance)
+        for item in trends.data
+    ]
     return MonthlyResponse(data=data, months_count=len(data))
 
 
@@ -103,27 +262,36 @@ async def get_by_category(
     transaction_type: str = "expense",
     date_from: datetime.date | None = None,
     date_to: datetime.date | None = None,
+    subtree: bool = False,
 ) -> ByCategoryResponse:
-    """Potrosnja po kategorijama sa procentima."""
-    query = (
-        select(
-            Category.id,
-            Category.name,
-            Category.icon,
-            func.coalesce(func.sum(Transaction.amount), 0).label("total"),
-            func.count(Transaction.id).label("tx_count"),
+    """Potrosnja po kategorijama sa procentima.
+
+    Sa `subtree` se prikazuju samo kategorije najviseg nivoa, svaka sa zbirom celog
+    podstabla — jedan join sa category_closure, bez rekurzivnog upita.
+    """
+    totals = _period_totals(user_id, date_from, date_to, "category_id", transaction_type=transaction_type)
+    total = func.sum(totals.c.total)
+    query = select(
+        Category.id,
+        Category.name,
+        Category.icon,
+        func.coalesce(total, 0).label("total"),
+        func.sum(totals.c.tx_count).label("tx_count"),
+    )
+    if subtree:
+        query = (
+            query.join(CategoryClosure, CategoryClosure.ancestor_id == Category.id)
+            .join(totals, totals.c.category_id == CategoryClosure.descendant_id)
+            .where(Category.user_id == user_id, Category.parent_id.is_(None))
         )
-        .join(Transaction, Transaction.category_id == Category.id)
-        .where(Transaction.user_id == user_id, Transaction.type == transaction_type)
+    else:
+        query = query.join(totals, totals.c.category_id == Category.id)
+    query = (
+        query.group_by(Category.id, Category.name, Category.icon)
+        .having(func.sum(totals.c.tx_count) > 0)
+        .order_by(total.desc())
     )
 
-    if date_from:
-        query = query.where(Transaction.date >= date_from)
-    if date_to:
-        query = query.where(Transaction.date <= date_to)
-
-    query = query.group_by(Category.id, Category.name, Category.icon).order_by(func.sum(Transaction.amount).desc())
-
     result = await db.execute(query)
     rows = result.all()
 
@@ -0,0 +1,74 @@
+"""Strimovani izvoz transakcija (CSV / NDJSON).
+
+Redovi se citaju kroz server-side kursor (`AsyncSession.stream` + yield_per)
+i kodiraju paket po paket, pa memorija ne zavisi od broja redova. Odgovor
+koristi sopstvenu sesiju: sesija iz `get_db` se zatvara pre nego sto se
+telo StreamingResponse-a posalje.
+"""
+
+import csv
+import io
+import json
+from typing import AsyncIterator
+from uuid import UUID
+
+from src.config import database
+from src.config.models import Transaction
+from src.modules.transactions.schemas import ExportFormat, TransactionFilters
+from src.modules.transactions.service import SORT_KEY, filtered_query
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    Transaction.id,
+    Transaction.date,
+    Transaction.type,
+    Transaction.amount,
+    Transaction.category_id,
+    Transaction.description,
+    Transaction.created_at,
+)
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+
+MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv; charset=utf-8",
+    ExportFormat.ndjson: "application/x-ndjson",
+}
+
+
+def _values(row) -> list:
+    return [
+        str(row.id), row.date.isoformat(), row.type.value, str(row.amount),
+        row.category_id, row.description, row.created_at.isoformat(),
+    ]
+
+
+def _encode_csv(rows, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(_values(row) for row in rows)
+    return buffer.getvalue().encode()
+
+
+def _encode_ndjson(rows) -> bytes:
+    return "".join(json.dumps(dict(zip(EXPORT_FIELDS, _values(row))), ensure_ascii=False) + "\n" for row in rows).encode()
+
+
+async def export_transactions(user_id: UUID, filters: TransactionFilters, fmt: ExportFormat) -> AsyncIterator[bytes]:
+    query = (
+        filtered_query(user_id, filters)
+        .with_only_columns(*EXPORT_COLUMNS)
+        .order_by(*(col.desc() for col in SORT_KEY))
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    if fmt == ExportFormat.csv:
+        # Zaglavlje ide odmah, i za prazan izvoz
+        yield _encode_csv([], header=True)
+
+    async with database.async_session() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            yield _encode_csv(rows, header=False) if fmt == ExportFormat.csv else _encode_ndjson(rows)
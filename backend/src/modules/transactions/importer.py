@@ -0,0 +1,409 @@
+"""Uvoz bankovnih izvoda (CSV/OFX) kao pozadinski posao.
+
+Telo zahteva se strimuje u privremeni fajl (uz limit velicine), a zatim ga
+pozadinski task parsira inkrementalno i upisuje u paketima od
+IMPORT_CHUNK_SIZE redova — u memoriji je uvek samo jedan paket, bez obzira
+na velicinu fajla. Na PostgreSQL-u paketi idu kroz asyncpg COPY, na SQLite-u
+kroz executemany INSERT.
+
+Deduplikacija: svaki red dobija `import_hash` (sha256 sadrzaja ili FITID-a i
+rednog broja ponavljanja tog sadrzaja u fajlu); redovi ciji hash vec postoji
+kod korisnika se preskacu (unique indeks + ON CONFLICT DO NOTHING), pa je
+ponovni uvoz istog izvoda bezbedan.
+"""
+
+import asyncio
+import csv
+import datetime
+import hashlib
+import os
+import re
+import tempfile
+import uuid
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import AsyncIterator, Iterator
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import database
+from src.config.models import Category, ImportJob, ImportJobStatus, Transaction, TransactionType
+from src.config.settings import settings
+from src.modules.budgets.alerts import commit_with_alerts
+from src.modules.transactions.schemas import ImportFormat
+from src.utils.cache import invalidate_user_dashboard
+from src.utils.errors import NotFoundError, ValidationError
+from src.utils.logger import logger
+from src.utils.sql import dialect_insert, ignore_conflicts
+
+# Koliko gresaka po redu se cuva na poslu (ostale se samo broje)
+MAX_JOB_ERRORS = 20
+
+STAGE_TABLE = "transactions_import_stage"
+
+COPY_COLUMNS = ("id", "user_id", "category_id", "amount", "type", "description", "date", "created_at", "import_hash")
+
+CSV_DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y", "%Y/%m/%d")
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+_OFX_READ_SIZE = 64 * 1024
+# Tekst izmedju dva taga duzi od ovoga nije OFX — bafer inace raste bez granice
+OFX_MAX_BUFFER = 1024 * 1024
+
+# Reference na pokrenute poslove da ih GC ne pokupi pre zavrsetka
+_running_jobs: set[asyncio.Task] = set()
+
+
+class RowError(Exception):
+    pass
+
+
+# ── Upload ───────────────────────────────────────────────────────────
+async def spool_upload(stream: AsyncIterator[bytes]) -> tuple[str, int]:
+    """Upisuje telo zahteva u privremeni fajl deo po deo; vraca (putanja, velicina)."""
+    fd, path = tempfile.mkstemp(prefix="fintracker-import-")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            async for chunk in stream:
+                size += len(chunk)
+                if size > settings.IMPORT_MAX_BYTES:
+                    raise ValidationError(f"Import file exceeds {settings.IMPORT_MAX_BYTES} bytes")
+                fh.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    if size == 0:
+        os.unlink(path)
+        raise ValidationError("Import file is empty")
+    return path, size
+
+
+async def start_import(
+    db: AsyncSession,
+    user_id: UUID,
+    stream: AsyncIterator[bytes],
+    fmt: ImportFormat,
+    default_category_id: int | None,
+) -> ImportJob:
+    if default_category_id is not None:
+        owned = await db.execute(
+            select(Category.id).where(Category.id == default_category_id, Category.user_id == user_id)
+        )
+        if owned.scalar_one_or_none() is None:
+            raise NotFoundError("Category")
+
+    path, size = await spool_upload(stream)
+    job = ImportJob(user_id=user_id, format=fmt.value, status=ImportJobStatus.pending, bytes_total=size, errors=[])
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    task = asyncio.create_task(run_import(job.id, user_id, path, fmt, default_category_id))
+    _running_jobs.add(task)
+    task.add_done_callback(_running_jobs.discard)
+    return job
+
+
+async def get_import_job(db: AsyncSession, user_id: UUID, job_id: UUID) -> ImportJob:
+    query = (
+        select(ImportJob)
+        .where(ImportJob.id == job_id, ImportJob.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )
+    job = (await db.execute(query)).scalar_one_or_none()
+    if not job:
+        raise NotFoundError("Import job")
+    return job
+
+
+# ── Parsiranje ───────────────────────────────────────────────────────
+def _parse_amount(raw: str) -> Decimal:
+    """Iznos u formatu "1234.56", "1,234.56", "1.234,56" ili "1234,56".
+
+    Kada postoje oba separatora, decimalni je onaj koji je poslednji. Jedan
+    separator koji se ponavlja je separator hiljada. Jedan separator sa tacno
+    tri cifre posle ("1.234", "1,234") je dvosmislen i red se odbija.
+    """
+    value = raw.strip().replace(" ", "").replace("\u00a0", "").replace("'", "")
+    comma, dot = value.rfind(","), value.rfind(".")
+    if comma != -1 and dot != -1:
+        thousands, decimal = (".", ",") if comma > dot else (",", ".")
+        if value.count(decimal) > 1:
+            raise RowError(f"invalid amount '{raw}'")
+        value = value.replace(thousands, "").replace(decimal, ".")
+    elif comma != -1 or dot != -1:
+        separator = "," if comma != -1 else "."
+        if value.count(separator) > 1:
+            value = value.replace(separator, "")
+        elif len(value) - value.index(separator) - 1 == 3:
+            raise RowError(f"ambiguous amount '{raw}' (decimal or thousands separator?)")
+        else:
+            value = value.replace(separator, ".")
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise RowError(f"invalid amount '{raw}'")
+
+
+def _parse_date(raw: str) -> datetime.date:
+    value = raw.strip()
+    for fmt in CSV_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise RowError(f"invalid date '{raw}'")
+
+
+def _iter_csv(fh) -> Iterator[dict]:
+    reader = csv.DictReader(fh)
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    for row in reader:
+        yield {key: (value or "").strip() for key, value in row.items() if key}
+
+
+def _iter_ofx(fh) -> Iterator[dict]:
+    """Inkrementalno cita <STMTTRN> blokove (SGML i XML varijanta OFX-a)."""
+    current: dict | None = None
+    buffer = ""
+    while True:
+        block = fh.read(_OFX_READ_SIZE)
+        buffer += block
+        if block:
+            # Poslednji tag moze biti presecen — ostaje u baferu za sledeci krug
+            cut = buffer.rfind("<")
+            if cut <= 0:
+                if len(buffer) > OFX_MAX_BUFFER:
+                    raise ValidationError(f"OFX: more than {OFX_MAX_BUFFER} bytes without a tag")
+                continue
+            text, buffer = buffer[:cut], buffer[cut:]
+        else:
+            text, buffer = buffer, ""
+
+        for closing, tag, value in _OFX_TAG.findall(text):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and current is not None:
+                    yield current
+                    current = None
+                elif not closing:
+                    current = {}
+            elif current is not None and not closing and value.strip():
+                current[tag.lower()] = value.strip()
+
+        if not block:
+            return
+
+
+def _content_digest(*parts) -> bytes:
+    return hashlib.sha256("|".join(str(part) for part in parts).encode()).digest()
+
+
+class RowMapper:
+    """Pretvara sirov red (CSV ili OFX) u vrednosti za Transaction."""
+
+    def __init__(self, fmt: ImportFormat, categories: list[Category], default_category_id: int | None):
+        self.fmt = fmt
+        self.default_category_id = default_category_id
+        self.category_ids = {category.id for category in categories}
+        self.by_name = {(category.name.lower(), category.type.value): category.id for category in categories}
+        # Koliko puta se isti sadrzaj vec pojavio u fajlu. Memorija raste sa brojem
+        # razlicitih redova, a ogranicena je sa IMPORT_MAX_BYTES.
+        self._occurrences: dict[bytes, int] = {}
+
+    def map(self, raw: dict) -> dict:
+        if self.fmt == ImportFormat.ofx:
+            return self._map_ofx(raw)
+        return self._map_csv(raw)
+
+    def _resolve_category(self, raw: dict, tx_type: str) -> int:
+        if raw.get("category_id"):
+            try:
+                category_id = int(raw["category_id"])
+            except ValueError:
+                raise RowError(f"invalid category_id '{raw['category_id']}'")
+            if category_id in self.category_ids:
+                return category_id
+        elif raw.get("category"):
+            category_id = self.by_name.get((raw["category"].lower(), tx_type))
+            if category_id is not None:
+                return category_id
+        if self.default_category_id is None:
+            raise RowError("category not found")
+        return self.default_category_id
+
+    def _build(self, raw: dict, amount: Decimal, day: datetime.date, description: str | None, reference: str) -> dict:
+        tx_type = raw.get("type", "").lower() or (TransactionType.expense.value if amount < 0 else TransactionType.income.value)
+        if tx_type not in (TransactionType.income.value, TransactionType.expense.value):
+            raise RowError(f"invalid type '{raw['type']}'")
+        amount = abs(amount).quantize(Decimal("0.01"))
+        if amount == 0:
+            raise RowError("amount must be non-zero")
+        return {
+            "category_id": self._resolve_category(raw, tx_type),
+            "amount": amount,
+            "type": tx_type,
+            "description": description or None,
+            "date": day,
+            "import_hash": self._import_hash(reference, day, amount, tx_type, description),
+        }
+
+    def _import_hash(self, reference: str, day: datetime.date, amount: Decimal, tx_type: str, description: str | None) -> str:
+        """Hash sadrzaja + redni broj ponavljanja tog sadrzaja u fajlu.
+
+        Dva identicna reda (npr. dve kafe istog dana) dobijaju razlicite hash-eve,
+        a ponovni uvoz istog fajla daje iste — pa se samo on preskace.
+        """
+        digest = _content_digest(self.fmt.value, reference, day.isoformat(), amount, tx_type, description or "")
+        occurrence = self._occurrences.get(digest, 0) + 1
+        self._occurrences[digest] = occurrence
+        return hashlib.sha256(digest + occurrence.to_bytes(4, "big")).hexdigest()
+
+    def _map_csv(self, raw: dict) -> dict:
+        if not raw.get("date") or not raw.get("amount"):
+            raise RowError("date and amount are required")
+        # Referenca banke (ako postoji) razlikuje inace identicne redove
+        reference = raw.get("id") or raw.get("reference") or ""
+        return self._build(raw, _parse_amount(raw["amount"]), _parse_date(raw["date"]), raw.get("description"), reference)
+
+    def _map_ofx(self, raw: dict) -> dict:
+        if not raw.get("dtposted") or not raw.get("trnamt"):
+            raise RowError("DTPOSTED and TRNAMT are required")
+        try:
+            day = datetime.datetime.strptime(raw["dtposted"][:8], "%Y%m%d").date()
+        except ValueError:
+            raise RowError(f"invalid DTPOSTED '{raw['dtposted']}'")
+        description = " - ".join(part for part in (raw.get("name"), raw.get("memo")) if part)
+        return self._build({}, _parse_amount(raw["trnamt"]), day, description, raw.get("fitid", ""))
+
+
+# ── Upis ─────────────────────────────────────────────────────────────
+async def _existing_hashes(db: AsyncSession, user_id: UUID, hashes: set[str]) -> set[str]:
+    if not hashes:
+        return set()
+    result = await db.execute(
+        select(Transaction.import_hash).where(Transaction.user_id == user_id, Transaction.import_hash.in_(hashes))
+    )
+    return set(result.scalars().all())
+
+
+async def _insert_rows(db: AsyncSession, rows: list[dict]) -> int:
+    """Upisuje paket i vraca broj upisanih redova.
+
+    Unique indeks (user_id, import_hash) + ON CONFLICT DO NOTHING pokriva i dva
+    istovremena uvoza istog fajla — drugi jednostavno ne upise nista.
+    """
+    if db.bind.dialect.name == "postgresql":
+        # COPY ne podrzava ON CONFLICT: paket ide u privremenu tabelu, pa odatle u transactions
+        connection = await db.connection()
+        await connection.exec_driver_sql(
+            f"CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} "
+            f"(LIKE {Transaction.__tablename__} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            STAGE_TABLE,
+            columns=COPY_COLUMNS,
+            records=[tuple(row[column] for column in COPY_COLUMNS) for row in rows],
+        )
+        columns = ", ".join(COPY_COLUMNS)
+        result = await connection.exec_driver_sql(
+            f"INSERT INTO {Transaction.__tablename__} ({columns}) SELECT {columns} FROM {STAGE_TABLE} "
+            f"ON CONFLICT (user_id, import_hash) DO NOTHING"
+        )
+        return result.rowcount
+
+    result = await db.execute(
+        ignore_conflicts(dialect_insert(db, Transaction.__table__), ["user_id", "import_hash"]), rows
+    )
+    return result.rowcount
+
+
+async def _import_chunk(
+    db: AsyncSession, job: ImportJob, mapper: RowMapper, batch: list[tuple[int, dict]]
+) -> set[tuple[datetime.date, int]]:
+    """Upisuje paket u jednoj transakciji; vraca (datum, kategorija) novih redova za proveru budzeta."""
+    rows: list[dict] = []
+    for line, raw in batch:
+        try:
+            rows.append(mapper.map(raw))
+        except RowError as exc:
+            job.rows_failed += 1
+            if len(job.errors) < MAX_JOB_ERRORS:
+                job.errors = job.errors + [f"row {line}: {exc}"]
+
+    # Vec uvezeni hash-evi se odbacuju pre upisa; ON CONFLICT hvata samo trku dva uvoza
+    existing = await _existing_hashes(db, job.user_id, {row["import_hash"] for row in rows})
+    created_at = datetime.datetime.utcnow()
+    new_rows = [
+        {**row, "id": uuid.uuid4(), "user_id": job.user_id, "created_at": created_at}
+        for row in rows
+        if row["import_hash"] not in existing
+    ]
+
+    inserted = await _insert_rows(db, new_rows) if new_rows else 0
+    job.rows_imported += inserted
+    job.rows_duplicate += len(rows) - inserted
+    job.rows_processed += len(batch)
+
+    # Napredak se upisuje u istoj transakciji kao i paket
+    await db.execute(
+        update(ImportJob).where(ImportJob.id == job.id).values(
+            status=ImportJobStatus.running,
+            rows_processed=job.rows_processed,
+            rows_imported=job.rows_imported,
+            rows_duplicate=job.rows_duplicate,
+            rows_failed=job.rows_failed,
+            errors=job.errors,
+        )
+    )
+    await db.commit()
+    return {(row["date"], row["category_id"]) for row in new_rows}
+
+
+async def run_import(
+    job_id: UUID, user_id: UUID, path: str, fmt: ImportFormat, default_category_id: int | None
+) -> None:
+    imported = 0
+    touched: set[tuple[datetime.date, int]] = set()
+    try:
+        async with database.async_session() as db:
+            job = (await db.execute(select(ImportJob).where(ImportJob.id == job_id))).scalar_one()
+            db.expunge(job)
+            try:
+                categories = (await db.execute(select(Category).where(Category.user_id == user_id))).scalars().all()
+                mapper = RowMapper(fmt, list(categories), default_category_id)
+                with open(path, encoding="utf-8-sig", errors="replace", newline="") as fh:
+                    rows = enumerate(_iter_ofx(fh) if fmt == ImportFormat.ofx else _iter_csv(fh), start=1)
+                    while True:
+                        # Parsiranje paketa ide u thread da ne blokira event loop
+                        batch = await asyncio.to_thread(lambda: list(islice(rows, settings.IMPORT_CHUNK_SIZE)))
+                        if not batch:
+                            break
+                        touched |= await _import_chunk(db, job, mapper, batch)
+                status, errors = ImportJobStatus.completed, job.errors
+            except Exception as exc:
+                logger.exception(f"Import {job_id} nije uspeo")
+                await db.rollback()
+                status, errors = ImportJobStatus.failed, (job.errors + [f"import failed: {exc}"])[-MAX_JOB_ERRORS:]
+
+            await db.execute(
+                update(ImportJob).where(ImportJob.id == job_id).values(
+                    status=status, errors=errors, finished_at=datetime.datetime.utcnow(),
+                )
+            )
+            imported = job.rows_imported
+            if imported:
+                # Pragovi se proveravaju jednom, zajedno sa zavrsnim statusom posla
+                await commit_with_alerts(db, user_id, [day for day, _ in touched], [category for _, category in touched])
+            else:
+                await db.commit()
+    finally:
+        os.unlink(path)
+
+    if imported:
+        await invalidate_user_dashboard(str(user_id))
@@ -1,20 +1,34 @@
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config.database import get_db
-from src.config.models import User
+from src.modules.auth.principal import CurrentUser
 from src.middleware.auth import get_current_user
 from src.modules.transactions.schemas import (
+    AffectedRowsResponse,
+    ExportFormat,
+    ImportFormat,
+    ImportJobResponse,
+    TransactionBulkCreate,
+    TransactionBulkDelete,
+    TransactionBulkResponse,
+    TransactionBulkUpdate,
     TransactionCreate,
+    TransactionCursorPage,
+    TransactionPage,
     TransactionUpdate,
     TransactionResponse,
     TransactionFilters,
+    TransactionSearchResponse,
     TransactionType,
+    PaginationMode,
+    TotalMode,
 )
-from src.modules.transactions import service
+from src.modules.transactions import exporter, importer, service
 from src.utils.cache import invalidate_user_dashboard
 
 router = APIRouter(prefix="/api/transactions", tags=["transactions"])
@@ -23,7 +37,7 @@ router = APIRouter(prefix="/api/transactions", tags=["transactions"])
 @router.post("/", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
     data: TransactionCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     result = await service.create_transaction(db, current_user.id, data)
@@ -31,29 +45,141 @@ async def create_transaction(
     return result
 
 
-@router.get("/")
+@router.post("/bulk", response_model=TransactionBulkResponse)
+async def create_transactions_bulk(
+    data: TransactionBulkCreate,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Upis do 1000 transakcija odjednom — rezultat po stavci, jedna invalidacija keša."""
+    result = await service.create_transactions_bulk(db, current_user.id, data.items)
+    if result.created:
+        await invalidate_user_dashboard(str(current_user.id))
+    return result
+
+
+@router.post("/import", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def start_import(
+    request: Request,
+    format: ImportFormat = Query(ImportFormat.csv, description="csv ili ofx"),
+    default_category_id: Optional[int] = Query(None, description="Kategorija za redove bez poznate kategorije"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Telo zahteva je sirov CSV/OFX fajl; uvoz radi u pozadini, napredak preko GET /import/{id}."""
+    return await importer.start_import(db, current_user.id, request.stream(), format, default_category_id)
+
+
+@router.get("/import/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(
+    job_id: UUID,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    return await importer.get_import_job(db, current_user.id, job_id)
+
+
+@router.get("/", response_model=TransactionPage | TransactionCursorPage)
 async def list_transactions(
+    request: Request,
     type: Optional[TransactionType] = None,
     category_id: Optional[int] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
+    pagination: PaginationMode = Query(PaginationMode.offset, description="offset ili cursor (keyset)"),
+    cursor: Optional[str] = Query(None, description="Token iz next_cursor/prev_cursor"),
+    include_total: bool = Query(True, description="false = bez brojanja (infinite scroll)"),
+    total_mode: TotalMode = Query(TotalMode.exact, description="exact ili estimated"),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     filters = TransactionFilters(
         type=type, category_id=category_id,
         date_from=date_from, date_to=date_to,
         page=page, per_page=per_page,
+        pagination=PaginationMode.cursor if cursor else pagination, cursor=cursor,
+        include_total=include_total, total_mode=total_mode,
+    )
+    result = await service.get_transactions(db, current_user.id, filters)
+
+    if filters.pagination == PaginationMode.cursor:
+        url = request.url.remove_query_params("page")
+        result["links"] = {
+            "next": str(url.include_query_params(cursor=result["next_cursor"])) if result["next_cursor"] else None,
+            "prev": str(url.include_query_params(cursor=result["prev_cursor"])) if result["prev_cursor"] else None,
+        }
+        page = TransactionCursorPage.model_validate(result, from_attributes=True)
+    else:
+        page = TransactionPage.model_validate(result, from_attributes=True)
+    # Redovi su vec projektovani na kolone odgovora — serijalizacija ide direktno u JSON bajtove
+    return Response(content=page.model_dump_json(), media_type="application/json")
+
+
+@router.patch("/", response_model=AffectedRowsResponse)
+async def update_transactions(
+    data: TransactionBulkUpdate,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Izmena svih transakcija koje odgovaraju predikatu — jedan UPDATE, jedna invalidacija keša."""
+    affected = await service.update_transactions_where(db, current_user.id, data.where, data.changes)
+    if affected:
+        await invalidate_user_dashboard(str(current_user.id))
+    return AffectedRowsResponse(affected=affected)
+
+
+@router.delete("/", response_model=AffectedRowsResponse)
+async def delete_transactions(
+    data: TransactionBulkDelete,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Brisanje svih transakcija koje odgovaraju predikatu — jedan DELETE, jedna invalidacija keša."""
+    affected = await service.delete_transactions_where(db, current_user.id, data.where)
+    if affected:
+        await invalidate_user_dashboard(str(current_user.id))
+    return AffectedRowsResponse(affected=affected)
+
+
+@router.get("/export")
+async def export_transactions(
+    format: ExportFormat = Query(ExportFormat.csv, description="csv ili ndjson"),
+    type: Optional[TransactionType] = None,
+    category_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Svi redovi koji odgovaraju filterima, strimovano — bez paginacije i brojanja."""
+    filters = TransactionFilters(type=type, category_id=category_id, date_from=date_from, date_to=date_to)
+    return StreamingResponse(
+        exporter.export_transactions(current_user.id, filters, format),
+        media_type=exporter.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format.value}"'},
     )
-    return await service.get_transactions(db, current_user.id, filters)
+
+
+@router.get("/search", response_model=TransactionSearchResponse)
+async def search_transactions(
+    q: str = Query(..., min_length=2, max_length=200),
+    type: Optional[TransactionType] = None,
+    category_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    filters = TransactionFilters(type=type, category_id=category_id, date_from=date_from, date_to=date_to)
+    return await service.search_transactions(db, current_user.id, q, filters, limit)
 
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
     transaction_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     return await service.get_transaction_by_id(db, current_user.id, transaction_id)
@@ -63,7 +189,7 @@ async def get_transaction(
 async def update_transaction(
     transaction_id: UUID,
     data: TransactionUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     result = await service.update_transaction(db, current_user.id, transaction_id, data)
@@ -74,7 +200,7 @@ async def update_transaction(
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_transaction(
     transaction_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     await service.delete_transaction(db, current_user.id, transaction_id)
@@ -1,9 +1,9 @@
 import datetime
 from enum import Enum
-from typing import Optional
+from typing import Any, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class TransactionType(str, Enum):
@@ -26,6 +26,54 @@ class TransactionUpdate(BaseModel):
     description: Optional[str] = Field(None, max_length=500)
     date: Optional[datetime.date] = None
 
+    @model_validator(mode="after")
+    def _reject_nulls(self) -> "TransactionUpdate":
+        # Izostavljeno polje se ne menja; eksplicitan null bi upisao NULL u NOT NULL kolonu
+        nulls = [name for name in self.model_fields_set if name != "description" and getattr(self, name) is None]
+        if nulls:
+            raise ValueError(f"{', '.join(sorted(nulls))} cannot be null")
+        return self
+
+
+class TransactionSelector(BaseModel):
+    """Predikat za set-based izmene: filteri kao u listi + opciona lista ID-jeva."""
+    ids: Optional[list[UUID]] = Field(None, min_length=1, max_length=1000)
+    type: Optional[TransactionType] = None
+    category_id: Optional[int] = None
+    date_from: Optional[datetime.date] = None
+    date_to: Optional[datetime.date] = None
+
+
+class TransactionBulkUpdate(BaseModel):
+    where: TransactionSelector
+    changes: TransactionUpdate
+
+
+class TransactionBulkDelete(BaseModel):
+    where: TransactionSelector
+
+
+class AffectedRowsResponse(BaseModel):
+    affected: int
+
+
+class TransactionBulkCreate(BaseModel):
+    # Stavke se validiraju pojedinacno, da bi greska u jednoj bila prijavljena samo za nju
+    items: list[dict[str, Any]] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: str  # "created" | "error"
+    id: Optional[UUID] = None
+    error: Optional[str] = None
+
+
+class TransactionBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[BulkItemResult]
+
 
 class TransactionResponse(BaseModel):
     id: UUID
@@ -40,6 +88,49 @@ class TransactionResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class TransactionPage(BaseModel):
+    data: list[TransactionResponse]
+    total: Optional[int]
+    total_is_estimate: bool
+    page: int
+    per_page: int
+    total_pages: Optional[int]
+
+
+class PageLinks(BaseModel):
+    next: Optional[str]
+    prev: Optional[str]
+
+
+class TransactionCursorPage(BaseModel):
+    data: list[TransactionResponse]
+    per_page: int
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+    links: PageLinks
+
+
+class TransactionSearchResult(TransactionResponse):
+    # Relevantnost (PostgreSQL); None na bazama bez rangiranja
+    rank: Optional[float] = None
+
+
+class TransactionSearchResponse(BaseModel):
+    data: list[TransactionSearchResult]
+    query: str
+    ranked: bool
+
+
+class PaginationMode(str, Enum):
+    offset = "offset"
+    cursor = "cursor"
+
+
+class TotalMode(str, Enum):
+    exact = "exact"
+    estimated = "estimated"
+
+
 class TransactionFilters(BaseModel):
     type: Optional[TransactionType] = None
     category_id: Optional[int] = None
@@ -47,3 +138,33 @@ class TransactionFilters(BaseModel):
     date_to: Optional[datetime.date] = None
     page: int = Field(1, ge=1)
     per_page: int = Field(20, ge=1, le=100)
+    pagination: PaginationMode = PaginationMode.offset
+    cursor: Optional[str] = None
+    include_total: bool = True
+    total_mode: TotalMode = TotalMode.exact
+
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ofx = "ofx"
+
+
+class ImportJobResponse(BaseModel):
+    id: UUID
+    format: str
+    status: str
+    bytes_total: int
+    rows_processed: int
+    rows_imported: int
+    rows_duplicate: int
+    rows_failed: int
+    errors: list[str]
+    created_at: datetime.datetime
+    finished_at: Optional[datetime.datetime]
+
+    model_config = {"from_attributes": True}
@@ -1,58 +1,301 @@
+import datetime
+import json
+import re
+import uuid
+from typing import Any
 from uuid import UUID
 
-from sqlalchemy import select, func
+from pydantic import ValidationError as PydanticValidationError
+from sqlalchemy import Row, delete, insert, literal, literal_column, or_, select, func, text, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config.models import Transaction
-from src.modules.transactions.schemas import TransactionCreate, TransactionUpdate, TransactionFilters
-from src.utils.errors import NotFoundError
+from src.config.models import SEARCH_CONFIG, SEARCH_VECTOR_SQL, Category, Transaction
+from src.modules.budgets.alerts import commit_with_alerts
+from src.modules.transactions.schemas import (
+    BulkItemResult,
+    PaginationMode,
+    TotalMode,
+    TransactionBulkResponse,
+    TransactionCreate,
+    TransactionSearchResponse,
+    TransactionSearchResult,
+    TransactionSelector,
+    TransactionUpdate,
+    TransactionFilters,
+)
+from src.utils.cache import cache_get, cache_set, versioned_key
+from src.utils.errors import NotFoundError, ValidationError
+from src.utils.pagination import decode_cursor, encode_cursor
+from src.utils.sql import month_start
 
+# Stabilan redosled liste: najnovije prvo, id razbija izjednacenja
+SORT_KEY = (Transaction.date, Transaction.created_at, Transaction.id)
 
-async def create_transaction(db: AsyncSession, user_id: UUID, data: TransactionCreate) -> Transaction:
-    transaction = Transaction(
-        user_id=user_id,
-        category_id=data.category_id,
-        amount=data.amount,
-        type=data.type.value,
-        description=data.description,
-        date=data.date,
+# Kolone liste — redovi se serijalizuju direktno, bez ORM hidratacije
+LIST_COLUMNS = (
+    Transaction.id,
+    Transaction.user_id,
+    Transaction.category_id,
+    Transaction.amount,
+    Transaction.type,
+    Transaction.description,
+    Transaction.date,
+    Transaction.created_at,
+)
+
+# Pretraga: najvise ovoliko reci iz upita ulazi u tsquery / LIKE uslove
+SEARCH_MAX_TERMS = 8
+
+# Ukupan broj po (korisnik, filter) — kljuc nosi generaciju, pa ga svaki upis invalidira
+COUNT_CACHE_TTL = 300
+
+
+async def create_transaction(db: AsyncSession, user_id: UUID, data: TransactionCreate) -> Row:
+    """Jedan INSERT ... RETURNING — bez refresh-a posle commit-a."""
+    stmt = (
+        insert(Transaction)
+        .values(
+            user_id=user_id,
+            category_id=data.category_id,
+            amount=data.amount,
+            type=data.type.value,
+            description=data.description,
+            date=data.date,
+        )
+        .returning(*LIST_COLUMNS)
     )
-    db.add(transaction)
-    await db.commit()
-    await db.refresh(transaction)
+    transaction = (await db.execute(stmt)).one()
+    await commit_with_alerts(db, user_id, [transaction.date], [transaction.category_id])
     return transaction
 
 
-async def get_transactions(db: AsyncSession, user_id: UUID, filters: TransactionFilters) -> dict:
-    query = select(Transaction).where(Transaction.user_id == user_id)
+def _filter_conditions(user_id: UUID, filters: TransactionFilters | TransactionSelector) -> list:
+    conditions = [Transaction.user_id == user_id]
 
     if filters.type:
-        query = query.where(Transaction.type == filters.type.value)
+        conditions.append(Transaction.type == filters.type.value)
     if filters.category_id:
-        query = query.where(Transaction.category_id == filters.category_id)
+        conditions.append(Transaction.category_id == filters.category_id)
     if filters.date_from:
-        query = query.where(Transaction.date >= filters.date_from)
+        conditions.append(Transaction.date >= filters.date_from)
     if filters.date_to:
-        query = query.where(Transaction.date <= filters.date_to)
+        conditions.append(Transaction.date <= filters.date_to)
+    return conditions
 
-    count_query = select(func.count()).select_from(query.subquery())
-    total = (await db.execute(count_query)).scalar()
+
+def filtered_query(user_id: UUID, filters: TransactionFilters):
+    """SELECT transakcija korisnika sa filterima iz liste (zajednicko za listu, pretragu i izvoz)."""
+    return select(Transaction).where(*_filter_conditions(user_id, filters))
+
+
+async def create_transactions_bulk(
+    db: AsyncSession, user_id: UUID, items: list[dict[str, Any]]
+) -> TransactionBulkResponse:
+    """Validira i upisuje vise transakcija jednim multi-row INSERT-om i jednim commit-om."""
+    results: list[BulkItemResult] = []
+    valid: list[tuple[int, TransactionCreate]] = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, TransactionCreate.model_validate(item)))
+        except PydanticValidationError as exc:
+            error = exc.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            results.append(BulkItemResult(index=index, status="error", error=f"{field}: {error['msg']}"))
+
+    # Vlasnistvo nad kategorijama — jedan upit za ceo batch
+    category_ids = {data.category_id for _, data in valid}
+    owned = set()
+    if category_ids:
+        owned = set((await db.execute(
+            select(Category.id).where(Category.user_id == user_id, Category.id.in_(category_ids))
+        )).scalars().all())
+
+    rows = []
+    created_at = datetime.datetime.utcnow()
+    for index, data in valid:
+        if data.category_id not in owned:
+            results.append(BulkItemResult(index=index, status="error", error="Category not found"))
+            continue
+        tx_id = uuid.uuid4()
+        rows.append({
+            "id": tx_id,
+            "user_id": user_id,
+            "category_id": data.category_id,
+            "amount": data.amount,
+            "type": data.type.value,
+            "description": data.description,
+            "date": data.date,
+            "created_at": created_at,
+        })
+        results.append(BulkItemResult(index=index, status="created", id=tx_id))
+
+    if rows:
+        await db.execute(insert(Transaction), rows)
+        await commit_with_alerts(db, user_id, [row["date"] for row in rows], [row["category_id"] for row in rows])
+
+    results.sort(key=lambda r: r.index)
+    return TransactionBulkResponse(created=len(rows), failed=len(results) - len(rows), results=results)
+
+
+async def get_transactions(db: AsyncSession, user_id: UUID, filters: TransactionFilters) -> dict:
+    if filters.pagination == PaginationMode.cursor:
+        return await _get_transactions_keyset(db, user_id, filters)
+
+    query = filtered_query(user_id, filters)
+
+    total, total_is_estimate = None, False
+    if filters.include_total:
+        total, total_is_estimate = await _count_transactions(db, user_id, filters, query)
 
     offset = (filters.page - 1) * filters.per_page
-    query = query.order_by(Transaction.date.desc()).offset(offset).limit(filters.per_page)
+    query = (
+        query.with_only_columns(*LIST_COLUMNS)
+        .order_by(*(col.desc() for col in SORT_KEY))
+        .offset(offset)
+        .limit(filters.per_page)
+    )
 
     result = await db.execute(query)
-    transactions = result.scalars().all()
+    transactions = result.all()
 
     return {
         "data": transactions,
         "total": total,
+        "total_is_estimate": total_is_estimate,
         "page": filters.page,
         "per_page": filters.per_page,
-        "total_pages": (total + filters.per_page - 1) // filters.per_page if total else 0,
+        "total_pages": None if total is None else (total + filters.per_page - 1) // filters.per_page,
     }
 
 
+async def _count_transactions(
+    db: AsyncSession, user_id: UUID, filters: TransactionFilters, query
+) -> tuple[int, bool]:
+    """Vraca (ukupno, da_li_je_procena).
+
+    Tacan broj se kešira po filteru; u "estimated" modu, bez keša, na PostgreSQL-u
+    se koristi procena planera umesto COUNT(*).
+    """
+    cache_key = await versioned_key(
+        "tx-count", str(user_id), filters.type and filters.type.value,
+        filters.category_id, filters.date_from, filters.date_to,
+    )
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        return cached, False
+
+    if filters.total_mode == TotalMode.estimated and db.bind.dialect.name == "postgresql":
+        return await _estimate_count(db, query), True
+
+    count_query = query.with_only_columns(func.count()).order_by(None)
+    total = (await db.execute(count_query)).scalar()
+    await cache_set(cache_key, total, COUNT_CACHE_TTL)
+    return total, False
+
+
+async def _estimate_count(db: AsyncSession, query) -> int:
+    """Broj redova koji procenjuje planer (EXPLAIN) — bez skeniranja tabele."""
+    compiled = query.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _cursor_values(transaction) -> list:
+    return [transaction.date.isoformat(), transaction.created_at.isoformat(), str(transaction.id)]
+
+
+def _parse_cursor(token: str) -> tuple[tuple, str]:
+    values, direction = decode_cursor(token)
+    try:
+        day, created_at, tx_id = values
+        key = (datetime.date.fromisoformat(day), datetime.datetime.fromisoformat(created_at), UUID(tx_id))
+    except (ValueError, TypeError):
+        raise ValidationError("Invalid cursor")
+    return key, direction
+
+
+async def _get_transactions_keyset(db: AsyncSession, user_id: UUID, filters: TransactionFilters) -> dict:
+    """Keyset paginacija po (date, created_at, id) — cena ne zavisi od dubine stranice."""
+    query = filtered_query(user_id, filters).with_only_columns(*LIST_COLUMNS)
+    direction = "next"
+    if filters.cursor:
+        key, direction = _parse_cursor(filters.cursor)
+        if direction == "next":
+            query = query.where(tuple_(*SORT_KEY) < key)
+        else:
+            query = query.where(tuple_(*SORT_KEY) > key)
+
+    if direction == "next":
+        query = query.order_by(*(col.desc() for col in SORT_KEY))
+    else:
+        query = query.order_by(*(col.asc() for col in SORT_KEY))
+
+    # Jedan red vise od stranice govori da li postoji sledeca
+    result = await db.execute(query.limit(filters.per_page + 1))
+    rows = list(result.all())
+    has_more = len(rows) > filters.per_page
+    rows = rows[: filters.per_page]
+
+    if direction == "prev":
+        rows.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, filters.cursor is not None
+
+    return {
+        "data": rows,
+        "per_page": filters.per_page,
+        "next_cursor": encode_cursor(_cursor_values(rows[-1]), "next") if rows and has_next else None,
+        "prev_cursor": encode_cursor(_cursor_values(rows[0]), "prev") if rows and has_prev else None,
+    }
+
+
+def _search_terms(q: str) -> list[str]:
+    terms = re.findall(r"\w+", q.lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        raise ValidationError("Search query must contain at least one word")
+    return terms
+
+
+async def search_transactions(
+    db: AsyncSession, user_id: UUID, q: str, filters: TransactionFilters, limit: int
+) -> TransactionSearchResponse:
+    """Pretraga opisa uz filtere iz liste.
+
+    PostgreSQL: prefiksno poklapanje svih reci (tsvector, GIN) ili fuzzy poklapanje
+    (pg_trgm word_similarity, GIN), rangirano po vecoj od dve ocene.
+    Ostale baze: svaka rec mora biti podstring opisa, redosled po datumu.
+    """
+    terms = _search_terms(q)
+    query = filtered_query(user_id, filters)
+    ranked = db.bind.dialect.name == "postgresql"
+
+    if ranked:
+        # Literali (ne bind parametri) — izraz mora da se poklopi sa izrazom indeksa
+        vector = literal_column(SEARCH_VECTOR_SQL)
+        tsquery = func.to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), " & ".join(f"{term}:*" for term in terms))
+        rank = func.greatest(func.ts_rank(vector, tsquery), func.word_similarity(q, Transaction.description))
+        query = (
+            query.add_columns(rank.label("rank"))
+            .where(or_(vector.op("@@")(tsquery), literal(q).op("<%")(Transaction.description)))
+            .order_by(rank.desc(), *(col.desc() for col in SORT_KEY))
+        )
+    else:
+        for term in terms:
+            query = query.where(func.lower(Transaction.description).contains(term, autoescape=True))
+        query = query.add_columns(literal(None).label("rank")).order_by(*(col.desc() for col in SORT_KEY))
+
+    result = await db.execute(query.limit(limit))
+    data = [
+        TransactionSearchResult.model_validate(transaction).model_copy(update={"rank": rank})
+        for transaction, rank in result.all()
+    ]
+    return TransactionSearchResponse(data=data, query=q, ranked=ranked)
+
+
 async def get_transaction_by_id(db: AsyncSession, user_id: UUID, transaction_id: UUID) -> Transaction:
     query = select(Transaction).where(
         Transaction.id == transaction_id,
@@ -68,21 +311,105 @@ async def get_transaction_by_id(db: AsyncSession, user_id: UUID, transaction_id:
 
 async def update_transaction(
     db: AsyncSession, user_id: UUID, transaction_id: UUID, data: TransactionUpdate
-) -> Transaction:
-    transaction = await get_transaction_by_id(db, user_id, transaction_id)
-
+) -> Row | Transaction:
+    """Jedan UPDATE ... RETURNING — bez prethodnog SELECT-a i refresh-a."""
     update_data = data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        if field == "type" and value is not None:
-            value = value.value
-        setattr(transaction, field, value)
+    if not update_data:
+        return await get_transaction_by_id(db, user_id, transaction_id)
+    if update_data.get("type") is not None:
+        update_data["type"] = update_data["type"].value
 
-    await db.commit()
-    await db.refresh(transaction)
+    stmt = (
+        update(Transaction)
+        .where(Transaction.id == transaction_id, Transaction.user_id == user_id)
+        .values(**update_data)
+        .returning(*LIST_COLUMNS)
+    )
+    transaction = (await db.execute(stmt)).one_or_none()
+    if transaction is None:
+        raise NotFoundError("Transaction")
+    # Stari datum/kategorija nisu poznati bez dodatnog SELECT-a — izmenjena dimenzija se ne suzava
+    await commit_with_alerts(
+        db,
+        user_id,
+        None if "date" in update_data else [transaction.date],
+        None if "category_id" in update_data else [transaction.category_id],
+    )
     return transaction
 
 
+def _selector_conditions(user_id: UUID, selector: TransactionSelector) -> list:
+    if not selector.model_dump(exclude_none=True):
+        # Prazan predikat bi pogodio sve transakcije korisnika
+        raise ValidationError("At least one filter or id is required")
+    conditions = _filter_conditions(user_id, selector)
+    if selector.ids:
+        conditions.append(Transaction.id.in_(selector.ids))
+    return conditions
+
+
+async def _touched(db: AsyncSession, conditions: list) -> tuple[set, set]:
+    """(meseci, kategorije) transakcija koje predikat pogadja — opseg provere budzeta."""
+    rows = (await db.execute(
+        select(month_start(Transaction.date), Transaction.category_id).where(*conditions).distinct()
+    )).all()
+    return {row[0] for row in rows}, {row[1] for row in rows}
+
+
+async def update_transactions_where(
+    db: AsyncSession, user_id: UUID, selector: TransactionSelector, changes: TransactionUpdate
+) -> int:
+    """Jedan UPDATE ... WHERE za sve transakcije koje odgovaraju predikatu; vraca broj redova.
+
+    Pre izmene jedan SELECT DISTINCT odredjuje mesece i kategorije za proveru budzeta.
+    """
+    conditions = _selector_conditions(user_id, selector)
+    values = changes.model_dump(exclude_unset=True)
+    if not values:
+        raise ValidationError("No changes provided")
+    if "type" in values:
+        values["type"] = values["type"].value
+    if "category_id" in values:
+        owned = await db.execute(
+            select(Category.id).where(Category.id == values["category_id"], Category.user_id == user_id)
+        )
+        if owned.scalar_one_or_none() is None:
+            raise NotFoundError("Category")
+
+    months, category_ids = await _touched(db, conditions)
+    if "date" in values:
+        months.add(values["date"])
+    if "category_id" in values:
+        category_ids.add(values["category_id"])
+    result = await db.execute(
+        update(Transaction).where(*conditions).values(**values).execution_options(synchronize_session=False)
+    )
+    await commit_with_alerts(db, user_id, months, category_ids)
+    return result.rowcount
+
+
+async def delete_transactions_where(db: AsyncSession, user_id: UUID, selector: TransactionSelector) -> int:
+    """Jedan DELETE ... WHERE za sve transakcije koje odgovaraju predikatu; vraca broj redova.
+
+    Pre brisanja jedan SELECT DISTINCT odredjuje mesece i kategorije za proveru budzeta.
+    """
+    conditions = _selector_conditions(user_id, selector)
+    months, category_ids = await _touched(db, conditions)
+    result = await db.execute(
+        delete(Transaction).where(*conditions).execution_options(synchronize_session=False)
+    )
+    await commit_with_alerts(db, user_id, months, category_ids)
+    return result.rowcount
+
+
 async def delete_transaction(db: AsyncSession, user_id: UUID, transaction_id: UUID) -> None:
-    transaction = await get_transaction_by_id(db, user_id, transaction_id)
-    await db.delete(transaction)
-    await db.commit()
+    """Jedan DELETE ... RETURNING — nepostojeci red se prepoznaje bez prethodnog SELECT-a."""
+    result = await db.execute(
+        delete(Transaction)
+        .where(Transaction.id == transaction_id, Transaction.user_id == user_id)
+        .returning(Transaction.date, Transaction.category_id)
+    )
+    deleted = result.one_or_none()
+    if deleted is None:
+        raise NotFoundError("Transaction")
+    await commit_with_alerts(db, user_id, [deleted.date], [deleted.category_id])
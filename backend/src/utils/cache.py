@@ -1,33 +1,127 @@
+import asyncio
 import json
-from typing import Any
+import time
+import uuid
+from typing import Any, Awaitable, Callable
 
 from src.config.redis import get_redis
+from src.config.settings import settings
+from src.utils.codec import codec
+from src.utils.local_cache import LocalCache
 from src.utils.logger import logger
 
 # Prefiks za sve cache kljuceve
 CACHE_PREFIX = "fintracker:"
 # Default TTL: 5 minuta
 DEFAULT_TTL = 300
+# Brojac generacije po korisniku — deo svakog verzionisanog kljuca
+GENERATION_KEY = CACHE_PREFIX + "gen:{user_id}"
 
+# Single-flight: kratki Redis lock koji drzi worker koji racuna vrednost
+LOCK_PREFIX = CACHE_PREFIX + "lock:"
+LOCK_TTL_MS = 5000
+LOCK_WAIT_TIMEOUT = 5.0
+LOCK_POLL_INTERVAL = 0.05
+
+# Oslobadja lock samo ako ga i dalje drzi isti vlasnik (token)
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Pub/sub kanal za invalidaciju L1 keševa u svim workerima
+INVALIDATION_CHANNEL = CACHE_PREFIX + "invalidate"
+
+# L1: in-process keš ispred Redisa (L2)
+local_cache = LocalCache(max_bytes=settings.CACHE_L1_MAX_BYTES, ttl=settings.CACHE_L1_TTL)
+
+# Lokalna kopija generacija: user_id -> (generacija, monotonic istek)
+_generations: dict[str, tuple[int, float]] = {}
+
+# Handleri za pub/sub poruke po tipu: "generation", "principal", ...
+_invalidation_handlers: dict[str, Callable[[dict], None]] = {}
+_listener_task: asyncio.Task | None = None
+
+redis_stats = {"hits": 0, "misses": 0}
+
+# Racunanja u toku u ovom procesu: kljuc -> future sa rezultatom
+_inflight: dict[str, asyncio.Future] = {}
+
+# Kljucevi cije osvezavanje (stale-while-revalidate) je vec pokrenuto u ovom procesu
+_refreshing: set[str] = set()
+_refresh_tasks: set[asyncio.Task] = set()
+
+# Status koji vraca cache_get_or_compute (i ide u X-Cache header)
+CACHE_HIT = "HIT"
+CACHE_STALE = "STALE"
+CACHE_MISS = "MISS"
+
+coalesce_stats = {
+    "computations": 0,
+    "coalesced_local": 0,
+    "coalesced_remote": 0,
+    "lock_wait_timeouts": 0,
+    "stale_served": 0,
+    "refreshes": 0,
+    "refresh_skipped": 0,
+    "refresh_errors": 0,
+}
+
+
+async def cache_get_entry(key: str) -> tuple[Any, bool] | None:
+    """Čita unos iz keša kao (vrednost, da_li_je_stale). Vraća None ako ne postoji.
+
+    Prvo gleda L1 (bez mreze), pa Redis; Redis pogodak se upisuje u L1.
+    Prazne vrednosti ([] , {}, 0) su validni pogoci — samo None je promasaj.
+    """
+    local = local_cache.get(key)
+    if local is not None:
+        return local.value, local.fresh_until <= time.time()
 
-async def cache_get(key: str) -> Any | None:
-    """Čita vrednost iz keša. Vraća None ako ne postoji."""
     redis = get_redis()
     full_key = f"{CACHE_PREFIX}{key}"
     data = await redis.get(full_key)
-    if data:
-        logger.debug(f"Cache HIT: {full_key}")
-        return json.loads(data)
-    logger.debug(f"Cache MISS: {full_key}")
-    return None
+    if data is None:
+        redis_stats["misses"] += 1
+        logger.debug(f"Cache MISS: {full_key}")
+        return None
+    decoded = codec.decode_sized(data)
+    if decoded is None:
+        # Nepoznat format (npr. stara verzija zaglavlja) — isto kao promasaj
+        redis_stats["misses"] += 1
+        logger.debug(f"Cache MISS (format): {full_key}")
+        return None
+    redis_stats["hits"] += 1
+    value, fresh_until, size = decoded
+    # L1 cuva dekodiranu vrednost — velicina je serijalizovan payload pre kompresije
+    local_cache.set(key, value, size, fresh_until)
+    stale = fresh_until <= time.time()
+    logger.debug(f"Cache {'STALE' if stale else 'HIT'}: {full_key}")
+    return value, stale
+
+
+async def cache_get(key: str) -> Any | None:
+    """Čita vrednost iz keša (i ako je stale). Vraća None ako ne postoji."""
+    entry = await cache_get_entry(key)
+    return entry[0] if entry else None
 
 
-async def cache_set(key: str, value: Any, ttl: int = DEFAULT_TTL) -> None:
-    """Upisuje vrednost u keš sa TTL-om (sekunde)."""
+async def cache_set(key: str, value: Any, ttl: int = DEFAULT_TTL, hard_ttl: int | None = None) -> None:
+    """Upisuje vrednost u keš (L1 + Redis). Sveza je `ttl` sekundi, a u Redisu zivi `hard_ttl`.
+
+    `bytes` se cuvaju i vracaju neizmenjeni (npr. vec serijalizovan JSON odgovor),
+    ostalo kodira podeseni codec (vidi src/utils/codec.py).
+    """
     redis = get_redis()
     full_key = f"{CACHE_PREFIX}{key}"
-    await redis.set(full_key, json.dumps(value, default=str), ex=ttl)
-    logger.debug(f"Cache SET: {full_key} (TTL: {ttl}s)")
+    hard_ttl = max(hard_ttl or ttl, ttl)
+    fresh_until = time.time() + ttl
+    data, size = codec.encode_sized(value, fresh_until)
+    await redis.set(full_key, data, ex=hard_ttl)
+    local_cache.set(key, value, size, fresh_until, min(local_cache.ttl, hard_ttl))
+    logger.debug(f"Cache SET: {full_key} (TTL: {ttl}s, hard: {hard_ttl}s)")
 
 
 async def cache_delete(pattern: str) -> int:
@@ -44,6 +138,268 @@ async def cache_delete(pattern: str) -> int:
     return 0
 
 
+async def get_generation(user_id: str) -> int:
+    """Trenutna generacija keša za korisnika (0 ako nikad nije invalidiran).
+
+    Cita se iz lokalne kopije koju azurira pub/sub; Redis samo kad kopija istekne.
+    """
+    user_id = str(user_id)
+    local = _generations.get(user_id)
+    if local and local[1] > time.monotonic():
+        return local[0]
+    redis = get_redis()
+    value = await redis.get(GENERATION_KEY.format(user_id=user_id))
+    return _remember_generation(user_id, int(value) if value else 0)
+
+
+def _remember_generation(user_id: str, generation: int, authoritative: bool = False) -> int:
+    # Dok je lokalna kopija vazeca, generacija samo raste — zakasneli GET ili pub/sub
+    # poruka ne sme da je vrati unazad. Istekla kopija se ne poredi: ako je kljuc u
+    # Redisu izgubljen (FLUSHDB, eviction) i INCR krene od 1, vazi vrednost iz Redisa.
+    local = _generations.get(user_id)
+    if not authoritative and local and local[1] > time.monotonic() and local[0] > generation:
+        generation = local[0]
+    _generations[user_id] = (generation, time.monotonic() + settings.CACHE_GENERATION_LOCAL_TTL)
+    return generation
+
+
+async def versioned_key(namespace: str, user_id: str, *parts: Any) -> str:
+    """Gradi kljuc `namespace:user:v<gen>:parts` — stara generacija postaje nedostizna."""
+    generation = await get_generation(user_id)
+    suffix = ":".join(str(part) for part in parts)
+    return f"{namespace}:{user_id}:v{generation}:{suffix}"
+
+
+async def dashboard_cache_key(user_id: str, *parts: Any) -> str:
+    return await versioned_key("dashboard", user_id, *parts)
+
+
 async def invalidate_user_dashboard(user_id: str) -> None:
-    """Briše sve dashboard cache ključeve za korisnika."""
-    await cache_delete(f"dashboard:{user_id}:*")
+    """Invalidira dashboard keš korisnika jednim INCR-om (O(1), bez SCAN-a).
+
+    Generacija je zajednicka za sve verzionisane kljuceve korisnika, pa ovo
+    invalidira i npr. keširane brojeve transakcija. Stari unosi se ne brisu —
+    vise se ne citaju i isticu kroz svoj TTL.
+    """
+    redis = get_redis()
+    generation = await redis.incr(GENERATION_KEY.format(user_id=user_id))
+    # Rezultat INCR-a je izvor istine, cak i kada je manji od lokalne kopije
+    _remember_generation(str(user_id), generation, authoritative=True)
+    await publish_invalidation("generation", user_id=str(user_id), generation=generation)
+    logger.debug(f"Cache INVALIDATE: dashboard:{user_id} -> v{generation}")
+
+
+# ── Pub/sub invalidacija izmedju workera ─────────────────────────────
+def register_invalidation_handler(kind: str, handler: Callable[[dict], None]) -> None:
+    """Registruje handler za poruke datog tipa (npr. principal keš)."""
+    _invalidation_handlers[kind] = handler
+
+
+async def publish_invalidation(kind: str, **data: Any) -> None:
+    """Salje invalidaciju svim workerima. Greska u publish-u ne obara upis."""
+    try:
+        await get_redis().publish(INVALIDATION_CHANNEL, json.dumps({"type": kind, **data}))
+    except Exception as exc:
+        logger.warning(f"Cache PUBLISH failed: {kind} ({exc})")
+
+
+def handle_invalidation(message: dict) -> None:
+    handler = _invalidation_handlers.get(message.get("type"))
+    if handler:
+        handler(message)
+
+
+def _on_generation(message: dict) -> None:
+    _remember_generation(message["user_id"], int(message["generation"]))
+
+
+register_invalidation_handler("generation", _on_generation)
+
+
+async def _listen_for_invalidations() -> None:
+    while True:
+        try:
+            pubsub = get_redis().pubsub()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            logger.info(f"Cache: pretplacen na {INVALIDATION_CHANNEL}")
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    handle_invalidation(json.loads(message["data"]))
+                except Exception as exc:
+                    logger.warning(f"Cache: neispravna invalidacija ({exc})")
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # Propustene poruke pokriva kratak TTL lokalnih kopija
+            logger.warning(f"Cache: pub/sub prekinut ({exc}), ponovo za 1s")
+            _generations.clear()
+            await asyncio.sleep(1)
+
+
+def start_invalidation_listener() -> None:
+    global _listener_task
+    if _listener_task is None:
+        _listener_task = asyncio.get_running_loop().create_task(_listen_for_invalidations())
+
+
+async def stop_invalidation_listener() -> None:
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
+
+
+def clear_local_caches() -> None:
+    """Prazni L1 i lokalne generacije (testovi, ili posle gubitka pub/sub veze)."""
+    local_cache.clear()
+    _generations.clear()
+    redis_stats["hits"] = redis_stats["misses"] = 0
+
+
+async def cache_get_or_compute(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    ttl: int = DEFAULT_TTL,
+    hard_ttl: int | None = None,
+    refresh: Callable[[], Awaitable[Any]] | None = None,
+) -> tuple[Any, str]:
+    """Vraca (vrednost, status) iz keša ili je izracunava — jednom po kljucu (single-flight).
+
+    Istovremeni pozivi u istom procesu cekaju isti future; pozivi iz drugih
+    workera cekaju na Redis lock i zatim citaju vrednost koju je upisao vlasnik.
+
+    Izmedju `ttl` i `hard_ttl` vraca se stale vrednost odmah, a `refresh`
+    (ili `compute`) je osvezava u pozadini — najvise jednom po kljucu.
+    `refresh` mora da bude nezavisan od request-a (npr. sopstvena DB sesija).
+    """
+    entry = await cache_get_entry(key)
+    if entry is not None:
+        value, stale = entry
+        if not stale:
+            return value, CACHE_HIT
+        coalesce_stats["stale_served"] += 1
+        _schedule_refresh(key, refresh or compute, ttl, hard_ttl)
+        return value, CACHE_STALE
+
+    future = _inflight.get(key)
+    if future is not None:
+        coalesce_stats["coalesced_local"] += 1
+        try:
+            return await asyncio.shield(future), CACHE_MISS
+        except asyncio.CancelledError:
+            # Vlasnik je otkazan — racunamo sami; ako smo mi otkazani, propagiramo
+            if not future.cancelled():
+                raise
+        return await compute(), CACHE_MISS
+
+    future = asyncio.get_running_loop().create_future()
+    # Sprecava "exception was never retrieved" kada nema onih koji cekaju
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    _inflight[key] = future
+    try:
+        value = await _compute_with_lock(key, compute, ttl, hard_ttl)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(value)
+        return value, CACHE_MISS
+    finally:
+        _inflight.pop(key, None)
+
+
+async def _acquire_lock(key: str) -> str | None:
+    """Pokusava da uzme single-flight lock za kljuc. Vraca token ili None."""
+    token = uuid.uuid4().hex
+    if await get_redis().set(f"{LOCK_PREFIX}{key}", token, nx=True, px=LOCK_TTL_MS):
+        return token
+    return None
+
+
+async def _release_lock(key: str, token: str) -> None:
+    await get_redis().eval(RELEASE_LOCK_SCRIPT, 1, f"{LOCK_PREFIX}{key}", token)
+
+
+async def _compute_with_lock(
+    key: str, compute: Callable[[], Awaitable[Any]], ttl: int, hard_ttl: int | None
+) -> Any:
+    token = await _acquire_lock(key)
+    if token is None:
+        coalesce_stats["coalesced_remote"] += 1
+        redis = get_redis()
+        deadline = time.monotonic() + LOCK_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            cached = await cache_get(key)
+            if cached is not None:
+                return cached
+            if not await redis.exists(f"{LOCK_PREFIX}{key}"):
+                break
+        else:
+            coalesce_stats["lock_wait_timeouts"] += 1
+            logger.warning(f"Cache LOCK timeout: {key}")
+        # Vlasnik nije upisao vrednost (greska ili timeout) — racunamo sami
+
+    try:
+        coalesce_stats["computations"] += 1
+        value = await compute()
+        await cache_set(key, value, ttl, hard_ttl)
+        return value
+    finally:
+        if token:
+            await _release_lock(key, token)
+
+
+def _schedule_refresh(
+    key: str, refresh: Callable[[], Awaitable[Any]], ttl: int, hard_ttl: int | None
+) -> None:
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+    task = asyncio.get_running_loop().create_task(_refresh(key, refresh, ttl, hard_ttl))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def _refresh(
+    key: str, refresh: Callable[[], Awaitable[Any]], ttl: int, hard_ttl: int | None
+) -> None:
+    """Pozadinsko osvezavanje stale unosa; drugi workeri ga preskacu dok drzimo lock."""
+    try:
+        token = await _acquire_lock(key)
+        if token is None:
+            coalesce_stats["refresh_skipped"] += 1
+            return
+        try:
+            value = await refresh()
+            await cache_set(key, value, ttl, hard_ttl)
+            coalesce_stats["refreshes"] += 1
+        finally:
+            await _release_lock(key, token)
+    except Exception as exc:
+        coalesce_stats["refresh_errors"] += 1
+        logger.warning(f"Cache REFRESH failed: {key} ({exc})")
+    finally:
+        _refreshing.discard(key)
+
+
+def cache_stats() -> dict:
+    redis_lookups = redis_stats["hits"] + redis_stats["misses"]
+    return {
+        "l1": local_cache.stats(),
+        "l2_redis": {
+            **redis_stats,
+            "hit_ratio": round(redis_stats["hits"] / redis_lookups, 4) if redis_lookups else 0.0,
+        },
+        "generations_cached": len(_generations),
+        "single_flight": dict(coalesce_stats, inflight=len(_inflight), refreshing=len(_refreshing)),
+    }
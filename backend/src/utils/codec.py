@@ -0,0 +1,150 @@
+"""Binarni format cache unosa: verzionisano zaglavlje + kodirani (opciono kompresovani) payload.
+
+Zaglavlje (14 bajtova, big-endian, `>2sBBBxd`):
+
+    magic "FT" | verzija (1B) | codec (1B) | flags (1B) | rezervisano (1B) | fresh_until (float64)
+
+Citac prepoznaje sve codec-e i kompresije bez obzira na trenutno podesavanje,
+pa se novi codec moze ukljuciti postepeno (worker po worker) bez praznjenja
+keša. Nepoznata verzija, magic, codec ili flag, kao i ostecen payload, tretiraju
+se kao promasaj.
+"""
+
+import json
+import struct
+import zlib
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - opciona zavisnost
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - opciona zavisnost
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - opciona zavisnost
+    lz4_frame = None
+
+from src.config.settings import settings
+from src.utils.logger import logger
+
+MAGIC = b"FT"
+FORMAT_VERSION = 1
+HEADER = struct.Struct(">2sBBBxd")
+
+# Identifikatori codec-a — nikad ne menjati postojece vrednosti
+CODEC_RAW = 0  # bytes bez izmene (npr. gotov JSON odgovor)
+CODEC_JSON = 1
+CODEC_ORJSON = 2
+CODEC_MSGPACK = 3
+
+FLAG_ZLIB = 0x01
+FLAG_LZ4 = 0x02
+# Najvise jedna kompresija po unosu
+KNOWN_FLAGS = (0, FLAG_ZLIB, FLAG_LZ4)
+
+CODEC_NAMES = {"json": CODEC_JSON, "orjson": CODEC_ORJSON, "msgpack": CODEC_MSGPACK}
+
+
+def _available(codec: int) -> bool:
+    if codec == CODEC_ORJSON:
+        return orjson is not None
+    if codec == CODEC_MSGPACK:
+        return msgpack is not None
+    return codec in (CODEC_RAW, CODEC_JSON)
+
+
+def _encode_payload(value: Any, codec: int) -> bytes:
+    if codec == CODEC_ORJSON:
+        return orjson.dumps(value, default=str)
+    if codec == CODEC_MSGPACK:
+        return msgpack.packb(value, default=str, use_bin_type=True)
+    return json.dumps(value, default=str).encode()
+
+
+def _decode_payload(payload: bytes, codec: int) -> Any:
+    if codec == CODEC_RAW:
+        return payload
+    if codec == CODEC_ORJSON:
+        return orjson.loads(payload)
+    if codec == CODEC_MSGPACK:
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+
+class CacheCodec:
+    """Kodira/dekodira cache unose. `codec` i `compression` vaze samo za upis."""
+
+    def __init__(self, codec: str = "json", compression: str = "none", compress_min_bytes: int = 1024):
+        codec_id = CODEC_NAMES.get(codec)
+        if codec_id is None:
+            raise ValueError(f"Nepoznat cache codec: {codec}")
+        if not _available(codec_id):
+            logger.warning(f"Cache codec '{codec}' nije instaliran, koristi se json")
+            codec_id = CODEC_JSON
+        if compression not in ("none", "zlib", "lz4"):
+            raise ValueError(f"Nepoznata kompresija: {compression}")
+        if compression == "lz4" and lz4_frame is None:
+            logger.warning("lz4 nije instaliran, koristi se zlib")
+            compression = "zlib"
+        self.codec = codec_id
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+
+    def encode(self, value: Any, fresh_until: float) -> bytes:
+        return self.encode_sized(value, fresh_until)[0]
+
+    def encode_sized(self, value: Any, fresh_until: float) -> tuple[bytes, int]:
+        """Kao `encode`, uz velicinu payload-a pre kompresije (budzet L1 keša)."""
+        if isinstance(value, bytes):
+            codec_id, payload = CODEC_RAW, value
+        else:
+            codec_id, payload = self.codec, _encode_payload(value, self.codec)
+        size = len(payload)
+
+        flags = 0
+        if self.compression != "none" and size >= self.compress_min_bytes:
+            if self.compression == "lz4":
+                payload, flags = lz4_frame.compress(payload), FLAG_LZ4
+            else:
+                payload, flags = zlib.compress(payload, 1), FLAG_ZLIB
+
+        return HEADER.pack(MAGIC, FORMAT_VERSION, codec_id, flags, fresh_until) + payload, size
+
+    def decode(self, data: bytes) -> tuple[Any, float] | None:
+        """Vraca (vrednost, fresh_until) ili None za nepoznat/neispravan format."""
+        decoded = self.decode_sized(data)
+        return decoded[:2] if decoded is not None else None
+
+    def decode_sized(self, data: bytes) -> tuple[Any, float, int] | None:
+        """Kao `decode`, uz velicinu dekompresovanog payload-a."""
+        if len(data) < HEADER.size:
+            return None
+        magic, version, codec_id, flags, fresh_until = HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION or not _available(codec_id) or flags not in KNOWN_FLAGS:
+            return None
+        payload = data[HEADER.size:]
+        try:
+            if flags == FLAG_LZ4:
+                if lz4_frame is None:
+                    return None
+                payload = lz4_frame.decompress(payload)
+            elif flags == FLAG_ZLIB:
+                payload = zlib.decompress(payload)
+            # lz4 prijavljuje ostecen frame kao RuntimeError; JSON/msgpack greske su ValueError
+            return _decode_payload(payload, codec_id), fresh_until, len(payload)
+        except (zlib.error, RuntimeError, ValueError) as exc:
+            logger.warning(f"Cache unos nije moguce dekodirati: {exc}")
+            return None
+
+
+codec = CacheCodec(
+    codec=settings.CACHE_CODEC,
+    compression=settings.CACHE_COMPRESSION,
+    compress_min_bytes=settings.CACHE_COMPRESS_MIN_BYTES,
+)
@@ -18,3 +18,8 @@ class ValidationError(AppError):
 class AuthError(AppError):
     def __init__(self, message: str = "Authentication failed"):
         super().__init__(message, 401)
+
+
+class ServiceUnavailableError(AppError):
+    def __init__(self, message: str = "Service temporarily unavailable"):
+        super().__init__(message, 503)
@@ -0,0 +1,26 @@
+"""Neprozirni cursor tokeni za keyset paginaciju."""
+
+import base64
+import json
+from typing import Any
+
+from src.utils.errors import ValidationError
+
+
+def encode_cursor(values: list[Any], direction: str = "next") -> str:
+    """Pakuje vrednosti kljuca sortiranja (npr. date, created_at, id) u URL-safe token."""
+    payload = json.dumps({"k": values, "d": direction}, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str) -> tuple[list[Any], str]:
+    """Vraca (vrednosti kljuca, smer). Neispravan token -> 400."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = payload["k"], payload["d"]
+    except (ValueError, KeyError, TypeError):
+        raise ValidationError("Invalid cursor")
+    if direction not in ("next", "prev") or not isinstance(values, list):
+        raise ValidationError("Invalid cursor")
+    return values, direction
@@ -0,0 +1,63 @@
+"""SQL helperi koji zavise od dijalekta baze."""
+
+from sqlalchemy import Date, Insert, Row, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(db: AsyncSession, model) -> Insert:
+    """INSERT konstrukt dijalekta sesije (podrzava on_conflict_do_nothing/do_update).
+
+    Za dijalekte bez ON CONFLICT vraca obican INSERT — konflikt tada prijavljuje
+    IntegrityError (vidi `insert_ignoring_conflict`).
+    """
+    factory = _INSERTS.get(db.bind.dialect.name, insert)
+    return factory(model)
+
+
+def ignore_conflicts(stmt: Insert, index_elements: list[str]) -> Insert:
+    """ON CONFLICT DO NOTHING gde ga dijalekt podrzava; inace INSERT ostaje nepromenjen."""
+    if hasattr(stmt, "on_conflict_do_nothing"):
+        return stmt.on_conflict_do_nothing(index_elements=index_elements)
+    return stmt
+
+
+async def insert_ignoring_conflict(db: AsyncSession, stmt: Insert, index_elements: list[str]) -> Row | None:
+    """Izvrsava INSERT ... RETURNING; red koji krsi unique constraint daje None.
+
+    Gde dijalekt podrzava ON CONFLICT DO NOTHING to je jedan upit bez izuzetka;
+    inace se IntegrityError hvata i transakcija vraca (rollback).
+    """
+    if hasattr(stmt, "on_conflict_do_nothing"):
+        return (await db.execute(ignore_conflicts(stmt, index_elements))).one_or_none()
+    try:
+        return (await db.execute(stmt)).one_or_none()
+    except IntegrityError:
+        await db.rollback()
+        return None
+
+
+class month_start(FunctionElement):
+    """Prvi dan meseca za datum: date_trunc na PostgreSQL-u, date(x, 'start of month') na SQLite-u."""
+
+    type = Date()
+    inherit_cache = True
+    name = "month_start"
+
+
+@compiles(month_start)
+def _month_start(element, compiler, **kw):
+    return f"CAST(date_trunc('month', {compiler.process(element.clauses, **kw)}) AS DATE)"
+
+
+@compiles(month_start, "sqlite")
+def _month_start_sqlite(element, compiler, **kw):
+    return f"date({compiler.process(element.clauses, **kw)}, 'start of month')"
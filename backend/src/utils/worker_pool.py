@@ -0,0 +1,99 @@
+"""Ograniceni pool za blokirajuci CPU posao (npr. bcrypt) van event loop-a."""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from src.utils.errors import ServiceUnavailableError
+from src.utils.logger import logger
+
+
+class BoundedWorkerPool:
+    """Thread ili process pool sa admission kontrolom na dubinu reda.
+
+    Kada je broj poslova u toku (aktivni + na cekanju) dostigne
+    `workers + max_queue`, novi poziv odmah dobija 503 umesto da
+    neograniceno ceka u redu.
+    """
+
+    def __init__(self, name: str, kind: str = "thread", workers: int = 4, max_queue: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Nepoznat tip pool-a: {kind}")
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Executor | None = None
+        # Brojaci se menjaju i iz worker thread-a (done callback), pa idu pod lock
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_latency = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+            logger.info(f"Worker pool '{self.name}' pokrenut ({self.kind}, {self.workers} workera)")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Izvrsava `fn(*args)` u pool-u i ceka rezultat bez blokiranja event loop-a.
+
+        Posao se broji kao "u toku" dok se stvarno ne zavrsi u executor-u — i kada
+        je coroutine koja ga ceka otkazana (npr. klijent prekine konekciju).
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                logger.warning(f"Worker pool '{self.name}' pun ({self._in_flight}/{self.capacity})")
+                raise ServiceUnavailableError("Server je preopterecen. Pokusajte ponovo kasnije.")
+            self._in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(lambda f: self._finished(f, started))
+        return await asyncio.wrap_future(future)
+
+    def _finished(self, future: Future, started: float) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if not future.cancelled():
+                self.completed += 1
+                self.total_latency += time.perf_counter() - started
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "active": min(self._in_flight, self.workers),
+            "queued": max(0, self._in_flight - self.workers),
+            "saturation": round(self._in_flight / self.capacity, 4),
+            "peak_in_flight": self.peak_in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_latency_ms": round(self.total_latency / self.completed * 1000, 2) if self.completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -5,11 +5,14 @@ from unittest.mock import AsyncMock, patch
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncSession
 from sqlalchemy.pool import StaticPool
 
-from src.config.database import Base, get_db
+from src.config.database import Base, enable_sqlite_foreign_keys, get_db
 from src.config.models import User, Category, TransactionType
+from src.modules.auth.principal import principal_cache
+from src.utils.cache import clear_local_caches
 from src.modules.auth.service import hash_password, create_access_token
 
 
@@ -23,6 +26,7 @@ test_engine = create_async_engine(
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
+enable_sqlite_foreign_keys(test_engine)
 test_session = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
 
 
@@ -44,6 +48,32 @@ async def db():
         yield session
 
 
+@pytest.fixture
+def statement_counter():
+    """Lista SQL naredbi poslatih bazi (before_cursor_execute) dok je fixture aktivan."""
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def commit_counter():
+    """Lista COMMIT-a konekcija (engine event `commit`) dok je fixture aktivan."""
+    commits: list[object] = []
+
+    def record(conn):
+        commits.append(conn)
+
+    event.listen(test_engine.sync_engine, "commit", record)
+    yield commits
+    event.remove(test_engine.sync_engine, "commit", record)
+
+
 # ── Mock Redis ───────────────────────────────────────────────────────
 @pytest.fixture(autouse=True)
 def mock_redis():
@@ -65,6 +95,86 @@ def mock_redis():
         yield mock
 
 
+@pytest.fixture(autouse=True)
+def patch_session_factory():
+    """Pozadinski taskovi (run_in_session) koriste test bazu umesto PostgreSQL-a."""
+    with patch("src.config.database.async_session", test_session):
+        yield
+
+
+class FakeRedis:
+    """Minimalni in-memory Redis za testove koji proveravaju stvarno ponasanje keša."""
+
+    def __init__(self):
+        self.data: dict[str, str] = {}
+        self.commands: list[str] = []
+        self.published: list[tuple[str, str]] = []
+
+    async def get(self, key):
+        self.commands.append("GET")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        self.commands.append("SET")
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, *keys):
+        self.commands.append("DEL")
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    async def incr(self, key):
+        self.commands.append("INCR")
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    async def expire(self, key, seconds):
+        return key in self.data
+
+    async def publish(self, channel, message):
+        self.commands.append("PUBLISH")
+        self.published.append((channel, message))
+        return 1
+
+    async def exists(self, *keys):
+        return sum(1 for key in keys if key in self.data)
+
+    async def eval(self, script, numkeys, *args):
+        # Jedina skripta u upotrebi: compare-and-delete za single-flight lock
+        key, token = args[0], args[1]
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+    def scan_iter(self, match=None):
+        self.commands.append("SCAN")
+        import fnmatch
+        return AsyncIterator([key for key in self.data if fnmatch.fnmatch(key, match or "*")])
+
+
+@pytest.fixture
+def fake_redis(mock_redis):
+    """Zamenjuje AsyncMock Redis funkcionalnim in-memory Redis-om."""
+    fake = FakeRedis()
+    with patch("src.config.redis.redis_client", fake), \
+         patch("src.config.redis.get_redis", return_value=fake), \
+         patch("src.utils.cache.get_redis", return_value=fake):
+        yield fake
+
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    """Principal i L1 keš su globalni za proces — prazne se izmedju testova."""
+    principal_cache.clear()
+    clear_local_caches()
+    yield
+    principal_cache.clear()
+    clear_local_caches()
+
+
 class AsyncIterator:
     """Helper za mock async iteratora (scan_iter)."""
     def __init__(self, items):
@@ -0,0 +1,112 @@
+"""Broj SQL naredbi po write endpoint-u — svaki create/update/delete je jedan upit.
+
+Provera pragova budzeta (budget_alerts) ide u SAVEPOINT-u iste transakcije i broji se odvojeno.
+"""
+
+from httpx import AsyncClient
+
+from src.config.models import Category
+
+
+async def _count(client: AsyncClient, statements: list[str], method: str, url: str, **kwargs):
+    statements.clear()
+    response = await client.request(method, url, **kwargs)
+    return response, [statement for statement in statements if not _alert_check(statement)]
+
+
+def _alert_check(statement: str) -> bool:
+    return "budget_alerts" in statement or "SAVEPOINT" in statement
+
+
+class TestWriteStatementCount:
+    async def test_single_statement_per_write(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], statement_counter: list[str]
+    ):
+        # Zagreva principal cache — autentifikacija posle toga ne ide u bazu
+        await client.get("/api/categories/", headers=auth_headers)
+        category_id = test_categories[1].id
+
+        cases = []
+        response, sql = await _count(client, statement_counter, "POST", "/api/transactions/", headers=auth_headers, json={
+            "category_id": category_id, "amount": 100, "type": "expense", "description": "Kafa", "date": "2026-02-01",
+        })
+        cases.append(("create transaction", response.status_code, sql))
+        transaction_id = response.json()["id"]
+        response, sql = await _count(
+            client, statement_counter, "PUT", f"/api/transactions/{transaction_id}", headers=auth_headers, json={"amount": 150}
+        )
+        cases.append(("update transaction", response.status_code, sql))
+        response, sql = await _count(client, statement_counter, "DELETE", f"/api/transactions/{transaction_id}", headers=auth_headers)
+        cases.append(("delete transaction", response.status_code, sql))
+
+        response, sql = await _count(client, statement_counter, "POST", "/api/budgets/", headers=auth_headers, json={
+            "category_id": category_id, "amount": 20000, "month": "2026-02-01",
+        })
+        cases.append(("create budget", response.status_code, sql))
+        budget_id = response.json()["id"]
+        response, sql = await _count(
+            client, statement_counter, "PUT", f"/api/budgets/{budget_id}", headers=auth_headers, json={"amount": 25000}
+        )
+        cases.append(("update budget", response.status_code, sql))
+        response, sql = await _count(client, statement_counter, "DELETE", f"/api/budgets/{budget_id}", headers=auth_headers)
+        cases.append(("delete budget", response.status_code, sql))
+
+        response, sql = await _count(client, statement_counter, "POST", "/api/categories/", headers=auth_headers, json={
+            "name": "Zabava", "type": "expense",
+        })
+        cases.append(("create category", response.status_code, sql))
+        new_category_id = response.json()["id"]
+        response, sql = await _count(
+            client, statement_counter, "PUT", f"/api/categories/{new_category_id}", headers=auth_headers, json={"icon": "🎮"}
+        )
+        cases.append(("update category", response.status_code, sql))
+        response, sql = await _count(
+            client, statement_counter, "DELETE", f"/api/categories/{new_category_id}", headers=auth_headers
+        )
+        cases.append(("delete category", response.status_code, sql))
+
+        for name, status, sql in cases:
+            assert status < 300, name
+            assert len(sql) == 1, (name, sql)
+
+    async def test_alert_check_is_two_statements(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], statement_counter: list[str]
+    ):
+        await client.get("/api/categories/", headers=auth_headers)
+        statement_counter.clear()
+        await client.post("/api/transactions/", headers=auth_headers, json={
+            "category_id": test_categories[1].id, "amount": 100, "type": "expense", "date": "2026-02-01",
+        })
+        alert_sql = [statement for statement in statement_counter if "budget_alerts" in statement]
+        assert len(alert_sql) == 2
+
+    async def test_alert_check_shares_the_write_commit(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], commit_counter: list
+    ):
+        await client.get("/api/categories/", headers=auth_headers)
+        commit_counter.clear()
+        response = await client.post("/api/transactions/", headers=auth_headers, json={
+            "category_id": test_categories[1].id, "amount": 100, "type": "expense", "date": "2026-02-01",
+        })
+        assert response.status_code == 201
+        assert len(commit_counter) == 1
+
+    async def test_bulk_budget_writes(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], statement_counter: list[str]
+    ):
+        await client.get("/api/categories/", headers=auth_headers)
+        items = [{"category_id": category.id, "amount": 1000} for category in test_categories[1:]]
+
+        response, sql = await _count(client, statement_counter, "POST", "/api/budgets/bulk", headers=auth_headers, json={
+            "month": "2026-02-01", "items": items,
+        })
+        assert response.json()["created"] == len(items)
+        assert len(sql) == 1, sql
+
+        # COUNT izvornih budzeta + jedan INSERT ... SELECT za sve ciljne mesece
+        response, sql = await _count(
+            client, statement_counter, "POST", "/api/budgets/rollover?from=2026-02-01&to=2026-03-01&months=6",
+            headers=auth_headers,
+        )
+        assert response.json()["created"] == len(items) * 6
+        assert len(sql) == 2, sql
@@ -1,5 +1,7 @@
 """Testovi za auth modul — registracija, login, refresh, me."""
 
+from unittest.mock import patch
+
 import pytest
 from httpx import AsyncClient
 
@@ -98,3 +100,69 @@ class TestMe:
     async def test_me_no_token(self, client: AsyncClient):
         response = await client.get("/api/auth/me")
         assert response.status_code == 403
+
+
+class TestPrincipalCache:
+    async def test_me_uses_cached_principal(self, client: AsyncClient, test_user: User, auth_headers: dict):
+        from src.modules.auth.principal import principal_cache
+
+        await client.get("/api/auth/me", headers=auth_headers)
+        await client.get("/api/auth/me", headers=auth_headers)
+        stats = principal_cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+
+    async def test_cache_invalidated_on_user_update(self, client: AsyncClient, db, test_user: User, auth_headers: dict):
+        await client.get("/api/auth/me", headers=auth_headers)
+
+        test_user.name = "Promenjeno Ime"
+        await db.commit()
+
+        response = await client.get("/api/auth/me", headers=auth_headers)
+        assert response.json()["name"] == "Promenjeno Ime"
+
+    async def test_cache_invalidated_on_user_delete(self, client: AsyncClient, db, test_user: User, auth_headers: dict):
+        await client.get("/api/auth/me", headers=auth_headers)
+
+        await db.delete(test_user)
+        await db.commit()
+
+        response = await client.get("/api/auth/me", headers=auth_headers)
+        assert response.status_code == 401
+
+    async def test_cache_not_invalidated_before_commit(self, client: AsyncClient, db, test_user: User, auth_headers: dict):
+        from src.modules.auth.principal import principal_cache
+
+        await client.get("/api/auth/me", headers=auth_headers)
+        test_user.name = "Jos nije komitovano"
+        await db.flush()
+        # Flush jos nije commit — principal ostaje u kešu dok transakcija ne uspe
+        assert principal_cache.stats()["size"] == 1
+
+        await db.commit()
+        assert principal_cache.stats()["size"] == 0
+
+    async def test_rollback_keeps_cached_principal(self, client: AsyncClient, db, test_user: User, auth_headers: dict):
+        from src.modules.auth.principal import principal_cache
+
+        await client.get("/api/auth/me", headers=auth_headers)
+        test_user.name = "Ponisteno"
+        await db.flush()
+        await db.rollback()
+        assert principal_cache.stats()["size"] == 1
+
+
+class TestMetrics:
+    async def test_disabled_without_token(self, client: AsyncClient):
+        response = await client.get("/api/metrics")
+        assert response.status_code == 404
+
+    async def test_requires_token(self, client: AsyncClient):
+        with patch("src.app.settings.METRICS_TOKEN", "tajna"):
+            assert (await client.get("/api/metrics")).status_code == 401
+            wrong = await client.get("/api/metrics", headers={"X-Metrics-Token": "pogresno"})
+            assert wrong.status_code == 401
+
+            response = await client.get("/api/metrics", headers={"X-Metrics-Token": "tajna"})
+            assert response.status_code == 200
+            assert "principal_cache" in response.json()
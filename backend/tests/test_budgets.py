@@ -1,9 +1,15 @@
 """Testovi za budgets modul — CRUD + summary."""
 
+import json
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config.models import User, Category
+from src.config.models import User, Budget, BudgetAlert, Category, MonthlyRollup
+from src.modules.budgets import alerts
+from src.modules.budgets.alerts import ALERT_CHANNEL, reconcile_budget_alerts
 
 
 class TestCreateBudget:
@@ -109,6 +115,236 @@ class TestUpdateBudget:
         assert response.json()["amount"] == 25000
 
 
+class TestBulkBudgets:
+    async def test_bulk_skips_existing_and_foreign(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        food, transport = test_categories[1].id, test_categories[2].id
+        await client.post("/api/budgets/", headers=auth_headers, json={
+            "category_id": food, "amount": 500, "month": "2026-02-01",
+        })
+        response = await client.post("/api/budgets/bulk", headers=auth_headers, json={
+            "month": "2026-02-01",
+            "items": [
+                {"category_id": food, "amount": 20000},
+                {"category_id": transport, "amount": 3000},
+                {"category_id": 99999, "amount": 100},
+            ],
+        })
+        assert response.status_code == 201
+        data = response.json()
+        assert (data["created"], data["skipped"]) == (1, 2)
+        assert [(b["category_id"], b["amount"]) for b in data["budgets"]] == [(transport, 3000)]
+
+        budgets = await client.get("/api/budgets/?month=2026-02-01", headers=auth_headers)
+        assert sorted(b["amount"] for b in budgets.json()) == [500, 3000]
+
+    async def test_bulk_rejects_repeated_category(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        item = {"category_id": test_categories[1].id, "amount": 100}
+        response = await client.post("/api/budgets/bulk", headers=auth_headers, json={
+            "month": "2026-02-01", "items": [item, item],
+        })
+        assert response.status_code == 400
+
+    async def test_rollover_scales_and_skips(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        food, transport = test_categories[1].id, test_categories[2].id
+        await client.post("/api/budgets/bulk", headers=auth_headers, json={
+            "month": "2026-01-01",
+            "items": [{"category_id": food, "amount": 1000}, {"category_id": transport, "amount": 250}],
+        })
+        await client.post("/api/budgets/", headers=auth_headers, json={
+            "category_id": food, "amount": 1, "month": "2026-03-01",
+        })
+
+        response = await client.post(
+            "/api/budgets/rollover?from=2026-01-01&to=2026-02-01&months=3&scale=1.1", headers=auth_headers
+        )
+        assert response.status_code == 201
+        data = response.json()
+        assert (data["created"], data["skipped"]) == (5, 1)
+
+        budgets = await client.get("/api/budgets/", headers=auth_headers)
+        by_month = {}
+        for budget in budgets.json():
+            by_month.setdefault(budget["month"], {})[budget["category_id"]] = budget["amount"]
+        assert by_month["2026-02-01"] == {food: 1100, transport: 275}
+        assert by_month["2026-03-01"] == {food: 1, transport: 275}
+        assert by_month["2026-04-01"] == {food: 1100, transport: 275}
+
+    async def test_rollover_into_source_month(self, client: AsyncClient, auth_headers: dict):
+        response = await client.post(
+            "/api/budgets/rollover?from=2026-03-01&to=2026-01-01&months=6", headers=auth_headers
+        )
+        assert response.status_code == 400
+
+
+class TestBudgetSummaryQueries:
+    async def test_summary_is_one_query(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], statement_counter: list[str]
+    ):
+        for category in test_categories[1:]:
+            await client.post("/api/budgets/", headers=auth_headers, json={
+                "category_id": category.id, "amount": 1000, "month": "2026-02-01",
+            })
+            await client.post("/api/transactions/", headers=auth_headers, json={
+                "amount": 300, "type": "expense", "category_id": category.id, "date": "2026-02-10",
+            })
+
+        statement_counter.clear()
+        response = await client.get("/api/budgets/summary?month=2026-02-01", headers=auth_headers)
+        assert [item["spent"] for item in response.json()] == [300, 300]
+        assert len(statement_counter) == 1
+
+
+class TestBudgetReport:
+    async def test_budget_vs_actual_matrix(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        food, transport = test_categories[1].id, test_categories[2].id
+        for month, amount in (("2026-01-01", 20000), ("2026-03-01", 22000)):
+            await client.post("/api/budgets/", headers=auth_headers, json={
+                "category_id": food, "amount": amount, "month": month,
+            })
+        for category_id, amount, date in ((food, 5000, "2026-01-15"), (food, 7000, "2026-02-03"), (transport, 900, "2026-03-31")):
+            await client.post("/api/transactions/", headers=auth_headers, json={
+                "amount": amount, "type": "expense", "category_id": category_id, "date": date,
+            })
+
+        response = await client.get("/api/budgets/report?date_from=2026-01-01&date_to=2026-03-01", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["months"] == ["2026-01-01", "2026-02-01", "2026-03-01"]
+
+        rows = {row["category_id"]: row for row in data["data"]}
+        assert [(c["budgeted"], c["spent"], c["remaining"]) for c in rows[food]["months"]] == [
+            (20000, 5000, 15000), (0, 7000, -7000), (22000, 0, 22000),
+        ]
+        assert rows[food]["budgeted_total"] == 42000
+        # Rashod bez budzeta je takodje u izvestaju
+        assert rows[transport]["spent_total"] == 900
+
+    async def test_range_limit(self, client: AsyncClient, auth_headers: dict):
+        response = await client.get("/api/budgets/report?date_from=2020-01-01&date_to=2026-01-01", headers=auth_headers)
+        assert response.status_code == 400
+
+
+def _published(mock_redis) -> list[tuple[int, int]]:
+    events = [json.loads(call.args[1]) for call in mock_redis.publish.call_args_list if call.args[0] == ALERT_CHANNEL]
+    return [(event["budget_id"], event["threshold"]) for event in events]
+
+
+class TestBudgetAlerts:
+    async def _expense(self, client: AsyncClient, auth_headers: dict, category_id: int, amount: float) -> str:
+        response = await client.post("/api/transactions/", headers=auth_headers, json={
+            "amount": amount, "type": "expense", "category_id": category_id, "date": "2026-02-10",
+        })
+        return response.json()["id"]
+
+    async def test_thresholds_fire_once(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], mock_redis
+    ):
+        food = test_categories[1].id
+        budget = await client.post("/api/budgets/", headers=auth_headers, json={
+            "category_id": food, "amount": 1000, "month": "2026-02-01",
+        })
+        budget_id = budget.json()["id"]
+
+        await self._expense(client, auth_headers, food, 700)
+        assert _published(mock_redis) == []
+        await self._expense(client, auth_headers, food, 150)
+        assert _published(mock_redis) == [(budget_id, 80)]
+        await self._expense(client, auth_headers, food, 10)
+        await self._expense(client, auth_headers, food, 200)
+        assert _published(mock_redis) == [(budget_id, 80), (budget_id, 100)]
+
+        response = await client.get("/api/budgets/alerts?month=2026-02-01", headers=auth_headers)
+        assert [(alert["threshold"], alert["spent"]) for alert in response.json()] == [(100, 1060), (80, 850)]
+
+    async def test_drop_below_threshold_rearms(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], mock_redis
+    ):
+        food = test_categories[1].id
+        await client.post("/api/budgets/", headers=auth_headers, json={
+            "category_id": food, "amount": 1000, "month": "2026-02-01",
+        })
+        big = await self._expense(client, auth_headers, food, 900)
+        await client.delete(f"/api/transactions/{big}", headers=auth_headers)
+        response = await client.get("/api/budgets/alerts", headers=auth_headers)
+        assert response.json() == []
+
+        await self._expense(client, auth_headers, food, 850)
+        assert [threshold for _, threshold in _published(mock_redis)] == [80, 80]
+
+    async def test_raising_budget_clears_alert(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        food = test_categories[1].id
+        budget = await client.post("/api/budgets/", headers=auth_headers, json={
+            "category_id": food, "amount": 1000, "month": "2026-02-01",
+        })
+        await self._expense(client, auth_headers, food, 900)
+        await client.put(f"/api/budgets/{budget.json()['id']}", headers=auth_headers, json={"amount": 5000})
+
+        response = await client.get("/api/budgets/alerts", headers=auth_headers)
+        assert response.json() == []
+
+    async def test_check_is_scoped_to_touched_month(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], db: AsyncSession
+    ):
+        food = test_categories[1].id
+        january = await client.post("/api/budgets/", headers=auth_headers, json={
+            "category_id": food, "amount": 1000, "month": "2026-01-01",
+        })
+        await client.post("/api/transactions/", headers=auth_headers, json={
+            "amount": 900, "type": "expense", "category_id": food, "date": "2026-01-10",
+        })
+        # Zaobilazna izmena: januarski alert vise ne vazi, ali ga proverava tek upis u januaru
+        await db.execute(update(Budget).where(Budget.id == january.json()["id"]).values(amount=5000))
+        await db.commit()
+
+        await self._expense(client, auth_headers, food, 100)
+        assert len((await db.execute(select(BudgetAlert.id))).all()) == 1
+        await client.post("/api/transactions/", headers=auth_headers, json={
+            "amount": 1, "type": "expense", "category_id": food, "date": "2026-01-11",
+        })
+        assert (await db.execute(select(BudgetAlert.id))).all() == []
+
+    async def test_failed_check_keeps_the_write(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], monkeypatch
+    ):
+        async def broken(db, *args):
+            await db.execute(text("SELECT * FROM missing_table"))
+
+        monkeypatch.setattr(alerts, "evaluate_budget_alerts", broken)
+        await self._expense(client, auth_headers, test_categories[1].id, 100)
+
+        response = await client.get("/api/transactions/", headers=auth_headers)
+        assert response.json()["total"] == 1
+
+    async def test_reconcile_repairs_drift(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], db: AsyncSession, mock_redis
+    ):
+        food = test_categories[1].id
+        await client.post("/api/budgets/", headers=auth_headers, json={
+            "category_id": food, "amount": 1000, "month": "2026-02-01",
+        })
+        await self._expense(client, auth_headers, food, 500)
+
+        # Agregat se razisao od transakcija (npr. rucna izmena baze)
+        await db.execute(update(MonthlyRollup).values(total=900))
+        await db.commit()
+
+        result = await reconcile_budget_alerts(db)
+        assert result == {"drifted": 1, "alerts": 0}
+        assert _published(mock_redis) == []
+
+        assert await reconcile_budget_alerts(db) == {"drifted": 0, "alerts": 0}
+        response = await client.get("/api/budgets/summary?month=2026-02-01", headers=auth_headers)
+        assert response.json()[0]["spent"] == 500
+
+
 class TestDeleteBudget:
     async def test_delete(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
         create = await client.post("/api/budgets/", headers=auth_headers, json={
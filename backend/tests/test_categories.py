@@ -2,8 +2,11 @@
 
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config.models import User, Category
+from src.config.category_tree import subtree_cte
+from src.config.models import User, Category, CategoryClosure, MonthlyRollup
 
 
 class TestCreateCategory:
@@ -86,3 +89,275 @@ class TestDeleteCategory:
 
         get_response = await client.get(f"/api/categories/{cat_id}", headers=auth_headers)
         assert get_response.status_code == 404
+
+
+async def _expense(client: AsyncClient, auth_headers: dict, category_id: int, amount: float, date: str) -> None:
+    await client.post("/api/transactions/", headers=auth_headers, json={
+        "amount": amount, "type": "expense", "category_id": category_id, "date": date,
+    })
+
+
+async def _budget(client: AsyncClient, auth_headers: dict, category_id: int, amount: float, month: str) -> None:
+    await client.post("/api/budgets/", headers=auth_headers, json={
+        "category_id": category_id, "amount": amount, "month": month,
+    })
+
+
+class TestDeleteModes:
+    async def test_restrict_with_transactions(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        food = test_categories[1].id
+        await _expense(client, auth_headers, food, 100, "2026-02-01")
+        response = await client.delete(f"/api/categories/{food}", headers=auth_headers)
+        assert response.status_code == 400
+        assert (await client.get(f"/api/categories/{food}", headers=auth_headers)).status_code == 200
+
+    async def test_restrict_drops_budgets(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        food = test_categories[1].id
+        await _budget(client, auth_headers, food, 1000, "2026-02-01")
+        response = await client.delete(f"/api/categories/{food}", headers=auth_headers)
+        assert response.status_code == 204
+        assert (await client.get("/api/budgets/", headers=auth_headers)).json() == []
+
+    async def test_purge(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], db: AsyncSession
+    ):
+        food, transport = test_categories[1].id, test_categories[2].id
+        await _expense(client, auth_headers, food, 100, "2026-02-01")
+        await _expense(client, auth_headers, transport, 40, "2026-02-02")
+        await _budget(client, auth_headers, food, 1000, "2026-02-01")
+
+        response = await client.delete(f"/api/categories/{food}?mode=purge", headers=auth_headers)
+        assert response.status_code == 204
+
+        transactions = (await client.get("/api/transactions/", headers=auth_headers)).json()
+        assert [t["category_id"] for t in transactions["data"]] == [transport]
+        rollups = (await db.execute(select(MonthlyRollup.category_id))).scalars().all()
+        assert rollups == [transport]
+        summary = await client.get(
+            "/api/dashboard/summary?date_from=2026-02-01&date_to=2026-02-28", headers=auth_headers
+        )
+        assert summary.json()["total_expense"] == 40
+
+    async def test_reassign_requires_target(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        response = await client.delete(f"/api/categories/{test_categories[1].id}?mode=reassign", headers=auth_headers)
+        assert response.status_code == 400
+
+    async def test_reassign(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        food, transport = test_categories[1].id, test_categories[2].id
+        await _expense(client, auth_headers, food, 100, "2026-02-01")
+        response = await client.delete(
+            f"/api/categories/{food}?mode=reassign&target_id={transport}", headers=auth_headers
+        )
+        assert response.status_code == 204
+        transactions = (await client.get("/api/transactions/", headers=auth_headers)).json()
+        assert [t["category_id"] for t in transactions["data"]] == [transport]
+
+
+class TestMergeCategory:
+    async def test_merge_moves_transactions_budgets_and_rollups(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], db: AsyncSession
+    ):
+        food, transport = test_categories[1].id, test_categories[2].id
+        await _expense(client, auth_headers, food, 100, "2026-02-01")
+        await _expense(client, auth_headers, food, 50, "2026-03-05")
+        await _expense(client, auth_headers, transport, 30, "2026-02-10")
+        await _budget(client, auth_headers, food, 1000, "2026-02-01")
+        await _budget(client, auth_headers, food, 700, "2026-03-01")
+        await _budget(client, auth_headers, transport, 200, "2026-02-01")
+
+        response = await client.post(
+            f"/api/categories/{food}/merge", headers=auth_headers, json={"target_id": transport}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"target_id": transport, "transactions": 2, "budgets": 2}
+
+        assert (await client.get(f"/api/categories/{food}", headers=auth_headers)).status_code == 404
+        budgets = (await client.get("/api/budgets/", headers=auth_headers)).json()
+        assert sorted((b["category_id"], b["month"], b["amount"]) for b in budgets) == [
+            (transport, "2026-02-01", 1200), (transport, "2026-03-01", 700),
+        ]
+        rollups = (await db.execute(
+            select(MonthlyRollup.category_id, MonthlyRollup.month, MonthlyRollup.total, MonthlyRollup.tx_count)
+            .order_by(MonthlyRollup.month)
+        )).all()
+        assert [(r.category_id, r.month.isoformat(), float(r.total), r.tx_count) for r in rollups] == [
+            (transport, "2026-02-01", 130, 2), (transport, "2026-03-01", 50, 1),
+        ]
+
+    async def test_merge_requires_same_type(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        salary, food = test_categories[0].id, test_categories[1].id
+        response = await client.post(f"/api/categories/{food}/merge", headers=auth_headers, json={"target_id": salary})
+        assert response.status_code == 400
+
+    async def test_merge_into_self_or_missing(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        food = test_categories[1].id
+        response = await client.post(f"/api/categories/{food}/merge", headers=auth_headers, json={"target_id": food})
+        assert response.status_code == 400
+        response = await client.post(f"/api/categories/{food}/merge", headers=auth_headers, json={"target_id": 99999})
+        assert response.status_code == 404
+
+    async def test_merge_statement_count_is_constant(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], statement_counter: list[str]
+    ):
+        food, transport = test_categories[1].id, test_categories[2].id
+        for day in range(1, 21):
+            await _expense(client, auth_headers, food, day, f"2026-02-{day:02d}")
+
+        statement_counter.clear()
+        await client.post(f"/api/categories/{food}/merge", headers=auth_headers, json={"target_id": transport})
+        merge_sql = [
+            statement for statement in statement_counter
+            if "budget_alerts" not in statement and "SAVEPOINT" not in statement
+        ]
+        # provera kategorija + podkategorije + transakcije + 2x budzeti + DELETE kategorije
+        assert len(merge_sql) == 6, merge_sql
+
+
+async def _category(client: AsyncClient, auth_headers: dict, name: str, parent_id: int | None = None) -> int:
+    response = await client.post("/api/categories/", headers=auth_headers, json={
+        "name": name, "type": "expense", "parent_id": parent_id,
+    })
+    assert response.status_code == 201, response.json()
+    return response.json()["id"]
+
+
+async def _closure(db: AsyncSession) -> set[tuple[int, int, int]]:
+    """Closure tabela; proverava se i da se poklapa sa rekurzivnim CTE-om nad parent_id."""
+    rows = set((await db.execute(
+        select(CategoryClosure.ancestor_id, CategoryClosure.descendant_id, CategoryClosure.depth)
+    )).all())
+    tree = subtree_cte()
+    expected = set((await db.execute(select(tree.c.ancestor_id, tree.c.descendant_id, tree.c.depth))).all())
+    assert rows == expected
+    return rows
+
+
+class TestCategoryHierarchy:
+    async def test_create_child(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], db: AsyncSession
+    ):
+        food = test_categories[1].id
+        groceries = await _category(client, auth_headers, "Namirnice", food)
+        fruit = await _category(client, auth_headers, "Voce", groceries)
+
+        response = await client.get(f"/api/categories/{fruit}", headers=auth_headers)
+        assert response.json()["parent_id"] == groceries
+        closure = await _closure(db)
+        assert {(food, fruit, 2), (groceries, fruit, 1), (fruit, fruit, 0)} <= closure
+
+    async def test_parent_must_match_type_and_exist(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        salary = test_categories[0].id
+        response = await client.post("/api/categories/", headers=auth_headers, json={
+            "name": "Bonus", "type": "expense", "parent_id": salary,
+        })
+        assert response.status_code == 400
+        response = await client.post("/api/categories/", headers=auth_headers, json={
+            "name": "Bonus", "type": "expense", "parent_id": 99999,
+        })
+        assert response.status_code == 404
+
+    async def test_move_subtree(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], db: AsyncSession
+    ):
+        food, transport = test_categories[1].id, test_categories[2].id
+        groceries = await _category(client, auth_headers, "Namirnice", food)
+        fruit = await _category(client, auth_headers, "Voce", groceries)
+
+        response = await client.put(f"/api/categories/{groceries}", headers=auth_headers, json={"parent_id": transport})
+        assert response.status_code == 200
+        closure = await _closure(db)
+        assert (transport, fruit, 2) in closure
+        assert not any(ancestor == food and descendant != food for ancestor, descendant, _ in closure)
+
+        response = await client.put(f"/api/categories/{groceries}", headers=auth_headers, json={"parent_id": None})
+        assert response.json()["parent_id"] is None
+        closure = await _closure(db)
+        assert (transport, fruit, 2) not in closure
+
+    async def test_move_under_own_descendant(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        food = test_categories[1].id
+        groceries = await _category(client, auth_headers, "Namirnice", food)
+        for parent_id in (groceries, food):
+            response = await client.put(f"/api/categories/{food}", headers=auth_headers, json={"parent_id": parent_id})
+            assert response.status_code == 400
+
+    async def test_type_change_must_match_parent_and_children(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        food = test_categories[1].id
+        groceries = await _category(client, auth_headers, "Namirnice", food)
+        fruit = await _category(client, auth_headers, "Voce", groceries)
+
+        # Roditelj je rashodna kategorija (bez parent_id u izmeni)
+        response = await client.put(f"/api/categories/{fruit}", headers=auth_headers, json={"type": "income"})
+        assert response.status_code == 400
+        # Podkategorije su rashodne
+        response = await client.put(f"/api/categories/{food}", headers=auth_headers, json={"type": "income"})
+        assert response.status_code == 400
+
+        # Izdvojen list bez dece sme da promeni tip
+        response = await client.put(f"/api/categories/{fruit}", headers=auth_headers, json={
+            "type": "income", "parent_id": None,
+        })
+        assert response.status_code == 200
+        assert response.json()["type"] == "income"
+
+    async def test_delete_moves_children_to_grandparent(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], db: AsyncSession
+    ):
+        food = test_categories[1].id
+        groceries = await _category(client, auth_headers, "Namirnice", food)
+        fruit = await _category(client, auth_headers, "Voce", groceries)
+
+        response = await client.delete(f"/api/categories/{groceries}", headers=auth_headers)
+        assert response.status_code == 204
+        assert (await client.get(f"/api/categories/{fruit}", headers=auth_headers)).json()["parent_id"] == food
+        assert (food, fruit, 1) in await _closure(db)
+
+    async def test_merge_moves_children_to_target(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category], db: AsyncSession
+    ):
+        food, transport = test_categories[1].id, test_categories[2].id
+        groceries = await _category(client, auth_headers, "Namirnice", food)
+
+        response = await client.post(f"/api/categories/{food}/merge", headers=auth_headers, json={"target_id": transport})
+        assert response.status_code == 200
+        assert (transport, groceries, 1) in await _closure(db)
+
+        response = await client.post(
+            f"/api/categories/{transport}/merge", headers=auth_headers, json={"target_id": groceries}
+        )
+        assert response.status_code == 400
+
+    async def test_subtree_totals(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        food, transport = test_categories[1].id, test_categories[2].id
+        groceries = await _category(client, auth_headers, "Namirnice", food)
+        fruit = await _category(client, auth_headers, "Voce", groceries)
+        for category_id, amount in ((food, 10), (groceries, 20), (fruit, 30), (transport, 5)):
+            await _expense(client, auth_headers, category_id, amount, "2026-02-10")
+        await _budget(client, auth_headers, food, 50, "2026-02-01")
+
+        response = await client.get("/api/dashboard/by-category?subtree=true", headers=auth_headers)
+        totals = {item["category_id"]: item["total"] for item in response.json()["data"]}
+        assert totals == {food: 60, transport: 5}
+        response = await client.get("/api/dashboard/by-category", headers=auth_headers)
+        assert len(response.json()["data"]) == 4
+
+        summary = await client.get("/api/budgets/summary?month=2026-02-01", headers=auth_headers)
+        assert summary.json()[0]["spent"] == 60
+        alerts = await client.get("/api/budgets/alerts", headers=auth_headers)
+        assert sorted(alert["threshold"] for alert in alerts.json()) == [80, 100]
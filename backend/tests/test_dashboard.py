@@ -1,9 +1,15 @@
 """Testovi za dashboard modul — summary, monthly, by-category, recent."""
 
+import datetime
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.config.models import User, Category
+from src.config.models import DailyBalance, MonthlyRollup, User, Category
+from src.config.rollups import rebuild_rollups
+from src.modules.dashboard.service import _split_period
 
 
 async def _seed_transactions(client: AsyncClient, auth_headers: dict, categories: list[Category]):
@@ -51,6 +57,15 @@ class TestSummary:
         assert data["total_expense"] == 3200
         assert data["transaction_count"] == 2
 
+    async def test_summary_reversed_range(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await _seed_transactions(client, auth_headers, test_categories)
+
+        for endpoint in ("summary", "balance"):
+            response = await client.get(
+                f"/api/dashboard/{endpoint}?date_from=2026-02-10&date_to=2026-02-07", headers=auth_headers
+            )
+            assert response.status_code == 400
+
     async def test_summary_no_auth(self, client: AsyncClient):
         response = await client.get("/api/dashboard/summary")
         assert response.status_code == 403
@@ -60,15 +75,46 @@ class TestMonthly:
     async def test_monthly_trends(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
         await _seed_transactions(client, auth_headers, test_categories)
 
-        response = await client.get("/api/dashboard/monthly?months=6", headers=auth_headers)
+        response = await client.get("/api/dashboard/monthly?months=6&end=2026-03-15", headers=auth_headers)
         assert response.status_code == 200
         data = response.json()
-        assert data["months_count"] >= 1
+        # Kalendarski meseci oktobar-mart, i oni bez transakcija
+        assert data["months_count"] == 6
+        assert [m["month"] for m in data["data"]] == ["2025-10", "2025-11", "2025-12", "2026-01", "2026-02", "2026-03"]
+        assert data["data"][0] == {"month": "2025-10", "income": 0, "expense": 0, "balance": 0}
         feb = [m for m in data["data"] if m["month"] == "2026-02"]
         assert len(feb) == 1
         assert feb[0]["income"] == 100000
         assert feb[0]["expense"] == 9700
 
+    async def test_trend_granularities(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await _seed_transactions(client, auth_headers, test_categories)
+        # Pre prozora — ne sme da ude u prvi period
+        await client.post("/api/transactions/", headers=auth_headers, json={
+            "amount": 500, "type": "expense", "category_id": test_categories[1].id, "date": "2025-12-31",
+        })
+
+        weekly = (await client.get(
+            "/api/dashboard/trends?granularity=week&periods=3&end=2026-02-12", headers=auth_headers
+        )).json()
+        assert [(w["period"], w["start"], w["end"]) for w in weekly["data"]] == [
+            ("2026-W05", "2026-01-26", "2026-02-01"),
+            ("2026-W06", "2026-02-02", "2026-02-08"),
+            ("2026-W07", "2026-02-09", "2026-02-15"),
+        ]
+        assert [(w["income"], w["expense"]) for w in weekly["data"]] == [(0, 0), (85000, 6500), (15000, 3200)]
+
+        quarterly = (await client.get(
+            "/api/dashboard/trends?granularity=quarter&periods=2&end=2026-03-31", headers=auth_headers
+        )).json()
+        assert [(q["period"], q["expense"]) for q in quarterly["data"]] == [("2025-Q4", 500), ("2026-Q1", 9700)]
+
+        yearly = (await client.get("/api/dashboard/trends?granularity=year&periods=1&end=2026-06-01", headers=auth_headers)).json()
+        assert yearly["data"] == [{
+            "period": "2026", "start": "2026-01-01", "end": "2026-12-31",
+            "income": 100000, "expense": 9700, "balance": 90300,
+        }]
+
 
 class TestByCategory:
     async def test_by_category_expense(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
@@ -108,3 +154,185 @@ class TestRecent:
         response = await client.get("/api/dashboard/recent", headers=auth_headers)
         assert response.status_code == 200
         assert response.json() == []
+
+
+class TestDashboardCache:
+    async def test_hit_returns_identical_bytes(self, client: AsyncClient, auth_headers: dict, fake_redis, test_categories: list[Category]):
+        await _seed_transactions(client, auth_headers, test_categories)
+
+        first = await client.get("/api/dashboard/by-category?type=expense", headers=auth_headers)
+        second = await client.get("/api/dashboard/by-category?type=expense", headers=auth_headers)
+
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.headers["content-type"] == "application/json"
+        assert second.content == first.content
+
+    async def test_empty_result_is_cached(self, client: AsyncClient, auth_headers: dict, fake_redis):
+        first = await client.get("/api/dashboard/recent", headers=auth_headers)
+        second = await client.get("/api/dashboard/recent", headers=auth_headers)
+
+        assert first.json() == [] and second.json() == []
+        assert second.headers["X-Cache"] == "HIT"
+
+    async def test_write_invalidates_cached_summary(self, client: AsyncClient, auth_headers: dict, fake_redis, test_categories: list[Category]):
+        await client.get("/api/dashboard/summary", headers=auth_headers)
+        await client.post("/api/transactions/", headers=auth_headers, json={
+            "amount": 1000, "type": "income", "category_id": test_categories[0].id, "date": "2026-02-05",
+        })
+
+        response = await client.get("/api/dashboard/summary", headers=auth_headers)
+        assert response.headers["X-Cache"] == "MISS"
+        assert response.json()["total_income"] == 1000
+
+
+async def _rollups(db: AsyncSession) -> set[tuple]:
+    result = await db.execute(
+        select(MonthlyRollup.month, MonthlyRollup.category_id, MonthlyRollup.type, MonthlyRollup.total, MonthlyRollup.tx_count)
+        .where(MonthlyRollup.tx_count != 0)
+    )
+    return {(month, category_id, type, float(total), count) for month, category_id, type, total, count in result.all()}
+
+
+async def _balances(db: AsyncSession) -> list[tuple]:
+    result = await db.execute(
+        select(DailyBalance.day, DailyBalance.cum_income, DailyBalance.cum_expense, DailyBalance.cum_count)
+        .order_by(DailyBalance.day)
+    )
+    return [(day, float(income), float(expense), count) for day, income, expense, count in result.all()]
+
+
+class TestMonthlyRollups:
+    async def test_every_write_path_matches_rebuild(
+        self, client: AsyncClient, auth_headers: dict, db: AsyncSession, test_categories: list[Category]
+    ):
+        await _seed_transactions(client, auth_headers, test_categories)
+        items = [
+            {"amount": 100, "type": "expense", "category_id": test_categories[1].id, "date": f"2026-0{m}-15"}
+            for m in range(1, 5)
+        ]
+        bulk = await client.post("/api/transactions/bulk", headers=auth_headers, json={"items": items})
+        ids = [r["id"] for r in bulk.json()["results"]]
+
+        await client.put(f"/api/transactions/{ids[0]}", headers=auth_headers, json={
+            "date": "2025-12-31", "category_id": test_categories[2].id, "amount": 250,
+        })
+        await client.delete(f"/api/transactions/{ids[1]}", headers=auth_headers)
+        await client.patch("/api/transactions/", headers=auth_headers, json={
+            "where": {"date_from": "2026-04-01"}, "changes": {"category_id": test_categories[2].id},
+        })
+        await client.request("DELETE", "/api/transactions/", headers=auth_headers, json={
+            "where": {"category_id": test_categories[0].id, "date_to": "2026-02-06"},
+        })
+
+        maintained = await _rollups(db)
+        balances = await _balances(db)
+        await rebuild_rollups(db)
+        assert maintained == await _rollups(db)
+        # Rebuild ne pravi redove za dane bez transakcija — uporedjuju se samo postojeci dani
+        rebuilt = await _balances(db)
+        assert [row for row in balances if row[0] in {r[0] for r in rebuilt}] == rebuilt
+        assert (datetime.date(2025, 12, 1), test_categories[2].id, "expense", 250.0, 1) in maintained
+
+    async def test_partial_months_read_from_transactions(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        items = [
+            {"amount": 10 * d, "type": "expense", "category_id": test_categories[1].id, "date": f"2026-0{m}-{d:02d}"}
+            for m in (1, 2, 3) for d in (1, 15, 28)
+        ]
+        await client.post("/api/transactions/bulk", headers=auth_headers, json={"items": items})
+
+        response = await client.get(
+            "/api/dashboard/summary?date_from=2026-01-15&date_to=2026-03-15", headers=auth_headers
+        )
+        data = response.json()
+        # 15. i 28. januar, ceo februar, 1. i 15. mart
+        assert data["total_expense"] == 150 + 280 + 10 + 150 + 280 + 10 + 150
+        assert data["transaction_count"] == 7
+
+        response = await client.get(
+            "/api/dashboard/by-category?type=expense&date_from=2026-02-01&date_to=2026-02-28", headers=auth_headers
+        )
+        assert response.json()["grand_total"] == 440
+
+    def test_split_period(self):
+        date = datetime.date
+        assert _split_period(None, None) == ((None, None), [])
+        assert _split_period(date(2026, 1, 1), date(2026, 3, 31)) == ((date(2026, 1, 1), date(2026, 3, 1)), [])
+        assert _split_period(date(2026, 1, 10), date(2026, 1, 20)) == (None, [(date(2026, 1, 10), date(2026, 1, 20))])
+        assert _split_period(date(2026, 1, 10), date(2026, 3, 5)) == (
+            (date(2026, 2, 1), date(2026, 2, 1)),
+            [(date(2026, 1, 10), date(2026, 1, 31)), (date(2026, 3, 1), date(2026, 3, 5))],
+        )
+        assert _split_period(date(2026, 2, 1), date(2026, 2, 14)) == (None, [(date(2026, 2, 1), date(2026, 2, 14))])
+
+
+class TestBalanceSeries:
+    async def test_running_balance(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await _seed_transactions(client, auth_headers, test_categories)
+
+        response = await client.get("/api/dashboard/balance", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert [point["date"] for point in data["data"]] == [
+            "2026-02-05", "2026-02-07", "2026-02-08", "2026-02-10", "2026-02-12",
+        ]
+        assert data["data"][1] == {"date": "2026-02-07", "income": 0, "expense": 4500, "balance": 80500}
+        assert data["opening_balance"] == 0
+        assert data["closing_balance"] == 90300
+
+    async def test_range_starts_from_opening_balance(
+        self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]
+    ):
+        await _seed_transactions(client, auth_headers, test_categories)
+
+        response = await client.get(
+            "/api/dashboard/balance?date_from=2026-02-08&date_to=2026-02-10", headers=auth_headers
+        )
+        data = response.json()
+        assert data["opening_balance"] == 80500
+        assert [(p["date"], p["balance"]) for p in data["data"]] == [("2026-02-08", 78500), ("2026-02-10", 93500)]
+        assert data["closing_balance"] == 93500
+
+    async def test_backdated_write_shifts_later_days(
+        self, client: AsyncClient, auth_headers: dict, fake_redis, test_categories: list[Category]
+    ):
+        await _seed_transactions(client, auth_headers, test_categories)
+        created = await client.post("/api/transactions/", headers=auth_headers, json={
+            "amount": 1000, "type": "expense", "category_id": test_categories[1].id, "date": "2026-01-20",
+        })
+
+        summary = await client.get("/api/dashboard/summary?date_from=2026-02-01", headers=auth_headers)
+        assert summary.json()["total_expense"] == 9700
+        series = await client.get("/api/dashboard/balance", headers=auth_headers)
+        assert series.json()["closing_balance"] == 89300
+
+        await client.delete(f"/api/transactions/{created.json()['id']}", headers=auth_headers)
+        series = await client.get("/api/dashboard/balance", headers=auth_headers)
+        assert [p["date"] for p in series.json()["data"]][0] == "2026-02-05"
+        assert series.json()["closing_balance"] == 90300
+
+    async def test_non_monetary_update_skips_balances(
+        self, client: AsyncClient, auth_headers: dict, db: AsyncSession, test_categories: list[Category]
+    ):
+        await _seed_transactions(client, auth_headers, test_categories)
+        earliest = (await db.execute(
+            text("SELECT id FROM transactions ORDER BY date LIMIT 1")
+        )).scalar_one()
+
+        async def rows_written(sql: str) -> int:
+            # total_changes() broji i redove koje su upisali trigger-i
+            before = (await db.execute(text("SELECT total_changes()"))).scalar_one()
+            await db.execute(text(sql), {"id": earliest})
+            return (await db.execute(text("SELECT total_changes()"))).scalar_one() - before
+
+        # Isti iznos: ni monthly_rollups ni daily_balances se ne diraju
+        assert await rows_written("UPDATE transactions SET amount = amount, description = 'x' WHERE id = :id") == 1
+        # Druga kategorija: samo dva reda u monthly_rollups, daily_balances ostaje netaknut
+        balances = await _balances(db)
+        assert await rows_written(
+            f"UPDATE transactions SET category_id = {test_categories[2].id} WHERE id = :id"
+        ) == 3
+        assert await _balances(db) == balances
+        await db.rollback()
@@ -1,5 +1,10 @@
 """Testovi za transactions modul — CRUD operacije."""
 
+import asyncio
+import csv
+import io
+import json
+
 import pytest
 from httpx import AsyncClient
 
@@ -124,3 +129,380 @@ class TestDeleteTransaction:
         # Provera da je obrisano
         get_response = await client.get(f"/api/transactions/{tx_id}", headers=auth_headers)
         assert get_response.status_code == 404
+
+
+class TestCursorPagination:
+    async def _create_many(self, client: AsyncClient, auth_headers: dict, categories: list[Category], count: int):
+        for i in range(count):
+            await client.post("/api/transactions/", headers=auth_headers, json={
+                "amount": 100 + i, "type": "expense", "category_id": categories[1].id,
+                # Vise transakcija deli isti datum — redosled razbijaju created_at i id
+                "date": f"2026-02-{1 + i // 2:02d}",
+            })
+
+    async def test_walks_all_pages_without_duplicates(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await self._create_many(client, auth_headers, test_categories, 7)
+
+        offset_ids = [t["id"] for t in (await client.get("/api/transactions/?per_page=100", headers=auth_headers)).json()["data"]]
+
+        seen = []
+        response = await client.get("/api/transactions/?pagination=cursor&per_page=3", headers=auth_headers)
+        pages = 0
+        while True:
+            data = response.json()
+            assert "total" not in data
+            seen += [t["id"] for t in data["data"]]
+            pages += 1
+            if not data["next_cursor"]:
+                break
+            response = await client.get(data["links"]["next"], headers=auth_headers)
+
+        assert pages == 3
+        assert seen == offset_ids
+
+    async def test_prev_cursor_returns_previous_page(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await self._create_many(client, auth_headers, test_categories, 5)
+
+        first = (await client.get("/api/transactions/?pagination=cursor&per_page=2", headers=auth_headers)).json()
+        assert first["prev_cursor"] is None
+        second = (await client.get(first["links"]["next"], headers=auth_headers)).json()
+        back = (await client.get(second["links"]["prev"], headers=auth_headers)).json()
+
+        assert [t["id"] for t in back["data"]] == [t["id"] for t in first["data"]]
+        assert back["prev_cursor"] is None
+
+    async def test_cursor_respects_filters(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await self._create_many(client, auth_headers, test_categories, 4)
+        await client.post("/api/transactions/", headers=auth_headers, json={
+            "amount": 85000, "type": "income", "category_id": test_categories[0].id, "date": "2026-02-03",
+        })
+
+        response = await client.get("/api/transactions/?pagination=cursor&type=income", headers=auth_headers)
+        data = response.json()
+        assert len(data["data"]) == 1
+        assert data["next_cursor"] is None
+
+    async def test_invalid_cursor(self, client: AsyncClient, auth_headers: dict):
+        response = await client.get("/api/transactions/?cursor=not-a-cursor", headers=auth_headers)
+        assert response.status_code == 400
+
+
+class TestListTotals:
+    async def test_without_total(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await client.post("/api/transactions/", headers=auth_headers, json={
+            "amount": 3000, "type": "expense", "category_id": test_categories[1].id, "date": "2026-02-07",
+        })
+
+        response = await client.get("/api/transactions/?include_total=false", headers=auth_headers)
+        data = response.json()
+        assert data["total"] is None
+        assert data["total_pages"] is None
+        assert len(data["data"]) == 1
+
+    async def test_total_is_cached_and_invalidated_on_write(self, client: AsyncClient, auth_headers: dict, fake_redis, test_categories: list[Category]):
+        tx = {"amount": 3000, "type": "expense", "category_id": test_categories[1].id, "date": "2026-02-07"}
+        await client.post("/api/transactions/", headers=auth_headers, json=tx)
+
+        assert (await client.get("/api/transactions/", headers=auth_headers)).json()["total"] == 1
+        cached_keys = [k for k in fake_redis.data if "tx-count" in k]
+        assert len(cached_keys) == 1
+
+        await client.post("/api/transactions/", headers=auth_headers, json=tx)
+        assert (await client.get("/api/transactions/", headers=auth_headers)).json()["total"] == 2
+
+    async def test_estimated_mode_falls_back_to_exact_on_sqlite(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await client.post("/api/transactions/", headers=auth_headers, json={
+            "amount": 3000, "type": "expense", "category_id": test_categories[1].id, "date": "2026-02-07",
+        })
+
+        data = (await client.get("/api/transactions/?total_mode=estimated", headers=auth_headers)).json()
+        assert data["total"] == 1
+        assert data["total_is_estimate"] is False
+
+
+class TestBulkCreate:
+    async def test_bulk_create(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        items = [
+            {"amount": 100 + i, "type": "expense", "category_id": test_categories[1].id, "date": "2026-02-10"}
+            for i in range(5)
+        ]
+        response = await client.post("/api/transactions/bulk", headers=auth_headers, json={"items": items})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 5
+        assert data["failed"] == 0
+        assert [r["index"] for r in data["results"]] == list(range(5))
+
+        listing = await client.get("/api/transactions/", headers=auth_headers)
+        assert listing.json()["total"] == 5
+
+    async def test_bulk_reports_per_item_errors(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        items = [
+            {"amount": 100, "type": "expense", "category_id": test_categories[1].id, "date": "2026-02-10"},
+            {"amount": -5, "type": "expense", "category_id": test_categories[1].id, "date": "2026-02-10"},
+            {"amount": 100, "type": "expense", "category_id": 9999, "date": "2026-02-10"},
+        ]
+        response = await client.post("/api/transactions/bulk", headers=auth_headers, json={"items": items})
+        data = response.json()
+        assert data["created"] == 1
+        assert data["failed"] == 2
+        assert data["results"][0]["status"] == "created"
+        assert data["results"][1]["error"].startswith("amount")
+        assert data["results"][2]["error"] == "Category not found"
+
+    async def test_bulk_invalidates_cache_once(self, client: AsyncClient, auth_headers: dict, mock_redis, test_categories: list[Category]):
+        items = [
+            {"amount": 100, "type": "income", "category_id": test_categories[0].id, "date": "2026-02-10"}
+            for _ in range(10)
+        ]
+        mock_redis.incr.reset_mock()
+        await client.post("/api/transactions/bulk", headers=auth_headers, json={"items": items})
+
+        generation_bumps = [c for c in mock_redis.incr.call_args_list if "gen:" in c.args[0]]
+        assert len(generation_bumps) == 1
+
+    async def test_bulk_empty_rejected(self, client: AsyncClient, auth_headers: dict):
+        response = await client.post("/api/transactions/bulk", headers=auth_headers, json={"items": []})
+        assert response.status_code == 422
+
+
+class TestImport:
+    async def _wait(self, client: AsyncClient, auth_headers: dict, job_id: str) -> dict:
+        for _ in range(200):
+            response = await client.get(f"/api/transactions/import/{job_id}", headers=auth_headers)
+            job = response.json()
+            if job["status"] in ("completed", "failed"):
+                return job
+            await asyncio.sleep(0.01)
+        raise AssertionError("import job did not finish")
+
+    async def test_csv_import(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        body = (
+            "date,amount,description,category\n"
+            "2026-02-01,150000,Plata februar,Plata\n"
+            "2026-02-03,-1200.50,Maxi,Hrana\n"
+            "05.02.2026,-90,Bus,Transport\n"
+            "not-a-date,-10,Losa linija,Hrana\n"
+        )
+        response = await client.post(
+            "/api/transactions/import?format=csv", headers=auth_headers, content=body.encode()
+        )
+        assert response.status_code == 202
+        job = await self._wait(client, auth_headers, response.json()["id"])
+        assert job["status"] == "completed"
+        assert job["rows_processed"] == 4
+        assert job["rows_imported"] == 3
+        assert job["rows_failed"] == 1
+        assert job["errors"][0].startswith("row 4")
+
+        listing = (await client.get("/api/transactions/", headers=auth_headers)).json()
+        by_description = {tx["description"]: tx for tx in listing["data"]}
+        assert by_description["Maxi"]["type"] == "expense"
+        assert float(by_description["Maxi"]["amount"]) == 1200.50
+        assert by_description["Bus"]["category_id"] == test_categories[2].id
+
+    async def test_reimport_is_deduplicated(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        body = b"date,amount,description,category\n2026-02-01,150000,Plata,Plata\n2026-02-03,-500,Pijaca,Hrana\n"
+        first = await client.post("/api/transactions/import", headers=auth_headers, content=body)
+        await self._wait(client, auth_headers, first.json()["id"])
+
+        second = await client.post("/api/transactions/import", headers=auth_headers, content=body)
+        job = await self._wait(client, auth_headers, second.json()["id"])
+        assert job["rows_imported"] == 0
+        assert job["rows_duplicate"] == 2
+
+        listing = (await client.get("/api/transactions/", headers=auth_headers)).json()
+        assert listing["total"] == 2
+
+    async def test_ofx_import_uses_default_category(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        body = (
+            "OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+            "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260210120000<TRNAMT>-45.00<FITID>A1<NAME>Kafa</STMTTRN>\n"
+            "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260210<TRNAMT>-45.00<FITID>A2<NAME>Kafa</STMTTRN>\n"
+            "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+        )
+        response = await client.post(
+            f"/api/transactions/import?format=ofx&default_category_id={test_categories[1].id}",
+            headers=auth_headers, content=body.encode(),
+        )
+        job = await self._wait(client, auth_headers, response.json()["id"])
+        # Razliciti FITID — oba reda su stvarne transakcije iako su identicne
+        assert job["rows_imported"] == 2
+
+    async def test_identical_rows_are_kept_and_reimport_skips_them(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        body = b"date,amount,description,category\n2026-02-03,-250,Kafa,Hrana\n2026-02-03,-250,Kafa,Hrana\n"
+        first = await client.post("/api/transactions/import", headers=auth_headers, content=body)
+        job = await self._wait(client, auth_headers, first.json()["id"])
+        # Dve kafe istog dana su dve transakcije
+        assert job["rows_imported"] == 2
+
+        second = await client.post("/api/transactions/import", headers=auth_headers, content=body)
+        job = await self._wait(client, auth_headers, second.json()["id"])
+        assert job["rows_imported"] == 0
+        assert job["rows_duplicate"] == 2
+
+    async def test_european_amounts(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        body = (
+            'date,amount,description,category\n'
+            '03.02.2026,"-1.234,56",Frizider,Hrana\n'
+            '04.02.2026,"1,234.50",Honorar,Plata\n'
+            '05.02.2026,"-1.234",Dvosmisleno,Hrana\n'
+        ).encode()
+        response = await client.post("/api/transactions/import", headers=auth_headers, content=body)
+        job = await self._wait(client, auth_headers, response.json()["id"])
+        assert job["rows_imported"] == 2
+        assert job["rows_failed"] == 1
+        assert "ambiguous" in job["errors"][0]
+
+        listing = (await client.get("/api/transactions/", headers=auth_headers)).json()
+        amounts = {tx["description"]: tx["amount"] for tx in listing["data"]}
+        assert amounts == {"Frizider": 1234.56, "Honorar": 1234.50}
+
+    async def test_unknown_default_category(self, client: AsyncClient, auth_headers: dict):
+        response = await client.post(
+            "/api/transactions/import?default_category_id=9999", headers=auth_headers, content=b"date,amount\n"
+        )
+        assert response.status_code == 404
+
+    async def test_empty_upload_rejected(self, client: AsyncClient, auth_headers: dict):
+        response = await client.post("/api/transactions/import", headers=auth_headers, content=b"")
+        assert response.status_code == 400
+
+
+class TestExport:
+    async def _seed(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        items = [
+            {"amount": 100 + i, "type": "expense", "category_id": test_categories[1].id,
+             "date": f"2026-02-{i + 1:02d}", "description": f"Stavka, {i}"}
+            for i in range(5)
+        ] + [{"amount": 9000, "type": "income", "category_id": test_categories[0].id, "date": "2026-02-10"}]
+        await client.post("/api/transactions/bulk", headers=auth_headers, json={"items": items})
+
+    async def test_export_csv(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await self._seed(client, auth_headers, test_categories)
+        response = await client.get("/api/transactions/export", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 6
+        assert rows[0]["date"] == "2026-02-10"
+        assert "Stavka, 4" in {row["description"] for row in rows}
+
+    async def test_export_ndjson_with_filters(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await self._seed(client, auth_headers, test_categories)
+        response = await client.get(
+            "/api/transactions/export?format=ndjson&type=expense&date_from=2026-02-02&date_to=2026-02-04",
+            headers=auth_headers,
+        )
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["date"] for line in lines] == ["2026-02-04", "2026-02-03", "2026-02-02"]
+        assert all(line["type"] == "expense" for line in lines)
+
+    async def test_export_empty_has_header(self, client: AsyncClient, auth_headers: dict):
+        response = await client.get("/api/transactions/export", headers=auth_headers)
+        assert response.text.strip() == "id,date,type,amount,category_id,description,created_at"
+
+
+class TestSetBasedChanges:
+    async def _seed(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]) -> list[str]:
+        items = [
+            {"amount": 100 + i, "type": "expense", "category_id": test_categories[1].id, "date": f"2026-02-{i + 1:02d}"}
+            for i in range(6)
+        ]
+        response = await client.post("/api/transactions/bulk", headers=auth_headers, json={"items": items})
+        return [r["id"] for r in response.json()["results"]]
+
+    async def test_recategorize_by_filter(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await self._seed(client, auth_headers, test_categories)
+        response = await client.patch("/api/transactions/", headers=auth_headers, json={
+            "where": {"category_id": test_categories[1].id, "date_from": "2026-02-04"},
+            "changes": {"category_id": test_categories[2].id},
+        })
+        assert response.status_code == 200
+        assert response.json()["affected"] == 3
+
+        listing = await client.get(f"/api/transactions/?category_id={test_categories[2].id}", headers=auth_headers)
+        assert listing.json()["total"] == 3
+
+    async def test_delete_by_ids(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        ids = await self._seed(client, auth_headers, test_categories)
+        response = await client.request("DELETE", "/api/transactions/", headers=auth_headers, json={
+            "where": {"ids": ids[:2]},
+        })
+        assert response.json()["affected"] == 2
+
+        listing = await client.get("/api/transactions/", headers=auth_headers)
+        assert listing.json()["total"] == 4
+
+    async def test_invalidates_cache_once(self, client: AsyncClient, auth_headers: dict, mock_redis, test_categories: list[Category]):
+        await self._seed(client, auth_headers, test_categories)
+        mock_redis.incr.reset_mock()
+        await client.request("DELETE", "/api/transactions/", headers=auth_headers, json={"where": {"type": "expense"}})
+
+        generation_bumps = [c for c in mock_redis.incr.call_args_list if "gen:" in c.args[0]]
+        assert len(generation_bumps) == 1
+
+    async def test_empty_predicate_rejected(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await self._seed(client, auth_headers, test_categories)
+        response = await client.request("DELETE", "/api/transactions/", headers=auth_headers, json={"where": {}})
+        assert response.status_code == 400
+
+    async def test_foreign_category_rejected(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await self._seed(client, auth_headers, test_categories)
+        response = await client.patch("/api/transactions/", headers=auth_headers, json={
+            "where": {"type": "expense"}, "changes": {"category_id": 9999},
+        })
+        assert response.status_code == 404
+
+    async def test_null_changes_rejected(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        ids = await self._seed(client, auth_headers, test_categories)
+        for field in ("type", "amount", "date", "category_id"):
+            response = await client.patch("/api/transactions/", headers=auth_headers, json={
+                "where": {"type": "expense"}, "changes": {field: None},
+            })
+            assert response.status_code == 422
+        single = await client.put(f"/api/transactions/{ids[0]}", headers=auth_headers, json={"amount": None})
+        assert single.status_code == 422
+
+        # description je jedino polje koje sme da se obrise
+        response = await client.patch("/api/transactions/", headers=auth_headers, json={
+            "where": {"ids": ids[:1]}, "changes": {"description": None},
+        })
+        assert response.json()["affected"] == 1
+
+
+class TestSearch:
+    async def _seed(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        descriptions = ["Maxi market Novi Sad", "Lidl kupovina", "Maxi 100%_popust", "Gorivo NIS", None]
+        items = [
+            {"amount": 100, "type": "expense", "category_id": test_categories[1].id,
+             "date": f"2026-02-{i + 1:02d}", "description": description}
+            for i, description in enumerate(descriptions)
+        ]
+        await client.post("/api/transactions/bulk", headers=auth_headers, json={"items": items})
+
+    async def test_search_matches_all_terms(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await self._seed(client, auth_headers, test_categories)
+        response = await client.get("/api/transactions/search?q=maxi", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert [tx["description"] for tx in data["data"]] == ["Maxi 100%_popust", "Maxi market Novi Sad"]
+        assert data["ranked"] is False
+
+        response = await client.get("/api/transactions/search?q=maxi nov", headers=auth_headers)
+        assert [tx["description"] for tx in response.json()["data"]] == ["Maxi market Novi Sad"]
+
+    async def test_search_respects_filters(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await self._seed(client, auth_headers, test_categories)
+        response = await client.get("/api/transactions/search?q=maxi&date_to=2026-02-02", headers=auth_headers)
+        assert [tx["description"] for tx in response.json()["data"]] == ["Maxi market Novi Sad"]
+
+    async def test_search_wildcards_are_literal(self, client: AsyncClient, auth_headers: dict, test_categories: list[Category]):
+        await self._seed(client, auth_headers, test_categories)
+        response = await client.get("/api/transactions/search?q=_popust", headers=auth_headers)
+        assert len(response.json()["data"]) == 1
+
+    async def test_search_requires_word(self, client: AsyncClient, auth_headers: dict):
+        response = await client.get("/api/transactions/search?q=%25%25", headers=auth_headers)
+        assert response.status_code == 400
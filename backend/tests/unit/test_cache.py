@@ -0,0 +1,214 @@
+"""Testovi za src/utils/cache.py — verzionisani kljucevi i invalidacija."""
+
+import asyncio
+
+import pytest
+
+from src.utils import cache
+from src.utils.cache import (
+    cache_get,
+    cache_get_or_compute,
+    cache_set,
+    dashboard_cache_key,
+    invalidate_user_dashboard,
+)
+
+
+class TestVersionedKeys:
+    async def test_key_contains_generation(self, fake_redis):
+        key = await dashboard_cache_key("u1", "summary", None, None)
+        assert key == "dashboard:u1:v0:summary:None:None"
+
+    async def test_invalidate_is_single_incr(self, fake_redis):
+        await cache_set(await dashboard_cache_key("u1", "recent", 10), [1, 2])
+        fake_redis.commands.clear()
+
+        await invalidate_user_dashboard("u1")
+
+        # Jedan INCR nad keyspace-om + obavestenje ostalim workerima
+        assert fake_redis.commands == ["INCR", "PUBLISH"]
+
+    async def test_invalidate_hides_old_entries(self, fake_redis):
+        await cache_set(await dashboard_cache_key("u1", "recent", 10), [1, 2])
+        assert await cache_get(await dashboard_cache_key("u1", "recent", 10)) == [1, 2]
+
+        await invalidate_user_dashboard("u1")
+
+        assert await cache_get(await dashboard_cache_key("u1", "recent", 10)) is None
+
+    async def test_invalidate_is_per_user(self, fake_redis):
+        await cache_set(await dashboard_cache_key("u2", "recent", 10), [3])
+
+        await invalidate_user_dashboard("u1")
+
+        assert await cache_get(await dashboard_cache_key("u2", "recent", 10)) == [3]
+
+
+@pytest.fixture
+def reset_stats():
+    for name in cache.coalesce_stats:
+        cache.coalesce_stats[name] = 0
+    yield cache.coalesce_stats
+
+
+class TestSingleFlight:
+    async def test_concurrent_misses_compute_once(self, fake_redis, reset_stats):
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"total": 42}
+
+        results = await asyncio.gather(*[cache_get_or_compute("k", compute) for _ in range(10)])
+
+        assert calls == 1
+        assert all(r == ({"total": 42}, "MISS") for r in results)
+        assert reset_stats["computations"] == 1
+        assert reset_stats["coalesced_local"] == 9
+        assert await cache_get("k") == {"total": 42}
+        # Lock je oslobodjen
+        assert "fintracker:lock:k" not in fake_redis.data
+
+    async def test_error_propagates_to_all_waiters(self, fake_redis, reset_stats):
+        async def compute():
+            await asyncio.sleep(0.02)
+            raise RuntimeError("db down")
+
+        results = await asyncio.gather(
+            *[cache_get_or_compute("k", compute) for _ in range(3)], return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert cache._inflight == {}
+
+    async def test_waits_for_remote_lock_holder(self, fake_redis, reset_stats):
+        # Drugi worker drzi lock i upisuje rezultat nakon kratkog vremena
+        fake_redis.data["fintracker:lock:k"] = "other-worker"
+
+        async def other_worker():
+            await asyncio.sleep(0.1)
+            await cache_set("k", {"from": "remote"})
+            del fake_redis.data["fintracker:lock:k"]
+
+        async def compute():
+            raise AssertionError("ne sme da racuna dok drugi worker drzi lock")
+
+        _, (result, _status) = await asyncio.gather(other_worker(), cache_get_or_compute("k", compute))
+
+        assert result == {"from": "remote"}
+        assert reset_stats["coalesced_remote"] == 1
+        assert reset_stats["computations"] == 0
+
+
+class TestStaleWhileRevalidate:
+    async def test_fresh_hit(self, fake_redis, reset_stats):
+        await cache_set("k", {"v": 1}, ttl=60, hard_ttl=600)
+
+        async def compute():
+            raise AssertionError("sveza vrednost se ne racuna ponovo")
+
+        assert await cache_get_or_compute("k", compute, 60, 600) == ({"v": 1}, "HIT")
+
+    async def test_stale_served_and_refreshed_once(self, fake_redis, reset_stats, monkeypatch):
+        await cache_set("k", {"v": 1}, ttl=60, hard_ttl=600)
+        # Pomeri sat iza soft TTL-a
+        real_time = cache.time.time
+        monkeypatch.setattr(cache.time, "time", lambda: real_time() + 120)
+
+        refreshes = 0
+
+        async def refresh():
+            nonlocal refreshes
+            refreshes += 1
+            await asyncio.sleep(0.02)
+            return {"v": 2}
+
+        results = await asyncio.gather(
+            *[cache_get_or_compute("k", refresh, 60, 600, refresh=refresh) for _ in range(5)]
+        )
+        assert all(r == ({"v": 1}, "STALE") for r in results)
+
+        await asyncio.gather(*cache._refresh_tasks)
+        assert refreshes == 1
+        assert reset_stats["stale_served"] == 5
+        assert reset_stats["refreshes"] == 1
+
+        monkeypatch.setattr(cache.time, "time", real_time)
+        assert await cache_get_or_compute("k", refresh, 60, 600) == ({"v": 2}, "HIT")
+
+    async def test_miss_sets_header(self, client, auth_headers):
+        response = await client.get("/api/dashboard/summary", headers=auth_headers)
+        assert response.headers["X-Cache"] == "MISS"
+
+
+class TestTwoTierCache:
+    async def test_l1_hit_skips_redis(self, fake_redis):
+        key = await dashboard_cache_key("u1", "summary")
+        await cache_set(key, {"v": 1})
+        fake_redis.commands.clear()
+
+        assert await cache_get(await dashboard_cache_key("u1", "summary")) == {"v": 1}
+        # Ni generacija ni vrednost ne idu do Redisa
+        assert fake_redis.commands == []
+        assert cache.local_cache.stats()["hits"] == 1
+
+    async def test_redis_hit_populates_l1(self, fake_redis):
+        await cache_set("k", {"v": 1})
+        cache.local_cache.clear()
+
+        assert await cache_get("k") == {"v": 1}
+        assert await cache_get("k") == {"v": 1}
+        assert cache.redis_stats["hits"] == 1
+        assert cache.local_cache.stats()["hits"] == 1
+
+    async def test_l1_respects_byte_limit(self, fake_redis, monkeypatch):
+        monkeypatch.setattr(cache.local_cache, "max_bytes", 200)
+        for i in range(10):
+            await cache_set(f"k{i}", {"payload": "x" * 40})
+
+        stats = cache.local_cache.stats()
+        assert stats["bytes"] <= 200
+        assert stats["evictions"] > 0
+        # Najnoviji unos je i dalje u L1
+        assert cache.local_cache.get("k9") is not None
+
+    async def test_l1_limit_counts_uncompressed_size(self, fake_redis, monkeypatch):
+        monkeypatch.setattr(cache.local_cache, "max_bytes", 1500)
+        await cache_set("big", {"payload": "x" * 2000})
+
+        # U Redisu je kompresovan unos manji od limita, ali u L1 ne staje
+        assert len(fake_redis.data[f"{cache.CACHE_PREFIX}big"]) < 1500
+        assert cache.local_cache.get("big") is None
+
+    async def test_pubsub_message_bumps_local_generation(self, fake_redis):
+        key_v0 = await dashboard_cache_key("u1", "summary")
+        await cache_set(key_v0, {"v": 1})
+
+        # Drugi worker je invalidirao korisnika
+        cache.handle_invalidation({"type": "generation", "user_id": "u1", "generation": 7})
+
+        assert await dashboard_cache_key("u1", "summary") == "dashboard:u1:v7:summary"
+
+    async def test_invalidate_publishes_generation(self, fake_redis):
+        await invalidate_user_dashboard("u1")
+
+        channel, message = fake_redis.published[0]
+        assert channel == cache.INVALIDATION_CHANNEL
+        assert '"generation": 1' in message
+
+    async def test_stale_local_generation_does_not_mask_redis_reset(self, fake_redis):
+        cache.handle_invalidation({"type": "generation", "user_id": "u1", "generation": 7})
+        # Lokalna kopija istekla, a gen: kljuc u Redisu je izgubljen pa INCR krece od 1
+        generation, _ = cache._generations["u1"]
+        cache._generations["u1"] = (generation, 0.0)
+        fake_redis.data[cache.GENERATION_KEY.format(user_id="u1")] = "1"
+
+        assert await dashboard_cache_key("u1", "summary") == "dashboard:u1:v1:summary"
+
+    async def test_incr_result_is_authoritative(self, fake_redis):
+        cache.handle_invalidation({"type": "generation", "user_id": "u1", "generation": 7})
+        await invalidate_user_dashboard("u1")
+
+        assert await dashboard_cache_key("u1", "summary") == "dashboard:u1:v1:summary"
@@ -0,0 +1,67 @@
+"""Testovi za src/utils/codec.py — format zaglavlja, codec-i i kompresija."""
+
+import pytest
+
+from src.utils import codec as codec_module
+from src.utils.codec import HEADER, CacheCodec
+
+VALUE = {"data": [{"category_id": i, "category_name": f"Kategorija {i}", "total": i * 1.5} for i in range(50)]}
+
+
+class TestCacheCodec:
+    @pytest.mark.parametrize("name", ["json", "orjson", "msgpack"])
+    @pytest.mark.parametrize("compression", ["none", "zlib"])
+    def test_roundtrip(self, name, compression):
+        c = CacheCodec(codec=name, compression=compression, compress_min_bytes=64)
+        value, fresh_until = c.decode(c.encode(VALUE, 123.5))
+        assert value == VALUE
+        assert fresh_until == 123.5
+
+    def test_raw_bytes_unchanged(self):
+        c = CacheCodec(codec="msgpack", compression="zlib", compress_min_bytes=8)
+        payload = b'{"total": 0, "data": []}' * 10
+        assert c.decode(c.encode(payload, 1.0)) == (payload, 1.0)
+
+    def test_compression_only_above_threshold(self):
+        c = CacheCodec(codec="json", compression="zlib", compress_min_bytes=1000)
+        small = c.encode({"a": 1}, 0)
+        large = c.encode(VALUE, 0)
+        assert small[HEADER.size:] == b'{"a": 1}'
+        assert len(large) < len(CacheCodec(codec="json").encode(VALUE, 0))
+
+    def test_reader_accepts_any_codec(self):
+        # Worker sa novim codec-om cita unose koje je upisao stari (postepeni rollout)
+        old = CacheCodec(codec="json").encode(VALUE, 1.0)
+        new = CacheCodec(codec="msgpack", compression="zlib", compress_min_bytes=0)
+        assert new.decode(old) == (VALUE, 1.0)
+
+    def test_unknown_format_is_miss(self):
+        c = CacheCodec()
+        assert c.decode(b'j1700000000.000\n{"legacy": true}') is None
+        bumped = bytearray(c.encode(VALUE, 1.0))
+        bumped[2] = codec_module.FORMAT_VERSION + 1
+        assert c.decode(bytes(bumped)) is None
+
+    @pytest.mark.parametrize("offset, byte", [(3, 9), (4, 0x04), (4, 0x03)])
+    def test_unknown_codec_or_flag_is_miss(self, offset, byte):
+        c = CacheCodec(codec="json")
+        tampered = bytearray(c.encode(VALUE, 1.0))
+        tampered[offset] = byte
+        assert c.decode(bytes(tampered)) is None
+
+    def test_corrupt_payload_is_miss(self):
+        c = CacheCodec(codec="json", compression="zlib", compress_min_bytes=0)
+        data = c.encode(VALUE, 1.0)
+        assert c.decode(data[:-10]) is None
+        assert c.decode(data[:HEADER.size] + b"not zlib") is None
+        assert CacheCodec(codec="json").decode(data[:HEADER.size] + b"{broken") is None
+
+    def test_sized_reports_uncompressed_payload(self):
+        c = CacheCodec(codec="json", compression="zlib", compress_min_bytes=0)
+        data, size = c.encode_sized(VALUE, 1.0)
+        assert size > len(data) - HEADER.size
+        assert c.decode_sized(data) == (VALUE, 1.0, size)
+
+    def test_unknown_codec_name(self):
+        with pytest.raises(ValueError):
+            CacheCodec(codec="pickle")
@@ -0,0 +1,88 @@
+"""Testovi za parsiranje i deduplikaciju uvoza izvoda."""
+
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from src.config.models import Category, Transaction, TransactionType, User
+from src.modules.transactions import importer
+from src.modules.transactions.importer import RowError, RowMapper, _insert_rows, _iter_ofx, _parse_amount
+from src.modules.transactions.schemas import ImportFormat
+from src.utils.errors import ValidationError
+
+
+class TestParseAmount:
+    @pytest.mark.parametrize("raw, expected", [
+        ("1234.56", "1234.56"),
+        ("-1234,56", "-1234.56"),
+        ("1.234,56", "1234.56"),
+        ("-1.234,00", "-1234.00"),
+        ("1,234.56", "1234.56"),
+        ("1.234.567,8", "1234567.8"),
+        ("1,234,567", "1234567"),
+        ("1 234,56", "1234.56"),
+        ("45", "45"),
+        ("-0,5", "-0.5"),
+    ])
+    def test_formats(self, raw, expected):
+        assert _parse_amount(raw) == Decimal(expected)
+
+    @pytest.mark.parametrize("raw", ["1.234", "1,234", "-12,345"])
+    def test_ambiguous_rejected(self, raw):
+        with pytest.raises(RowError, match="ambiguous"):
+            _parse_amount(raw)
+
+    @pytest.mark.parametrize("raw", ["abc", "1.234,56,7", "1,2.3.4"])
+    def test_invalid_rejected(self, raw):
+        with pytest.raises(RowError):
+            _parse_amount(raw)
+
+
+class TestImportHash:
+    def test_repeated_content_gets_distinct_hashes(self):
+        mapper = RowMapper(ImportFormat.csv, [], default_category_id=1)
+        row = {"date": "2026-02-03", "amount": "-250", "description": "Kafa"}
+        first, second = mapper.map(row)["import_hash"], mapper.map(row)["import_hash"]
+        assert first != second
+
+        # Novi prolaz kroz isti fajl daje iste hash-eve
+        again = RowMapper(ImportFormat.csv, [], default_category_id=1)
+        assert [again.map(row)["import_hash"] for _ in range(2)] == [first, second]
+
+
+class TestIterOfx:
+    def test_blocks_split_across_reads(self, monkeypatch):
+        monkeypatch.setattr(importer, "_OFX_READ_SIZE", 7)
+        ofx = "<OFX><STMTTRN><TRNAMT>-12.50<NAME>Kafa</STMTTRN><STMTTRN><TRNAMT>100</STMTTRN></OFX>"
+        assert list(_iter_ofx(io.StringIO(ofx))) == [{"trnamt": "-12.50", "name": "Kafa"}, {"trnamt": "100"}]
+
+    def test_text_without_tags_is_capped(self, monkeypatch):
+        monkeypatch.setattr(importer, "OFX_MAX_BUFFER", 1000)
+        with pytest.raises(ValidationError):
+            list(_iter_ofx(io.StringIO("<OFX>" + "x" * 200_000)))
+
+
+class TestInsertRows:
+    async def test_conflicting_hashes_are_skipped(self, db):
+        user = User(email="imp@test.com", password="x", name="Imp")
+        db.add(user)
+        await db.flush()
+        category = Category(user_id=user.id, name="Hrana", type=TransactionType.expense)
+        db.add(category)
+        await db.flush()
+
+        def rows():
+            return [{
+                "id": uuid.uuid4(), "user_id": user.id, "category_id": category.id, "amount": Decimal("10.00"),
+                "type": "expense", "description": "Kafa", "date": datetime.date(2026, 2, 3),
+                "created_at": datetime.datetime.utcnow(), "import_hash": f"h{i}",
+            } for i in range(3)]
+
+        # Drugi (istovremeni) uvoz istog fajla ne upisuje nista
+        assert await _insert_rows(db, rows()) == 3
+        assert await _insert_rows(db, rows()) == 0
+        assert (await db.execute(select(func.count()).select_from(Transaction))).scalar() == 3
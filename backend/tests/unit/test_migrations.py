@@ -0,0 +1,131 @@
+"""Testovi za upgrade_schema — postojeca baza bez novih kolona i indeksa."""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config.database import Base
+from src.config.migrations import upgrade_schema
+
+
+async def _old_schema_engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # Stanje pre user-012: bez import_hash i bez unique indeksa
+        await conn.execute(text("DROP INDEX uq_transactions_user_import_hash"))
+        await conn.execute(text("ALTER TABLE transactions DROP COLUMN import_hash"))
+    return engine
+
+
+class TestUpgradeSchema:
+    async def test_adds_import_hash_and_unique_index(self):
+        engine = await _old_schema_engine()
+        async with engine.begin() as conn:
+            await conn.run_sync(upgrade_schema)
+            columns = await conn.run_sync(lambda c: {col["name"] for col in inspect(c).get_columns("transactions")})
+            indexes = await conn.run_sync(lambda c: {i["name"]: i["unique"] for i in inspect(c).get_indexes("transactions")})
+        await engine.dispose()
+
+        assert "import_hash" in columns
+        assert indexes["uq_transactions_user_import_hash"]
+
+    async def test_is_idempotent(self):
+        engine = await _old_schema_engine()
+        async with engine.begin() as conn:
+            await conn.run_sync(upgrade_schema)
+            await conn.run_sync(upgrade_schema)
+        await engine.dispose()
+
+
+async def _engine_without_uniques():
+    """categories i budgets kakve su bile pre user-017 — bez unique constraint-a, sa duplikatima."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text("DROP TABLE budgets"))
+        await conn.execute(text("DROP TABLE categories"))
+        await conn.execute(text(
+            "CREATE TABLE categories (id INTEGER PRIMARY KEY, user_id CHAR(32) NOT NULL,"
+            " name VARCHAR(100) NOT NULL, type VARCHAR(7) NOT NULL, icon VARCHAR(50))"
+        ))
+        await conn.execute(text(
+            "CREATE TABLE budgets (id INTEGER PRIMARY KEY, user_id CHAR(32) NOT NULL,"
+            " category_id INTEGER NOT NULL, amount NUMERIC(10, 2) NOT NULL, month DATE NOT NULL)"
+        ))
+        await conn.execute(text(
+            "INSERT INTO categories (id, user_id, name, type) VALUES"
+            " (1, 'u1', 'Hrana', 'expense'), (2, 'u1', 'Hrana', 'expense'), (3, 'u1', 'Hrana', 'income')"
+        ))
+        await conn.execute(text(
+            "INSERT INTO budgets (id, user_id, category_id, amount, month) VALUES"
+            " (1, 'u1', 1, 100, '2024-01-01'), (2, 'u1', 2, 200, '2024-01-01'), (3, 'u1', 2, 300, '2024-02-01')"
+        ))
+        await conn.execute(text(
+            "INSERT INTO transactions (id, user_id, category_id, amount, type, date, created_at) VALUES"
+            " ('t1', 'u1', 2, 10, 'expense', '2024-01-05', '2024-01-05 00:00:00')"
+        ))
+    return engine
+
+
+class TestCategoryBudgetUniques:
+    async def test_merges_duplicates_and_adds_constraints(self):
+        engine = await _engine_without_uniques()
+        async with engine.begin() as conn:
+            await conn.run_sync(upgrade_schema)
+            await conn.run_sync(upgrade_schema)
+            categories = (await conn.execute(text("SELECT id FROM categories ORDER BY id"))).scalars().all()
+            budgets = (await conn.execute(text("SELECT id, category_id FROM budgets ORDER BY id"))).all()
+            category_ids = (await conn.execute(text("SELECT category_id FROM transactions"))).scalars().all()
+            budget_indexes = await conn.run_sync(lambda c: {i["name"] for i in inspect(c).get_indexes("budgets")})
+        await engine.dispose()
+
+        assert categories == [1, 3]
+        # Budzet kategorije 2 za januar je duplikat i brise se, februarski prelazi na kategoriju 1
+        assert [tuple(row) for row in budgets] == [(1, 1), (3, 1)]
+        assert category_ids == [1]
+        assert "uq_budgets_user_category_month" in budget_indexes
+
+
+class TestRollupTriggers:
+    async def test_installs_triggers_and_backfills(self):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            for name in ("insert", "update", "delete"):
+                await conn.execute(text(f"DROP TRIGGER trg_transactions_rollup_{name}"))
+            await conn.execute(text(
+                "INSERT INTO transactions (id, user_id, category_id, amount, type, date, created_at) VALUES"
+                " ('t1', 'u1', 1, 10, 'expense', '2024-01-05', '2024-01-05 00:00:00'),"
+                " ('t2', 'u1', 1, 15, 'expense', '2024-01-20', '2024-01-20 00:00:00')"
+            ))
+            await conn.run_sync(upgrade_schema)
+            # Posle migracije trigger-i odrzavaju zbirove
+            await conn.execute(text("DELETE FROM transactions WHERE id = 't2'"))
+            rollups = (await conn.execute(text("SELECT month, total, tx_count FROM monthly_rollups"))).all()
+        await engine.dispose()
+
+        assert [tuple(row) for row in rollups] == [("2024-01-01", 10, 1)]
+
+
+class TestCategoryHierarchy:
+    async def test_installs_closure_triggers_and_backfills(self):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            for name in ("insert", "update", "delete"):
+                await conn.execute(text(f"DROP TRIGGER trg_categories_closure_{name}"))
+            await conn.execute(text(
+                "INSERT INTO categories (id, user_id, name, type, parent_id) VALUES"
+                " (1, 'u1', 'Hrana', 'expense', NULL), (2, 'u1', 'Namirnice', 'expense', 1),"
+                " (3, 'u1', 'Voce', 'expense', 2)"
+            ))
+            await conn.run_sync(upgrade_schema)
+            await conn.execute(text("INSERT INTO categories (id, user_id, name, type, parent_id) VALUES (4, 'u1', 'Restorani', 'expense', 1)"))
+            closure = (await conn.execute(text(
+                "SELECT ancestor_id, descendant_id, depth FROM category_closure ORDER BY 1, 2"
+            ))).all()
+        await engine.dispose()
+
+        assert [tuple(row) for row in closure] == [
+            (1, 1, 0), (1, 2, 1), (1, 3, 2), (1, 4, 1), (2, 2, 0), (2, 3, 1), (3, 3, 0), (4, 4, 0),
+        ]
@@ -0,0 +1,30 @@
+"""Testovi za kalendarske periode trendova."""
+
+from datetime import date
+
+from src.modules.dashboard.periods import period_label, period_start, period_starts, shift_period
+from src.modules.dashboard.schemas import TrendGranularity as G
+
+
+class TestPeriods:
+    def test_period_start(self):
+        assert period_start(date(2026, 2, 12), G.week) == date(2026, 2, 9)
+        assert period_start(date(2026, 2, 12), G.month) == date(2026, 2, 1)
+        assert period_start(date(2026, 8, 31), G.quarter) == date(2026, 7, 1)
+        assert period_start(date(2026, 8, 31), G.year) == date(2026, 1, 1)
+
+    def test_shift_crosses_year(self):
+        assert shift_period(date(2026, 1, 1), G.month, -1) == date(2025, 12, 1)
+        assert shift_period(date(2026, 1, 1), G.quarter, -2) == date(2025, 7, 1)
+        assert shift_period(date(2025, 12, 29), G.week, 1) == date(2026, 1, 5)
+
+    def test_starts_are_calendar_months(self):
+        assert period_starts(G.month, 3, date(2026, 1, 31)) == [date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1)]
+        # (months - 1) * 28 dana bi za 24 meseca pocelo od maja 2024 (aprila nema)
+        starts = period_starts(G.month, 24, date(2026, 3, 15))
+        assert len(starts) == 24 and starts[0] == date(2024, 4, 1)
+
+    def test_labels(self):
+        assert period_label(date(2025, 12, 29), G.week) == "2026-W01"
+        assert period_label(date(2026, 10, 1), G.quarter) == "2026-Q4"
+        assert period_label(date(2026, 1, 1), G.year) == "2026"
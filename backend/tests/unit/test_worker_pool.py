@@ -0,0 +1,76 @@
+"""Testovi za BoundedWorkerPool — izvrsavanje van event loop-a i admission kontrola."""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.utils.errors import ServiceUnavailableError
+from src.utils.worker_pool import BoundedWorkerPool
+
+
+class TestBoundedWorkerPool:
+    async def test_runs_in_worker_thread(self):
+        pool = BoundedWorkerPool("test", workers=2, max_queue=2)
+        try:
+            result = await pool.run(threading.get_ident)
+            assert result != threading.get_ident()
+            assert pool.stats()["completed"] == 1
+        finally:
+            pool.shutdown()
+
+    async def test_rejects_when_queue_full(self):
+        pool = BoundedWorkerPool("test", workers=1, max_queue=1)
+        release = threading.Event()
+        try:
+            running = [asyncio.create_task(pool.run(release.wait, 5)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            assert pool.stats()["saturation"] == 1.0
+
+            with pytest.raises(ServiceUnavailableError):
+                await pool.run(release.wait, 5)
+
+            release.set()
+            await asyncio.gather(*running)
+            stats = pool.stats()
+            assert stats["rejected"] == 1
+            assert stats["completed"] == 2
+            assert stats["in_flight"] == 0
+        finally:
+            release.set()
+            pool.shutdown()
+
+    async def test_event_loop_not_blocked(self):
+        pool = BoundedWorkerPool("test", workers=1, max_queue=0)
+        release = threading.Event()
+        try:
+            task = asyncio.create_task(pool.run(release.wait, 5))
+            # Event loop i dalje obradjuje druge korutine dok worker radi
+            await asyncio.sleep(0.01)
+            assert not task.done()
+            release.set()
+            assert await task is True
+        finally:
+            release.set()
+            pool.shutdown()
+
+    async def test_cancelled_waiter_still_counted_until_work_finishes(self):
+        pool = BoundedWorkerPool("test", workers=1, max_queue=0)
+        release = threading.Event()
+        try:
+            task = asyncio.create_task(pool.run(release.wait, 5))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+            # bcrypt/worker i dalje radi — mesto u pool-u nije oslobodjeno
+            assert pool.stats()["in_flight"] == 1
+            with pytest.raises(ServiceUnavailableError):
+                await pool.run(release.wait, 5)
+
+            release.set()
+            await asyncio.sleep(0.05)
+            assert pool.stats()["in_flight"] == 0
+        finally:
+            release.set()
+            pool.shutdown()